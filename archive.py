@@ -0,0 +1,283 @@
+"""Columnar archive of generated characters.
+
+An archive is a directory of .npy files, one column per slot of the compact form (compact.py):
+row or choice index of every roll, NONE where the character did not roll it, so every role has
+all columns. Friends, enemies and lovers are stored as offset arrays into tables of their
+compact bytes. Files are opened memory-mapped, a query reads only the columns it filters on.
+
+    meta.json                   version, count, roles and columns
+    role.npy, sex.npy           uint8 index in tables['roles'] and SEXES
+    name.npy                    uint16 index in the name pool, custom_names.json for the rest
+    <field>.npy                 uint8 slot of the field, e.g. boss.npy, division.split.npy
+    <kind>.offsets.npy          int64 start of the people of every character, count + 1 entries
+    <kind>.npy                  uint8 compact bytes of friends, enemies and love, one row a person
+
+Queries take field=value conditions, see Archive.mask:
+    archive.count(role='exec', boss=3)
+    archive.render(archive.select(cultural_region='East Asian', hairstyle='Mohawk'))
+"""
+import json
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from compact import CUSTOM_NAME, HEADER_SIZE, LAYOUTS, NONE, RELATIONSHIP_SIZES, CompactCharacter, _tables
+from table_store import ROW_INDEX
+
+ARCHIVE_VERSION = 1
+
+SEXES = ('male', 'female')
+
+# Kinds of slots whose column is named after the field, the others get the kind as suffix
+VALUE_KINDS = ('row', 'row_by', 'choice', 'origin', 'language')
+
+
+def _column_name(slot) -> str:
+    return slot.field if slot.kind in VALUE_KINDS else f'{slot.field}.{slot.kind}'
+
+
+# Column of every slot of each role, and the columns of all roles in order of first appearance
+LAYOUT_COLUMNS = {role: [_column_name(slot) for slot in layout.slots] for role, layout in LAYOUTS.items()}
+COLUMNS = list(dict.fromkeys(name for names in LAYOUT_COLUMNS.values() for name in names))
+
+
+def write_archive(path, characters: Iterable) -> int:
+    """
+    Store characters as a columnar archive. Columns are collected as bytes, about 60 per character,
+    and written once at the end.
+
+    Args:
+        path (str | Path): archive directory, created if missing
+        characters (Iterable): Character or CompactCharacter objects, generated with the default tables
+
+    Returns:
+        int: number of characters written
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    columns = {name: bytearray() for name in ['role', 'sex'] + COLUMNS}
+    names = []
+    counts = {kind: bytearray() for kind in RELATIONSHIP_SIZES}
+    people = {kind: bytearray() for kind in RELATIONSHIP_SIZES}
+    custom_names = {}
+
+    count = 0
+    for count, char in enumerate(characters, 1):
+        compact = char if isinstance(char, CompactCharacter) else CompactCharacter.from_character(char)
+        data = compact.data
+        layout = compact.layout
+
+        columns['role'].append(data[0])
+        columns['sex'].append(data[1])
+        names.append(compact.name_index)
+        if compact.custom_name is not None:
+            custom_names[count - 1] = compact.custom_name
+
+        values = dict(zip(LAYOUT_COLUMNS[layout.role], data[HEADER_SIZE:layout.size]))
+        for name in COLUMNS:
+            columns[name].append(values.get(name, NONE))
+
+        offset = layout.size
+        for kind, size in RELATIONSHIP_SIZES.items():
+            number = data[offset]
+            counts[kind].append(number)
+            people[kind] += data[offset + 1:offset + 1 + number * size]
+            offset += 1 + number * size
+
+    for name, column in columns.items():
+        np.save(path / f'{name}.npy', np.frombuffer(bytes(column), dtype=np.uint8))
+    np.save(path / 'name.npy', np.array(names, dtype=np.uint16))
+    for kind, size in RELATIONSHIP_SIZES.items():
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.frombuffer(bytes(counts[kind]), dtype=np.uint8), out=offsets[1:])
+        np.save(path / f'{kind}.offsets.npy', offsets)
+        np.save(path / f'{kind}.npy', np.frombuffer(bytes(people[kind]), dtype=np.uint8).reshape(-1, size))
+
+    (path / 'custom_names.json').write_text(json.dumps(custom_names, ensure_ascii=False))
+    (path / 'meta.json').write_text(json.dumps({'version': ARCHIVE_VERSION, 'count': count,
+                                                'roles': list(_tables()['roles']), 'columns': COLUMNS}))
+    return count
+
+
+class Archive(object):
+    """Read only, memory-mapped view of an archive written by write_archive"""
+
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+        meta = json.loads((self.path / 'meta.json').read_text())
+        if meta['version'] != ARCHIVE_VERSION or meta['roles'] != list(_tables()['roles']):
+            raise ValueError(f'{self.path} is not an archive of version {ARCHIVE_VERSION} '
+                             'made with the current tables')
+        self.size = meta['count']
+        self.columns = meta['columns']
+        self._arrays = {}
+        self._custom_names = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _array(self, name: str) -> np.ndarray:
+        array = self._arrays.get(name)
+        if array is None:
+            array = self._arrays[name] = np.load(self.path / f'{name}.npy', mmap_mode='r')
+        return array
+
+    def column(self, field: str) -> np.ndarray:
+        """
+        Stored column of a field: slot indices (NONE if not rolled), role and sex indices,
+        name indices, or the number of friends, enemies or lovers.
+        """
+        if field in RELATIONSHIP_SIZES:
+            return np.diff(self._array(f'{field}.offsets'))
+        if field in ('role', 'sex', 'name') or field in self.columns:
+            return self._array(field)
+        raise ValueError(f"No field '{field}'. Choose from {['role', 'sex', 'name', *self.columns, *RELATIONSHIP_SIZES]}")
+
+    def _roles_with(self, name: str) -> Iterator:
+        """Index in roles and slot of the roles that have the column"""
+        for role_index, role in enumerate(_tables()['roles']):
+            if name in LAYOUT_COLUMNS[role]:
+                yield role_index, LAYOUTS[role].slots[LAYOUT_COLUMNS[role].index(name)]
+
+    def _equals(self, field: str, value) -> np.ndarray:
+        column = self.column(field)
+        tables = _tables()
+        index = tables[ROW_INDEX]
+
+        if field == 'role':
+            return column == [role.lower() for role in tables['roles']].index(value.lower())
+        if field == 'sex':
+            return column == SEXES.index(value)
+        if field in RELATIONSHIP_SIZES or field == 'name' or '.' in field:
+            return column == value
+        if value is None:
+            return column == NONE
+
+        kinds = {slot.kind for _, slot in self._roles_with(field)}
+        if isinstance(value, int) and not isinstance(value, bool) and kinds <= {'row', 'row_by', 'origin'}:
+            return column == value - 1 # row number, as rolled
+
+        mask = np.zeros(self.size, dtype=bool)
+        if field == 'cultural_region':
+            split = self.column('cultural_region.split')
+            for position in index['Cultural Region'].get(value, ()):
+                parts = tables['Cultural Origins'][position]['Cultural Region'].split('/')
+                mask |= (column == position) & ((split == parts.index(value)) if len(parts) > 1 else True)
+            return mask
+        if field == 'language':
+            origin = self.column('cultural_region')
+            for position in index['Languages'].get(value, ()):
+                languages = tables['Cultural Origins'][position]['Languages']
+                options = [option for option, language in enumerate(languages) if language == value]
+                mask |= (origin == position) & np.isin(column, options)
+            return mask
+
+        roles = self.column('role')
+        for role_index, slot in self._roles_with(field):
+            if slot.kind == 'row':
+                mask |= (roles == role_index) & np.isin(column, index[slot.source].get(value, ()))
+            elif slot.kind == 'choice' and value in slot.source:
+                mask |= (roles == role_index) & (column == slot.source.index(value))
+            elif slot.kind == 'row_by':
+                dependency, table_names = slot.source
+                dependency_slot = next(other for other in LAYOUTS[tables['roles'][role_index]].slots
+                                       if other.field == dependency)
+                for option, table_name in table_names.items():
+                    mask |= ((roles == role_index) & (self.column(dependency) == dependency_slot.source.index(option))
+                             & np.isin(column, index[table_name].get(value, ())))
+        return mask
+
+    def mask(self, **conditions) -> np.ndarray:
+        """
+        Vectorized filter over all characters.
+
+        Args:
+            conditions: field to value. A value is
+                a table row text or choice, e.g. hairstyle='Mohawk', pack_type='sea', role='exec';
+                an int row number as rolled, from 1, for fields rolled on a table, e.g. boss=3;
+                None for a field that was not rolled, e.g. partner=None;
+                a list, tuple or set of values, any of them matches;
+                a function of the stored column returning a boolean array, e.g. enemies=lambda c: c >= 2.
+                Fields with a suffix (division.split) and name are compared with the stored index
+
+        Returns:
+            np.ndarray: True for the matching characters
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for field, value in conditions.items():
+            if callable(value):
+                mask &= np.asarray(value(self.column(field)), dtype=bool)
+            elif isinstance(value, (list, tuple, set, frozenset)):
+                mask &= np.logical_or.reduce([self._equals(field, option) for option in value] +
+                                             [np.zeros(self.size, dtype=bool)])
+            else:
+                mask &= self._equals(field, value)
+        return mask
+
+    def select(self, **conditions) -> np.ndarray:
+        """Positions of the matching characters, see mask"""
+        return np.flatnonzero(self.mask(**conditions))
+
+    def count(self, **conditions) -> int:
+        """Number of matching characters, see mask"""
+        return int(np.count_nonzero(self.mask(**conditions)))
+
+    def character(self, position: int) -> CompactCharacter:
+        """Character at the position, in compact form"""
+        role = _tables()['roles'][self._array('role')[position]]
+        name_index = int(self._array('name')[position])
+        data = bytearray((int(self._array('role')[position]), int(self._array('sex')[position])))
+        data += name_index.to_bytes(2, 'big')
+        data += bytes(int(self._array(name)[position]) for name in LAYOUT_COLUMNS[role])
+        for kind in RELATIONSHIP_SIZES:
+            start, end = self._array(f'{kind}.offsets')[position:position + 2]
+            data.append(end - start)
+            data += self._array(kind)[start:end].tobytes()
+
+        custom_name = None
+        if name_index == CUSTOM_NAME:
+            if self._custom_names is None:
+                self._custom_names = json.loads((self.path / 'custom_names.json').read_text())
+            custom_name = self._custom_names[str(position)]
+        return CompactCharacter(bytes(data), custom_name)
+
+    def render(self, positions: Iterable) -> Iterator[str]:
+        """Text of the characters at the positions, only these are rebuilt"""
+        for position in positions:
+            yield str(self.character(int(position)))
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parse = ArgumentParser(description='Build and query columnar archives of characters')
+    commands = parse.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='generate characters into an archive')
+    build.add_argument('path', type=Path)
+    build.add_argument('-c', '--count', default=1000, type=int, help='number of characters, 1000 as default')
+    build.add_argument('-r', '--role', default=None, type=str, help='role of the characters, random if not set')
+    build.add_argument('-w', '--workers', default=1, type=int, help='number of worker processes, 0 for all cores')
+    build.add_argument('--seed', default=None, type=int, help='master seed')
+    query = commands.add_parser('query', help='count and show characters matching field=value conditions')
+    query.add_argument('path', type=Path)
+    query.add_argument('conditions', nargs='*', metavar='FIELD=VALUE',
+                       help='e.g. role=exec boss=3, numbers are row numbers')
+    query.add_argument('--show', default=0, type=int, help='print the first matching characters')
+    args = parse.parse_args()
+
+    if args.command == 'build':
+        from parallel import generate_parallel
+        written = write_archive(args.path, generate_parallel(args.count, args.workers or None, args.seed,
+                                                             role=args.role))
+        print(f'{written} characters written to {args.path}')
+    else:
+        from constraints import parse_where
+        conditions = {field: int(value) if value.isdigit() else value
+                      for field, value in parse_where(args.conditions).items()}
+        archive = Archive(args.path)
+        positions = archive.select(**conditions)
+        print(f'{len(positions)} of {len(archive)} characters')
+        for text in archive.render(positions[:args.show]):
+            print(f'\n{text}')
@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import numpy as np
+
+import character_create
+from character_id import ROLL_RANGE
+from table_store import load_tables
+
+# Most rolls one character can consume: cultural origins 3, name 1, attributes 12,
+# friend/enemy/love counts 3, friends 3 x 3, enemies 3 x 7, lovers 3 x 3, role at most 7
+ROLLS_PER_CHARACTER = 65
+
+SEXES = ('male', 'female')
+
+
+def generate_batch(n: int, role: str = None, sex: str = None, seed: int = None,
+                   tables_path='data/tables.yaml') -> list:
+    """
+    Generate n characters at once. All random values are drawn up front as numpy matrices:
+    role and sex columns and a rolls matrix with one row per character and one column
+    per roll, in the order the scalar path throws them (cultural origins, name, each attribute table,
+    friends, enemies, love, then the role tables). Names are picked from the name pools by roll too.
+    Characters are then built from their rows, so the distributions are the same as for
+    characters created one by one. Only the drawing is vectorized: table lookups still run
+    per character in the role classes, which bounds the gain over main() to about 3x,
+    see benchmarks/bench_batch.py.
+
+    Args:
+        n (int): number of characters
+        role (str): role of every character, random per character if not set
+        sex (str): sex of every character, random per character if not set
+        seed (int): seed for the rolls, random if not set
+        tables_path (str): the path to the tables file
+
+    Returns:
+        list: generated characters
+    """
+    tables = load_tables(Path(__file__).parent.resolve() / tables_path)
+    roles = tables['roles']
+
+    if role:
+        message = f"No such role '{role.lower()}'. Choose from {[i for i in roles]}"
+        assert role.capitalize() in roles, message
+
+    rng = np.random.default_rng(seed)
+
+    role_column = rng.integers(len(roles), size=n, dtype=np.int8)
+    sex_column = rng.integers(len(SEXES), size=n, dtype=np.int8)
+    rolls = rng.integers(ROLL_RANGE, size=(n, ROLLS_PER_CHARACTER), dtype=np.int16)
+
+    role_classes = [character_create.ROLE_CLASSES[name.capitalize()] for name in roles]
+
+    characters = []
+    for role_index, sex_index, row in zip(role_column.tolist(), sex_column.tolist(), rolls.tolist()):
+        if role:
+            role_index = roles.index(role.capitalize())
+        role_name = roles[role_index].lower()
+        role_class = role_classes[role_index]
+
+        characters.append(role_class(None, role_name, sex or SEXES[sex_index], tables, rolls=iter(row)))
+
+    return characters
@@ -0,0 +1,37 @@
+"""Compare batch generation with creating characters one by one through main().
+
+Usage: python benchmarks/bench_batch.py [N]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from batch import generate_batch
+from character_create import main
+
+SCALAR_SAMPLE = 2000
+
+
+def bench(n: int) -> None:
+    # load tables, name pool and templates before timing, both paths share them
+    main(None, None, None)
+    generate_batch(10, seed=0)
+
+    start = time.perf_counter()
+    for _ in range(SCALAR_SAMPLE):
+        main(None, None, None)
+    scalar = (time.perf_counter() - start) / SCALAR_SAMPLE
+
+    start = time.perf_counter()
+    generate_batch(n, seed=0)
+    batch = (time.perf_counter() - start) / n
+
+    print(f'scalar: {scalar * 1e6:10.1f} us/character (sample of {SCALAR_SAMPLE})')
+    print(f'batch:  {batch * 1e6:10.1f} us/character (n={n})')
+    print(f'speedup: {scalar / batch:.1f}x')
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
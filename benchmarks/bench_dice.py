@@ -0,0 +1,29 @@
+"""Micro-benchmark of the compiled dice engine against dice.roll.
+
+Usage: python benchmarks/bench_dice.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import dice
+
+import dice_engine
+
+# every expression form rolled by character_create and tables.yaml
+EXPRESSIONS = ['1d10t', '1d6t', '1d3t', '1d6/2', '1d10/2', '1d10 + 5']
+NUMBER = 2000
+
+
+def bench() -> None:
+    print(f'{"expression":<12}{"dice.roll, us":>16}{"dice_engine, us":>18}{"speedup":>10}')
+    for expression in EXPRESSIONS:
+        library = timeit.timeit(lambda: dice.roll(expression), number=NUMBER) / NUMBER
+        engine = timeit.timeit(lambda: dice_engine.roll(expression), number=NUMBER) / NUMBER
+        print(f'{expression:<12}{library * 1e6:>16.2f}{engine * 1e6:>18.2f}{library / engine:>9.0f}x')
+
+
+if __name__ == '__main__':
+    bench()
@@ -0,0 +1,69 @@
+"""Startup benchmark: time to the first character in a fresh interpreter.
+
+Reports the slowest imports (python -X importtime) and the median time from
+interpreter start to the first generated character, for both a cold cache
+(compiled tables and name pool removed) and a warm one.
+
+Usage: python benchmarks/bench_startup.py [RUNS]
+"""
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.resolve()
+CACHE = ROOT / 'data' / '__pycache__'
+TOP_IMPORTS = 12
+
+FIRST_CHARACTER = 'import character_create; character_create.main(None, None, None)'
+
+
+def run(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def import_report() -> list:
+    """
+    Returns:
+        list: (cumulative us, self us, module) of the slowest imports of character_create
+    """
+    stderr = run('-X', 'importtime', '-c', 'import character_create').stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), int(self_time), module.rstrip()))
+
+    return sorted(rows, reverse=True)[:TOP_IMPORTS]
+
+
+def median_time(code: str, runs: int) -> float:
+    """
+    Returns:
+        float: median wall time of a fresh interpreter running the code, seconds
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run('-c', code)
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings)
+
+
+def bench(runs: int) -> None:
+    print(f'{"cumulative, us":>15}{"self, us":>10}  module')
+    for cumulative, self_time, module in import_report():
+        print(f'{cumulative:>15}{self_time:>10}  {module}')
+
+    for path in CACHE.glob('*'):
+        path.unlink()
+    print(f'\ncold cache, first character: {median_time(FIRST_CHARACTER, 1) * 1e3:8.1f} ms')
+    print(f'warm cache, first character: {median_time(FIRST_CHARACTER, runs) * 1e3:8.1f} ms (median of {runs})')
+    print(f'bare interpreter:            {median_time("pass", runs) * 1e3:8.1f} ms')
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,175 @@
+"""Benchmark suite with a stored baseline.
+
+Times table loading, every role class, relationships, enemy throws, rendering
+and whole batches, writes the results to JSON and compares them with the baseline.
+A benchmark slower than the baseline by more than the threshold is a regression
+and makes the exit code 1.
+
+Usage: python benchmarks/bench_suite.py [--out results.json] [--baseline benchmarks/baseline.json]
+                                        [--threshold 0.25] [--sizes 1000,100000,1000000] [--save-baseline]
+"""
+import json
+import platform
+import sys
+import time
+import timeit
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.resolve()
+sys.path.append(str(ROOT))
+
+import character_create
+import dice_engine
+import table_store
+from parallel import generate_parallel
+
+TABLES_PATH = ROOT / 'data' / 'tables.yaml'
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+
+ROLES = ('Fixer', 'Media', 'Exec', 'Rockerboy', 'Solo', 'Netrunner', 'Tech', 'Medtech', 'Lawman', 'Nomad')
+
+# Batch sizes timed by default
+SIZES = (1000, 100_000, 1_000_000)
+
+# Relative slowdown against the baseline reported as a regression
+THRESHOLD = 0.25
+
+# Repeats of every micro benchmark, the fastest one is kept
+REPEATS = 5
+
+# Time one repeat of a micro benchmark should take at least, seconds
+MIN_TIME = 0.2
+
+
+def measure(function) -> float:
+    """
+    Returns:
+        float: seconds per call, the fastest of REPEATS repeats
+    """
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < MIN_TIME:
+        number *= 2
+    return min(timer.repeat(REPEATS, number)) / number
+
+
+def _load_cached() -> dict:
+    table_store._loaded.clear()
+    return table_store.load_tables(TABLES_PATH)
+
+
+def _batch(size: int) -> None:
+    for _ in generate_parallel(size, workers=1, seed=0):
+        pass
+
+
+def micro_benchmarks(tables: dict) -> dict:
+    """
+    Returns:
+        dict: benchmark name to function taking no arguments
+    """
+    source = TABLES_PATH.read_bytes()
+    benchmarks = {
+        'tables: compile yaml': lambda: table_store.compile_tables(source),
+        'tables: load cached': _load_cached,
+    }
+
+    for role in ROLES:
+        role_class = getattr(character_create, role)
+        benchmarks[f'__post_init__: {role}'] = (
+            lambda role_class=role_class, role=role: role_class(None, role.lower(), 'male', tables))
+
+    dice_engine.seed(0)
+    char = character_create.Solo(None, 'solo', 'female', tables)
+    enemy = character_create.Enemy(tables)
+    for relationship_class in (character_create.Friend, character_create.Enemy, character_create.Love):
+        benchmarks[f'get_friends_enemies_or_love: {relationship_class.__name__}'] = (
+            lambda relationship_class=relationship_class: char.get_friends_enemies_or_love(relationship_class))
+    benchmarks['Enemy._get_enemy_throw'] = lambda: enemy._get_enemy_throw(tables)
+    benchmarks['Character.__str__'] = lambda: str(char)
+
+    return benchmarks
+
+
+def run(sizes: tuple) -> dict:
+    """
+    Returns:
+        dict: benchmark name to seconds, per call for micro benchmarks and per whole batch for batches
+    """
+    tables = table_store.load_tables(TABLES_PATH)
+    results = {}
+    for name, function in micro_benchmarks(tables).items():
+        dice_engine.seed(0)
+        results[name] = measure(function)
+        print(f'{name:<45}{results[name] * 1e6:>12.1f} us', flush=True)
+
+    for size in sizes:
+        start = time.perf_counter()
+        _batch(size)
+        results[f'batch: {size}'] = time.perf_counter() - start
+        print(f'{f"batch: {size}":<45}{results[f"batch: {size}"]:>12.2f} s', flush=True)
+
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Print the results next to the baseline.
+
+    Returns:
+        list: names of the benchmarks slower than the baseline by more than threshold
+    """
+    regressions = []
+    print(f'\n{"benchmark":<45}{"baseline":>12}{"now":>12}{"change":>10}')
+    for name, seconds in results.items():
+        if name not in baseline:
+            print(f'{name:<45}{"-":>12}{seconds:>12.3g}')
+            continue
+        change = seconds / baseline[name] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<45}{baseline[name]:>12.3g}{seconds:>12.3g}{change:>+10.1%}{flag}')
+
+    return regressions
+
+
+if __name__ == '__main__':
+    parse = ArgumentParser(description='Benchmark suite compared against a stored baseline')
+    parse.add_argument('-o', '--out', default=None, type=Path, help='write the results to this JSON file')
+    parse.add_argument('-b', '--baseline', default=BASELINE_PATH, type=Path,
+                       help='baseline JSON file, benchmarks/baseline.json as default')
+    parse.add_argument('--threshold', default=THRESHOLD, type=float,
+                       help=f'slowdown reported as a regression, {THRESHOLD} (+{THRESHOLD:.0%}) as default')
+    parse.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                       help='comma separated batch sizes, empty for none')
+    parse.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    args = parse.parse_args()
+
+    sizes = tuple(int(size) for size in args.sizes.split(',') if size)
+    report = {
+        'meta': {'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                 'python': platform.python_version(), 'machine': platform.machine(),
+                 'processor': platform.processor()},
+        'results': run(sizes),
+    }
+
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + '\n')
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + '\n')
+        print(f'\nbaseline saved to {args.baseline}')
+        sys.exit(0)
+
+    if not args.baseline.exists():
+        print(f'\nno baseline at {args.baseline}, run with --save-baseline to store one')
+        sys.exit(0)
+
+    regressions = compare(report['results'], json.loads(args.baseline.read_text())['results'], args.threshold)
+    if regressions:
+        print(f'\n{len(regressions)} regression(s) above +{args.threshold:.0%}: {", ".join(regressions)}')
+        sys.exit(1)
+    print(f'\nno regressions above +{args.threshold:.0%}')
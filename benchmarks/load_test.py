@@ -0,0 +1,123 @@
+"""Load test the HTTP service and report p50/p99 latency.
+
+Starts server.py on a free local port unless --port is given, then sends --requests
+requests to /character from --concurrency keep-alive connections and a few /batch requests.
+
+Usage: python benchmarks/load_test.py [--requests 2000] [--concurrency 16] [--batch 10000] [--port PORT]
+"""
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, target: str) -> bytes:
+    """Send one GET on an open connection and read the whole response body"""
+    writer.write(f'GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    await writer.drain()
+
+    status = await reader.readline()
+    if b' 200 ' not in status:
+        raise RuntimeError(f'{target}: {status.decode().strip()}')
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if 'content-length' in headers:
+        return await reader.readexactly(int(headers['content-length']))
+
+    body = bytearray()
+    while size := int((await reader.readline()).strip(), 16):
+        body += await reader.readexactly(size)
+        await reader.readline()
+    await reader.readline()
+    return bytes(body)
+
+
+def percentile(latencies: list, fraction: float) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(name: str, latencies: list, elapsed: float) -> None:
+    print(f'{name:>12}: {len(latencies)} requests, {len(latencies) / elapsed:8.1f} req/s, '
+          f'p50 {percentile(latencies, 0.5) * 1e3:7.2f} ms, p99 {percentile(latencies, 0.99) * 1e3:7.2f} ms')
+
+
+async def client(port: int, targets: list, latencies: list) -> None:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for target in targets:
+        start = time.perf_counter()
+        await request(reader, writer, target)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(port: int, requests: int, concurrency: int, batch: int) -> None:
+    targets = [f'/character?seed={number}' for number in range(requests)]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, targets[number::concurrency], latencies) for number in range(concurrency)))
+    report('/character', latencies, time.perf_counter() - start)
+
+    latencies = []
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for seed in range(3):
+        begin = time.perf_counter()
+        lines = (await request(reader, writer, f'/batch?n={batch}&seed={seed}')).count(b'\n')
+        latencies.append(time.perf_counter() - begin)
+        assert lines == batch, f'expected {batch} lines, got {lines}'
+    writer.close()
+    await writer.wait_closed()
+    elapsed = time.perf_counter() - start
+    report(f'/batch?n={batch}', latencies, elapsed)
+    print(f'{"":>12}  {batch * len(latencies) / elapsed:8.0f} characters/s')
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def wait_for(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server did not start on port {port}')
+
+
+if __name__ == '__main__':
+    parse = ArgumentParser(description='Load test the character HTTP service')
+    parse.add_argument('--requests', default=2000, type=int, help='number of /character requests')
+    parse.add_argument('--concurrency', default=16, type=int, help='number of parallel connections')
+    parse.add_argument('--batch', default=10_000, type=int, help='characters per /batch request')
+    parse.add_argument('--port', default=None, type=int, help='port of a running server, one is started if not set')
+    parse.add_argument('--workers', default=0, type=int, help='workers of the started server, 0 for all cores')
+    args = parse.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        server = subprocess.Popen([sys.executable, str(ROOT / 'server.py'), '--port', str(port),
+                                   '--workers', str(args.workers)], cwd=ROOT)
+    try:
+        wait_for(port)
+        asyncio.run(run(port, args.requests, args.concurrency, args.batch))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
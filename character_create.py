@@ -1,29 +1,118 @@
-import re
-from dataclasses import dataclass
+import math
+import os
+import sys
+from dataclasses import dataclass, field, make_dataclass
 from pathlib import Path
-from random import choice
-from typing import Tuple
+from typing import Iterator, Sequence, Tuple
+
+import character_id
+import dice_engine
+import locales
+import name_pool
+import profiling
+import roles
+import templates
+from table_store import ROW_INDEX, load_tables
+
+def generate_name(sex: str, region: str = None, rolls: Iterator = None) -> str:
+    """
+    Generates a name based on the given sex and cultural region.
+    Names are taken from the pre-generated name pools (see name_pool.py).
 
-import dice
-import yaml
-from faker import Faker
+    Parameters:
+        sex (str): The sex of the person. Can be 'female' or 'male'.
+        region (str): The cultural region of the person. Random region if not given.
+        rolls (Iterator): Pre-drawn raw rolls (see batch.generate_batch).
 
-fake = Faker()
+    Returns:
+        str: The generated name based on the given sex and region.
+    """
+    if region is None:
+        region = choose(list(name_pool.REGION_LOCALES), rolls)
 
-def generate_name(sex: str) -> str:
+    return name_pool.load_pool().sample(region, 'female' if sex == 'female' else 'male', rolls)
+
+def roll_die(sides: int, rolls: Iterator = None) -> int:
     """
-    Generates a name based on the given sex.
+    Throws one die.
 
     Parameters:
-        sex (str): The sex of the person. Can be 'female' or 'male'.
+        sides (int): The number of sides of the die.
+        rolls (Iterator): Pre-drawn raw rolls (see batch.generate_batch).
+            The die is thrown with the shared dice_engine generator if not given.
+
+    Returns:
+        int: The result of the throw, from 1 to sides.
+    """
+    if rolls is None:
+        return dice_engine.throw(int(sides))
+    return next(rolls) % sides + 1
+
+def choose(options: Sequence, rolls: Iterator = None):
+    """
+    Chooses one of the options at random.
+
+    Parameters:
+        options (Sequence): The options to choose from.
+        rolls (Iterator): Pre-drawn raw rolls (see batch.generate_batch).
 
     Returns:
-        str: The generated name based on the given sex.
+        The chosen option.
     """
-    if sex == 'female':
-        return fake.name_female()
+    if rolls is None:
+        return dice_engine.rng.choice(options)
+    return options[next(rolls) % len(options)]
+
+def choose_weighted(options: Sequence, weights: Sequence, rolls: Iterator = None):
+    """
+    Chooses one of the options with probabilities proportional to the weights, exactly.
+
+    Parameters:
+        options (Sequence): The options to choose from.
+        weights (Sequence): Integer weights of the options.
+        rolls (Iterator): Pre-drawn raw rolls (see batch.generate_batch).
+            As many raw rolls as the total weight needs are read as the digits of one number,
+            numbers over the last whole multiple of the total weight are skipped.
+
+    Returns:
+        The chosen option.
+    """
+    divisor = math.gcd(*weights)
+    weights = [weight // divisor for weight in weights]
+    total = sum(weights)
+    if rolls is None:
+        point = dice_engine.rng.randrange(total)
     else:
-        return fake.name_male()
+        digits, span = 1, character_id.ROLL_RANGE
+        while span < total:
+            digits, span = digits + 1, span * character_id.ROLL_RANGE
+        limit = span // total * total
+        point = limit
+        while point >= limit:
+            point = 0
+            for _ in range(digits):
+                point = point * character_id.ROLL_RANGE + next(rolls)
+        point %= total
+
+    for option, weight in zip(options, weights):
+        if point < weight:
+            return option
+        point -= weight
+
+def roll_expression(expression: str, rolls: Iterator = None) -> int:
+    """
+    Rolls a dice expression like '1d6/2' or '1d10 + 5'.
+
+    Parameters:
+        expression (str): The dice expression.
+        rolls (Iterator): Pre-drawn raw rolls (see batch.generate_batch).
+
+    Returns:
+        int: The result of the expression.
+    """
+    if rolls is None:
+        return dice_engine.roll(expression)
+    return dice_engine.roll(expression, lambda sides: roll_die(sides, rolls))
 
 @dataclass
 class Character:
@@ -53,6 +142,16 @@ class Character:
 
     message_role: str = ''
 
+    id: str = None
+
+    rolls: Iterator = field(default=None, repr=False, compare=False)
+
+    # Table name to the value fixed for it, see constraints.py
+    constraints: dict = field(default=None, repr=False, compare=False)
+
+    # Spec of the role, set on the class of every role, see ROLE_CLASSES
+    role_spec = None
+
     attributes_names = ['personality',
                             'clothing_style',
                             'hairstyle',
@@ -68,41 +167,55 @@ class Character:
 
     def __post_init__(self) -> None:
         """Main create functions. Generates character role attributes
-            based on given role and corresponding tables.
-            This method (and class) is abstract  dont't create this object/
+            based on given role and corresponding tables, then the fields of the role with roll_role.
+            This class is abstract, create the classes of ROLE_CLASSES
 
         Args:
             role (str): name of a role
         """
         self.class_name = self.role.capitalize()
 
+        self.cultural_region, self.language = self.cultural_origins()
+
         if self.name is None:
-            self.name = generate_name(self.sex)
+            self.name = generate_name(self.sex, self.cultural_region, self.rolls)
 
         if self.sex == 'female':
             self.appeal = 'she'
             self.appeal_other = 'her'
-        else: # TODO: name dependency from cultiral origins
+        else:
             self.appeal = 'he' # TODO check for appeal he/she in message roles
             self.appeal_other = 'his'
 
-        self.cultural_region, self.language = self.cultural_origins()
-
         self.set_attributes(self.attributes_names)
 
         self.friends = self.get_friends_enemies_or_love(Friend)
         self.enemies = self.get_friends_enemies_or_love(Enemy)
         self.love = self.get_friends_enemies_or_love(Love)
 
+        if self.role_spec is not None:
+            self.roll_role()
+            self.message_role = self.render_role()
+
+    def __getstate__(self) -> dict:
+        """Pickle without the shared tables and pre-drawn rolls, they are not part of the character"""
+        state = self.__dict__.copy()
+        state['tables'] = None
+        state['rolls'] = None
+        state.pop('text_cache', None)
+        return state
+
     def set_attributes(self, attributes_names: list) -> None:
         """
         Set attributes based on the given attribute names list.
         Args:
             attributes_names (list): A list of attribute names
         """
-
-        #TODO: set atributes at random or manualy, for now only random
-        self.random_attributes(attributes_names)
+        constrained = [name for name in attributes_names if self.constraints and
+                       name.replace('_', ' ').title() in self.constraints]
+        for attribute_name in constrained:
+            self.chosen_atribute(attribute_name)
+        self.random_attributes([name for name in attributes_names if name not in constrained])
 
 
     def random_attributes(self, attributes_names: list) -> None:
@@ -112,27 +225,70 @@ class Character:
             attributes_names (list): list of names that will be the attributes
         """
         for attribute_name in attributes_names:
-            table_name = attribute_name.replace('_', ' ').title()
-            self.__dict__[attribute_name] = self.tables[table_name][dice.roll('1d10t')]
+            table_name = ATTRIBUTE_TABLES[attribute_name]
+            self.__dict__[attribute_name] = self.tables[table_name][roll_die(10, self.rolls) - 1]
 
-    def chosen_atribute(self, attribute_names: str) -> None:
-        ... #TODO: for manualy choosing atributes
+    def chosen_atribute(self, attribute_name: str) -> None:
+        """Set the attribute to the value fixed for its table in the constraints
+        Args:
+            attribute_name (str): name of the attribute
+        """
+        self.__dict__[attribute_name] = self.constraints[attribute_name.replace('_', ' ').title()]
 
 
-    def get_table(self, keyword: str, dice_number: int) -> str:
-        """Finds corresponing table based on class name and given keyword
+    def roll_role(self, steps: tuple = None) -> None:
+        """Set the fields of the role: run the steps of its spec, see roles.py.
+        A table fixed in the constraints gives its value without a roll.
+        Pre-drawn rolls are read in place, as roll_die and choose read them
         Args:
-            keyword (str): keyword that is second part of the table name
-            dice_number (int): number of sides of dice that is thrown on this table, usialy size of a table
+            steps (tuple): steps to run, all steps of the spec if not set, see reroll.py
+        """
+        values = self.__dict__
+        tables = self.tables
+        constraints = self.constraints
+        rolls = self.rolls
+        for field_name, kind, source, when in self.role_spec.steps if steps is None else steps:
+            if when is not None and values[when[0]] != when[1]:
+                continue
+            if kind == 'choice':
+                values[field_name] = choose(source, rolls) if rolls is None else source[next(rolls) % len(source)]
+                continue
+            if kind == 'flag' and not (choose((0, 1)) if rolls is None else next(rolls) % 2):
+                continue
+
+            table_name = source[1][values[source[0]]] if kind == 'row_by' else source
+            if constraints and table_name in constraints:
+                row = constraints[table_name]
+            else:
+                rows = tables[table_name]
+                row = rows[roll_die(len(rows)) - 1 if rolls is None else next(rolls) % len(rows)]
+
+            if kind == 'split' and '/' in row:
+                row = choose(row.split('/'), rolls)
+            elif kind == 'word' and '/' in row:
+                row = ' '.join(choose(word.split('/'), rolls) if '/' in word else word for word in row.split(' '))
+            values[field_name] = row
+
+    def render_role(self) -> str:
+        """
         Returns:
-            str: row from a table. number of which where rolled on the dice
+            str: message_role, the frame of the role spec told about the character
         """
-        if "/" in keyword:
-            keywords = keyword
-        else: # TODO: fix on a possibilty, not a very good decishion. Capitalize works wrong on word with "/"
-            keywords = " ".join([word.capitalize() for word in keyword.split(' ')])
+        locale = locales.load_locale(None, self.tables)
+        return locale.frames[self.role_spec.name.lower()].render(self.__dict__, locale, self.sex)
 
-        return self.tables[self.class_name + ' ' + keywords][dice.roll(f'1d{int(dice_number)}t')]
+    def person(self, text: str) -> str:
+        """
+        Table row about 'you' told about the character, e.g. 'Your Boss mentors you' -> 'Her Boss mentors her'.
+        Variants for both sexes are precomputed for every row when the tables are first used.
+
+        Args:
+            text (str): table row
+
+        Returns:
+            str: the row in the third person
+        """
+        return templates.load_templates(self.tables).person(text, self.sex)
 
     @staticmethod # TODO: make separate function, not a class method
     def lower_first(input: str) -> str:
@@ -150,17 +306,63 @@ class Character:
     def cultural_origins(self) -> Tuple[str, str]:
         """
         Get a random cultural origin and language.
+        A region or language fixed in the constraints picks the origin row by the chance
+        that row gives it.
         Returns:
             Tuple[str, str]: A tuple containing the cultural region and language.
         """
-        roll = dice.roll('1d10t')
-        region = self.tables['Cultural Origins'][roll]['Cultural Region']
+        if self.constraints and ('Cultural Region' in self.constraints or 'Languages' in self.constraints):
+            return self.chosen_origins()
+
+        roll = roll_die(10, self.rolls)
+        region = self.tables['Cultural Origins'][roll - 1]['Cultural Region']
 
         # If the region contains multiple options, choose one randomly
         if '/' in region:
-            region = choice(region.split('/'))
+            region = choose(region.split('/'), self.rolls)
+
+        language = choose(self.tables['Cultural Origins'][roll - 1]['Languages'], self.rolls)
+        return (region, language)
 
-        language = choice(self.tables['Cultural Origins'][roll]['Languages'])
+    def chosen_origins(self) -> Tuple[str, str]:
+        """
+        Cultural region and language with the region, language or both fixed in the constraints.
+        Rows are weighted by the number of ways each gives the fixed values,
+        so the result is distributed like cultural_origins conditioned on them.
+        """
+        origins = self.tables['Cultural Origins']
+        index = self.tables[ROW_INDEX]
+        region = self.constraints.get('Cultural Region')
+        language = self.constraints.get('Languages')
+
+        positions = set(range(len(origins)))
+        if region:
+            positions &= set(index['Cultural Region'][region])
+        if language:
+            positions &= set(index['Languages'][language])
+        positions = sorted(positions)
+        if not positions:
+            raise ValueError(f"No cultural origin with region '{region}' and language '{language}'")
+
+        # chance of the fixed values given the row: matching options / options, over a common denominator
+        chances = []
+        for position in positions:
+            regions = origins[position]['Cultural Region'].split('/')
+            languages = origins[position]['Languages']
+            chances.append(((regions.count(region), len(regions)) if region else (1, 1),
+                            (languages.count(language), len(languages)) if language else (1, 1)))
+        denominator = math.lcm(*(region_total * language_total
+                                 for (_, region_total), (_, language_total) in chances))
+        weights = [region_count * language_count * denominator // (region_total * language_total)
+                   for (region_count, region_total), (language_count, language_total) in chances]
+        origin = origins[choose_weighted(positions, weights, self.rolls)]
+
+        if not region:
+            region = origin['Cultural Region']
+            if '/' in region:
+                region = choose(region.split('/'), self.rolls)
+        if not language:
+            language = choose(origin['Languages'], self.rolls)
         return (region, language)
 
     def get_friends_enemies_or_love(self, class_name):
@@ -178,18 +380,22 @@ class Character:
         # Generate a random number between 0 and 3.
         # If the result of the dice roll is less than or equal to 7, set the number to 0.
         # Otherwise, subtract 7 from the dice roll result.
-        number = max(0, dice.roll('1d10t') - 7)
+        number = max(0, roll_die(10, self.rolls) - 7)
 
         # Instantiate the given class name `number` times and append the instances to the result list.
         for _ in range(number):
-            result.append(class_name(self.tables))
+            result.append(class_name(self.tables, self.rolls, self.cultural_region))
 
         return result
 
     def __str__(self):
+        # Kept by reroll.reroll, up to date with the fields
+        cached = self.__dict__.get('text_cache')
+        if cached is not None:
+            return cached.text
+
         # Generate the crisis description based on the family crisis and appeal_other
-        crisis = self.lower_first(self.family_crisis).replace('your', self.appeal_other)
-        crisis = crisis.replace('you', self.appeal_other)
+        crisis = self.lower_first(self.person(self.family_crisis))
 
         # Generate the first part of the message including name, sex, role, and character type
         message_first = (
@@ -205,9 +411,9 @@ class Character:
             f'{self.appeal.capitalize()} is wearing {self.clothing_style}.\n'
             f'{self.appeal_other.capitalize()} hairstyle is {self.lower_first(self.hairstyle)}. '
             f'{self.appeal_other} affectation is {self.lower_first(self.affectation)}.\n'
-            f'{self.appeal.capitalize()} is value {self.lower_first(self.motivation)} the most. '
+            f'{self.appeal.capitalize()} is value {self.lower_first(self.person(self.motivation))} the most. '
             f'{self.appeal} feels about others "{self.relationships}".\n'
-            f'{self.most_valued_person} is {self.lower_first(self.appeal_other)} most valued person.\n'
+            f'{self.person(self.most_valued_person)} is {self.lower_first(self.appeal_other)} most valued person.\n'
             f'{self.appeal_other.capitalize()} {self.most_valued_possession[2:]} is most valued possession.\n'
             f'Family:\n'
             f'{self.appeal.capitalize()} is from {self.family_background[0]} family.\n'
@@ -215,7 +421,7 @@ class Character:
             f'{self.appeal.capitalize()} where spend {self.lower_first(self.appeal_other)} childhood '
             f'{self.lower_first(self.childhood_environment)}\n'
             f'But {crisis}\n'
-            f'Life goals: {self.life_goals}\n'
+            f'Life goals: {self.person(self.life_goals)}\n'
             f'Friends:\n{self.friends}\n'
             f'Enemies:\n{self.enemies}\n'
             f'Love affairs:\n{self.love}'
@@ -226,345 +432,81 @@ class Character:
 
 
 class Friend(object):
-    def __init__(self, tables) -> None:
-        self.relationship = tables['Friend'][dice.roll('1d10t')]
-        self.name = fake.name()
+    __slots__ = ('relationship', 'sex', 'name')
+
+    def __init__(self, tables, rolls=None, region=None) -> None:
+        self.relationship = tables['Friend'][roll_die(10, rolls) - 1]
+        self.sex = choose(['male', 'female'], rolls)
+        self.name = generate_name(self.sex, region, rolls)
 
     def __repr__(self) -> str:
         return (f'{self.name}. {self.relationship}')
 
 
 class Enemy(object):
-    def __init__(self, tables) -> None:
-        self.enemy_type = tables['Enemy type'][dice.roll('1d10t')]
+    __slots__ = ('enemy_type', 'sex', 'name', 'wrong', 'throw', 'meet')
+
+    def __init__(self, tables, rolls=None, region=None) -> None:
+        self.enemy_type = tables['Enemy type'][roll_die(10, rolls) - 1]
 
-        self.sex = choice(['male', 'female'])
-        self.name = generate_name(self.sex)
+        self.sex = choose(['male', 'female'], rolls)
+        self.name = generate_name(self.sex, region, rolls)
 
-        self.wrong = tables['Enemy wrong'][dice.roll('1d10t')]
-        self.throw = self._get_enemy_throw(tables)
-        self.meet = tables['Enemy meet'][dice.roll('1d10t')]
+        self.wrong = tables['Enemy wrong'][roll_die(10, rolls) - 1]
+        self.throw = self._get_enemy_throw(tables, rolls)
+        self.meet = tables['Enemy meet'][roll_die(10, rolls) - 1]
 
     @staticmethod
     def lowfirst(s): return s[:1].lower() + s[1:] if s else ''
 
-    def _get_enemy_throw(self, tables):
-        result = tables['Enemy throw'][dice.roll('1d10t')]
-        template = r'\{.*?\}'
-
-        replace = re.findall(template, result)
-        if len(replace) > 0:
-            number = dice.roll(replace[0][1:-1])
-            result = re.sub(template, str(number), result)
-
-        return result
+    def _get_enemy_throw(self, tables, rolls=None):
+        template = templates.load_templates(tables).dice['Enemy throw'][roll_die(10, rolls) - 1]
+        return template.render(lambda expression: roll_expression(expression, rolls))
 
     def __repr__(self) -> str:
         return (f'{self.name} ({self.sex}) ({self.enemy_type}) {self.wrong} '
                 f'Can throw {self.lowfirst(self.throw)} If meet: {self.meet}')
 
 class Love(object): # TODO: pass character sex as argument and make love sex choice opposite to characer sex
-    def __init__(self, tables) -> None: # TODO think about straight of homo of character
-        self.sex = choice(['male', 'female'])
-        self.name = generate_name(self.sex)
-        self.happend = tables['Love happened'][dice.roll('1d10t')]
+    __slots__ = ('sex', 'name', 'happend')
+
+    def __init__(self, tables, rolls=None, region=None) -> None: # TODO think about straight of homo of character
+        self.sex = choose(['male', 'female'], rolls)
+        self.name = generate_name(self.sex, region, rolls)
+        self.happend = tables['Love happened'][roll_die(10, rolls) - 1]
 
     def __repr__(self) -> str:
         return f'{self.name} ({self.sex}). {self.happend}'
 
 
-@dataclass
-class Fixer(Character):
-    character_type: str = None
-    partner: str = None
-    office: str = None
-    clients: str = None
-    gunning: str = None
-
-    def __post_init__(self) -> None:
-        # Call the parent class method to create the role
-        super().__post_init__()
-
-        # Set the character type using the 'Type' table
-        self.character_type = self.get_table('Type', 10)
-
-        # Determine if the character has a partner or not
-        if choice([0, 1]):
-            self.partner = self.get_table('Partner', 6)
-
-        # Create a message with the partner information
-        partner_message = f"Partner: {self.partner}" if self.partner else ""
-
-        # Set the office, clients, and gunning attributes using their respective tables
-        self.office = self.get_table('Office', 6)
-        self.clients = self.get_table('Side Clients', 6)
-        self.gunning = self.get_table('Gunner', 6)
-
-        # Create the final message with all the information
-        self.message_role = (
-            f"{partner_message}\n"
-            f"Office: {self.office}\n"
-            f"Clients: {self.clients.replace('you', self.appeal_other)}\n"
-            f"Gunning: {self.gunning.replace('you', self.appeal_other)}\n"
-    )
+# Table of every attribute of Character, e.g. life_goals -> Life Goals
+ATTRIBUTE_TABLES = {name: name.replace('_', ' ').title() for name in Character.attributes_names}
 
 
-@dataclass
-class Media(Character):
-    character_type: str = None
-    source: str = None
-    ethics: str = None
-    stories: str = None
-
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.character_type = self.get_table('Type', 6)
-        self.source = self.get_table('Source', 6)
-        self.ethics = self.get_table('Ethics', 6)
-        self.stories = self.get_table('Stories', 6)
-
-        self.message_role = (f"Works in {self.lower_first(self.source)}. Write about {self.stories.lower()}.\n"
-                             f"{self.ethics.replace('You', self.appeal.capitalize())}\n"
-                             )
-
-
-@dataclass
-class Exec(Character):
-    character_type: str = None
-    division: str = None
-    good_or_bad: str = None
-    based: str = None
-    gunning: str = None
-    boss: str = None
-
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.character_type = self.get_table('Type', 10)
-        division_roll = dice.roll('1d6t')
-        if division_roll == 5:
-            temp = self.tables[self.class_name + ' Division'][division_roll]
-            self.division = temp.split('/')[dice.roll('1d3t')-1]
-        else:
-            self.division = self.tables[self.class_name + ' Division'][division_roll]
-
-        self.good_or_bad = self.get_table('Good/Bad', 6)
-        self.based = self.get_table('Based', 6)
-        self.gunning = self.get_table('Gunning', 6)
-        self.boss = self.get_table('Boss', 6)
-
-        self.message_role = (f"Works for '{self.character_type}'"
-                            f" corporation wich is '{self.good_or_bad[:-1].lower()}'"
-                            f" located in {self.based.lower()}"
-                            f" in {self.division} division.\n"
-                            f"Gunning: { self.gunning.replace('you', self.appeal_other)}\n"
-                            f"{self.boss.replace('Your', self.appeal_other.capitalize()).replace('your', self.appeal_other).replace('you', self.appeal_other)}\n")
-
-
-@dataclass
-class Rockerboy(Character):
-    character_type: str = None
-    in_group: bool = None
-    perform: str = None
-    were_in_group: bool = None
-    leave: str = None
-    gunning: str = None
-
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.character_type = self.get_table('Type', 10)
-        self.in_group = choice([True, False]) #TODO: make it True, False everywhere
-
-        if self.in_group == False:
-            self.were_in_group = choice([True, False])
-            if self.were_in_group == True:
-                self.leave = self.get_table('Leave', 6)
-
-        self.perform = self.get_table('Perform', 6)
-        self.gunning = self.get_table('Gunning', 6)
-
-        if self.leave:
-            temp_leave = self.leave.replace('''you''', self.appeal).replace('''You''', self.appeal).lower()
-        self.message_role = (f"{'Perform alone' if self.in_group else 'Perform in group'}."
-                            f"{f' Where in a group but, {temp_leave}' if self.were_in_group else ''}\n"
-                            f"Perform in {self.perform.lower()}\n"
-                            f"Gunning {self.gunning.replace('you', self.appeal_other)}\n"
-                            )
-
-
-@dataclass
-class Solo(Character):
-    character_type: str = None
-    moral_compass: str = None
-    operational_territory: str = None
-    gunning: str = None # TODO check for gunning for other classes. gunning is who hunts the character
-
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.character_type = self.get_table('Type', 6)
-        if '/' in self.character_type:
-            temp = []
-            for word in self.character_type.split(' '):
-                if '/' in word:
-                    word = choice(word.split('/'))
-
-                temp.append(word)
-
-            self.character_type = " ".join(temp)
-
-        self.moral_compass = self.get_table('Moral Compass', 6)
-        self.operational_territory = self.get_table('Operational Territory', 6)
-        self.gunning = self.get_table('Gunning', 6)
-
-        self.message_role = (f"{self.moral_compass.replace('You', self.appeal_other.capitalize()).replace('you', self.appeal_other)}\n"
-                            f"Works in {self.lower_first(self.operational_territory.replace('you', self.appeal_other))}.\n"
-                            f"{self.gunning.replace('you', self.appeal_other)} is after {self.appeal_other}.\n"
-            )
-
-
-@dataclass
-class Netrunner(Character):
-    character_type: str = None
-    alone: bool = None
-    partner: str = None
-    workspace: str = None
-    clients: str = None
-    supplies: str = None
-    gunning: str = None
-
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.character_type = self.get_table('Type', 6)
-        self.alone = choice([True, False])
-        if not self.alone:
-            self.partner = self.get_table('Partner', 6)
-        self.workspace = self.get_table('Workspace', 6)
-        self.clients = self.get_table('Clients', 6)
-        self.supplies = self. get_table('Supplies', 6)
-        self. gunning = self.get_table('Gunning', 6)
-
-        self.message_role = (f"Works {'alone.' if self.alone else 'with partner, a ' + self.lower_first(self.partner)}\n"
-                            f"Workspace: {self.workspace}\n"
-                            f"Clients: {self.clients.replace('your', self.appeal_other).replace('you', self.appeal_other).replace('You', self.appeal_other.capitalize())}\n"
-                            f"How get programs - {self.lower_first(self.supplies.replace('you', self.appeal_other)).replace('You', self.appeal_other.capitalize())}\n"
-                            f"May harm {self.appeal_other} {self.lower_first(self.gunning.replace('you', self.appeal_other)).replace('You', self.appeal_other.capitalize())}\n"
-                            )
-
-
-@dataclass
-class Tech(Character):
-    character_type: str = None
-    alone: bool = None
-    partner: str = None
-    workspace: str = None
-    clients: str = None
-    supplies: str = None
-    gunning: str = None
-
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.character_type = self.get_table('Type', 10)
-
-        self.alone = choice([True, False])
-        if not self.alone:
-            self.partner = self.get_table('Partner', 6)
-        self.workspace = self.get_table('Workspace', 6)
-        self.clients = self.get_table('Clients', 6)
-        self.supplies = self.get_table('Supplies', 6)
-        self.gunning = self.get_table('Gunning', 6)
-
-        self.message_role = (f"Works {'alone' if self.alone else 'with partner ' + self.lower_first(self.partner)}.\n"
-                            f"Workspace: {self.workspace.replace('you', self.appeal)}\n"
-                            f"Clients: {self.clients.replace('you', self.appeal_other).replace('You', self.appeal_other.capitalize())}\n"
-                            f"{self.appeal.capitalize()} {self.lower_first(self.supplies).replace('You', '').replace('you', self.appeal)}\n"
-                            f"Gunning: {self.gunning.replace('you', self.appeal_other).replace('You', self.appeal_other.capitalize())}\n"
-                            )
-
-
-@dataclass
-class Medtech(Character):
-    character_type: str = None #TODO: move all deafult fields to parent class
-    alone: bool = None
-    partner: str =  None
-    workspace: str = None
-    clients: str = None
-    supplies: str = None
-
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.character_type = self.get_table('Type', 10)
-        self.alone = choice([True, False])
-        if not self.alone:
-            self.partner = self.get_table('Partner', 6)
-        self.workspace = self.get_table('Workspace', 6)
-        self.clients = self.get_table('Clients', 6)
-        self.supplies = self.get_table('Supplies', 6)
-
-        self.message_role = (f"Works {'alone' if self.alone else 'with partner ' + self.lower_first(self.partner)}.\n"
-                        f"Workspace: {self.workspace}\n"
-                        f"Clients: {self.clients}\n"
-                        f"Supplies: {self.supplies}\n"
-                        )
-
+def _role_class(role: roles.Role) -> type:
+    """
+    Dataclass of a role: the fields of its spec after those of Character, rolled by Character.roll_role.
 
-@dataclass
-class Lawman(Character):
-    character_type: str = None # other attributes is unique
-    jurisdiction: str = None
-    corrupt: str = None
-    gunning: str = None
-    target: str = None
+    Args:
+        role (roles.Role): compiled spec of the role
 
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.character_type = self.get_table('Type', 6)
-        self.jurisdiction = self.get_table('Jurisdiction', 6)
-        self.corrupt = self.get_table('Corrupt', 6)
-        self.gunning = self.get_table('Gunning', 6)
-        self.target = self.get_table('Target', 6)
+    Returns:
+        type: subclass of Character named after the role
+    """
+    choices = {step[0]: step[2] for step in role.steps if step[1] == 'choice'}
+    role_fields = [(name, bool if all(option in (True, False) for option in choices.get(name, ('',))) else str,
+                    field(default=default)) for name, default in role.fields]
+    role_class = make_dataclass(role.name, role_fields, bases=(Character,), namespace={'role_spec': role})
+    role_class.__module__ = __name__ # pickled by name, like a class written here
+    return role_class
 
-        self.message_role = (f"Works in {self.jurisdiction}.\n"
-                             f"{self.corrupt}\n"
-                             f"{self.gunning} is after {'him' if self.sex=='male' else 'her'}.\n"
-                             f"{self.target} is {'his' if self.sex=='male' else 'her'} main target.\n"
-                             )
 
+# Class of every role of data/roles.yaml, also module attributes as character_create.Fixer
+ROLE_CLASSES = {name: _role_class(role) for name, role in roles.ROLES.items()}
+globals().update(ROLE_CLASSES)
 
-@dataclass
-class Nomad(Character):
-    character_type: str = ''
-    pack_size: str = None
-    pack_type: str = None
-    pack_do: str = None
-    pack_role: str = None
-    pack_philosophy: str = None
-    pack_gunning: str = None
 
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        self.pack_size = self.get_table('Pack Size', 6)
-
-        self.pack_type = choice(['land', 'air', 'sea'])
-        if self.pack_type == 'land':
-            self.pack_do = self.get_table('Land', 10)
-        elif self.pack_type == 'air':
-            self.pack_do = self.get_table('Air', 6)
-        elif self.pack_type == 'sea':
-            self.pack_do = self.get_table('Sea', 6)
-
-        self.pack_role = self.get_table('Role', 6)
-        self.pack_philosophy = self.get_table('Pack Philosophy', 6)
-        self.pack_gunning = self.get_table('Pack Gunning', 6)
-
-        self.message_role = (f"Pack size: {self.pack_size}.\n"
-                             f"Pack operates on {self.pack_type}.\n"
-                             f"Pack doing a {self.lower_first(self.pack_do)}.\n"
-                             f"{self.pack_philosophy}\n"
-                             f"{self.pack_gunning} is after pack.\n"
-                             f"{'his'.capitalize() if self.sex=='male' else 'her'.capitalize()} role is {self.pack_role}.\n"
-                             )
-
-
-def main(name, role, sex, tables_path='data/tables.yaml'):
+def main(name, role, sex, tables_path='data/tables.yaml', seed=None, where=None, rng=None):
     """
     Generate the main character of the game based on the given name, role, sex, and tables path.
 
@@ -573,17 +515,30 @@ def main(name, role, sex, tables_path='data/tables.yaml'):
         role (str): The role of the character. If not provided, a random role will be chosen from the available roles.
         sex (str): The sex of the character. If not provided, a random sex will be chosen.
         tables_path (str): The path to the tables file.
+        seed (int): Seed for the dice. If not provided, the dice are not reseeded.
+        where (dict): Field values the character must have, see constraints.py.
+        rng (Random): Generator to draw the role, sex and seed of the rolls from.
+            The shared dice_engine.rng if not provided, seed then reseeds it.
 
     Returns:
-        None
+        Character: The generated character.
     """
-    # TODO: fix random seed
-    # TODO: fix faker seed
-    with open(Path(__file__).parent.resolve() / tables_path) as fo:
-        tables = yaml.safe_load(fo)
+    if rng is None:
+        rng = dice_engine.rng
+        if seed is not None:
+            dice_engine.seed(seed)
+    elif seed is not None:
+        rng.seed(seed)
+
+    tables = load_tables(Path(__file__).parent.resolve() / tables_path)
+
+    fixed = None
+    if where:
+        from constraints import resolve
+        role, sex, fixed = resolve(where, role, sex, tables)
 
     if not role:
-        role = choice(tables['roles']).lower()
+        role = rng.choice(tables['roles']).lower()
     else:
         role = role.lower()
 
@@ -591,17 +546,44 @@ def main(name, role, sex, tables_path='data/tables.yaml'):
     assert role.capitalize() in tables['roles'], message
     # TODO: write tests for varios classes
     if not sex:
-        sex = choice(['male', 'female'])
+        sex = rng.choice(['male', 'female'])
 
-    role_class = globals()[role.capitalize()]
-    char = role_class(name, role, sex, tables)
+    return from_seed(name, role, sex, tables, rng.getrandbits(64), fixed)
+
+
+def from_seed(name, role, sex, tables, seed, constraints=None, rolls=None):
+    """
+    Build a character from the rolls of its own seed, see character_id.
+
+    Args:
+        name (str): The name of the character, generated if None.
+        role (str): The role of the character.
+        sex (str): The sex of the character.
+        tables (dict): Compiled tables.
+        seed (int): 64 bit seed of the rolls.
+        constraints (dict): Table name to the value fixed for it, see constraints.resolve.
+        rolls (Iterator): Raw rolls of the seed, character_id.seed_rolls(seed) if not set.
+            Given drawn ahead to count the rolls the character takes, see golden.py.
+
+    Returns:
+        Character: The character. Its id rebuilds it with character_id.character_from_id,
+            unless the name or constraints were given.
+    """
+    role_class = ROLE_CLASSES.get(role.capitalize())
+    if role_class is None:
+        raise ValueError(f"Role '{role}' has no spec in {roles.ROLES_PATH.name}")
+    char = role_class(name, role, sex, tables, rolls=character_id.seed_rolls(seed) if rolls is None else rolls,
+                      constraints=constraints)
+    if name is None and not constraints:
+        char.id = character_id.encode(tables['roles'].index(char.class_name), sex, seed)
 
     return char
 
-    #TODO: try translator library for Russian https://pypi.org/project/translators/
-    #TODO: move all characters classes to separate file
     #TODO: try something to check right sentences
 
+if os.environ.get(profiling.ENV_VAR):
+    profiling.enable(os.environ[profiling.ENV_VAR], sys.modules[__name__])
+
 if __name__ == '__main__':
     from argparse import ArgumentParser
     parse = ArgumentParser(
@@ -615,7 +597,104 @@ if __name__ == '__main__':
                        help='sex of a character, random choice if not set')
     parse.add_argument('-t', '--tables-path', default='data/tables.yaml',
                        type=Path, help='relative path to tables yaml file, data/tables.yaml as default')
+    parse.add_argument('-c', '--count', default=1, type=int,
+                       help='number of characters to create, 1 as default')
+    parse.add_argument('-w', '--workers', default=1, type=int,
+                       help='number of worker processes, 1 as default, 0 for all cores')
+    parse.add_argument('--seed', default=None, type=int,
+                       help='master seed, the same seed gives the same characters for any number of workers')
+    parse.add_argument('-f', '--format', default='text', choices=['text', 'jsonl', 'csv', 'pdf'],
+                       help='output format, text as default. pdf needs --out')
+    parse.add_argument('-o', '--out', default=None, type=Path,
+                       help='output file, stdout as default')
+    parse.add_argument('-u', '--unique', action='store_true',
+                       help='no two characters the same, generated in this process')
+    parse.add_argument('--where', action='append', default=None, metavar='FIELD=VALUE',
+                       help='fix a field of the characters, e.g. --where hairstyle=Mohawk '
+                            '--where cultural_region="East Asian". Can be repeated')
+    parse.add_argument('-i', '--id', default=None, type=str,
+                       help='rebuild the character with this id, see the id field of jsonl and csv output')
+    parse.add_argument('--reroll', action='append', default=None, metavar='FIELD',
+                       help='roll this field of the --id character again, with the fields that depend on it, '
+                            'e.g. --reroll hairstyle. Can be repeated, --seed makes the rolls repeatable')
+    parse.add_argument('-l', '--locale', default=None, type=str,
+                       help='language of text output, a name of data/locales/*.yaml, e.g. ru. English as default')
+    parse.add_argument('--stats', default=None, type=int, metavar='N',
+                       help='generate N characters and print histograms of them instead, as json with -f jsonl. '
+                            'Characters are counted as they come, not kept')
+    parse.add_argument('-p', '--profile', nargs='?', const='table', default=None, choices=['table', 'json'],
+                       help='print time spent per stage and role to stderr at exit, as a table (default) or json. '
+                            f'Same as the {profiling.ENV_VAR} environment variable. Measures this process only, '
+                            'use with --workers 1')
     args = parse.parse_args()
 
-
-    print(main(**vars(args)))
+    if args.id and (args.where or args.unique):
+        parse.error('--id rebuilds one character as it was generated, it takes no --where or --unique')
+    if args.unique and (args.where or args.name or args.workers != 1):
+        parse.error('--unique generates in this process with random names, it takes no --where, --name or --workers')
+    if args.format == 'pdf' and (not args.out or args.unique or args.id):
+        parse.error('pdf is written to a file with --out, without --unique or --id')
+    if args.reroll and not args.id:
+        parse.error('--reroll changes the character given by --id')
+    if args.stats is not None and (args.id or args.unique or args.name or args.out or args.locale
+                                   or args.format not in ('text', 'jsonl')):
+        parse.error('--stats prints a report of text or jsonl format, it takes no --id, --unique, --name, '
+                    '--out or --locale')
+    if args.locale not in (None, 'en'):
+        import locales
+        if args.format != 'text':
+            parse.error('--locale translates text output only')
+        if args.locale not in locales.available():
+            parse.error(f"no locale '{args.locale}', choose from {['en'] + locales.available()}")
+
+    where = None
+    if args.where:
+        from constraints import parse_where, resolve
+        try:
+            where = parse_where(args.where)
+            resolve(where, args.role, args.sex, load_tables(Path(__file__).parent.resolve() / args.tables_path))
+        except ValueError as error:
+            parse.error(str(error))
+
+    if args.profile:
+        os.environ[profiling.ENV_VAR] = args.profile # for character_create imported by parallel
+        profiling.enable(args.profile, sys.modules[__name__])
+
+    if args.stats is not None:
+        import json
+        from stats import collect_stats
+        stats = collect_stats(args.stats, args.workers or None, args.seed, args.role, args.sex, args.tables_path, where)
+        print(json.dumps(stats.to_dict(), ensure_ascii=False) if args.format == 'jsonl' else stats.report(), end='')
+    elif args.id or (args.count == 1 and args.workers == 1 and args.seed is None and args.format == 'text'
+                   and not args.out):
+        char = (character_id.character_from_id(args.id, args.tables_path) if args.id
+                else main(args.name, args.role, args.sex, args.tables_path, where=where))
+        if args.reroll:
+            from parallel import derive_seed
+            from reroll import reroll
+            for position, field_name in enumerate(args.reroll):
+                try:
+                    reroll(char, field_name, None if args.seed is None else derive_seed(args.seed, position))
+                except ValueError as error:
+                    parse.error(str(error))
+        print(locales.render(char, args.locale) if args.locale not in (None, 'en') else char)
+    elif args.format == 'pdf':
+        from pdf import export_pdf
+        pages = export_pdf(args.count, args.out, args.workers or None, args.seed, args.name, args.role, args.sex,
+                           args.tables_path, where=where)
+        print(f'{args.count} characters on {pages} pages written to {args.out}')
+    else:
+        from functools import partial
+        from export import RENDERERS, iter_lines, to_locale_text, write_chunks
+        from parallel import generate_parallel
+        from unique import generate_unique
+        renderer = RENDERERS[args.format]
+        if args.locale not in (None, 'en'):
+            renderer = partial(to_locale_text, locale=args.locale)
+        if args.unique:
+            rendered = map(renderer, generate_unique(args.count, args.role, args.sex, args.seed,
+                                                                   tables_path=args.tables_path))
+        else:
+            rendered = generate_parallel(args.count, args.workers or None, args.seed, args.name, args.role,
+                                         args.sex, args.tables_path, render=renderer, where=where)
+        write_chunks(iter_lines(rendered, args.format), args.out)
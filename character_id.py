@@ -0,0 +1,103 @@
+"""Seed-addressable character ids.
+
+A generated character is built from the rolls of its own 64 bit seed, so role, sex and
+the seed are all it takes to build it again. The id packs them with the generator version
+into 10 bytes, written as 20 hex digits:
+
+    version (1 byte) | role index in tables['roles'] * 2 + sex (1 byte) | seed (8 bytes, big endian)
+
+Bump GENERATOR_VERSION whenever the same rolls would give a different character:
+rolls consumed in another order, tables rows changed, names pools rebuilt differently.
+"""
+import struct
+from itertools import count
+from pathlib import Path
+
+# Raw rolls are drawn from 0..ROLL_RANGE-1. 2520 is divisible by every number from 1 to 10,
+# so raw % sides + 1 is an exactly uniform throw for every die and choice used by the tables
+ROLL_RANGE = 2520
+
+# 2: name pools built from seeded Fakers, see name_pool.POOL_SEED
+GENERATOR_VERSION = 2
+
+SEXES = ('male', 'female')
+
+ID = struct.Struct('>BBQ')
+
+# 16 bit words of one blake2b block. Words from 65520 (26 * 2520) up are skipped,
+# so the rest % 2520 are exactly uniform
+WORDS = struct.Struct('<32H')
+LIMIT = 65536 // ROLL_RANGE * ROLL_RANGE
+
+
+def seed_rolls(seed: int):
+    """
+    Raw rolls of a seed: blake2b keyed with the seed over a block counter.
+    The same on every platform and Python version.
+
+    Args:
+        seed (int): 64 bit seed
+
+    Yields:
+        int: raw rolls in 0..ROLL_RANGE-1
+    """
+    from hashlib import blake2b
+
+    key = seed.to_bytes(8, 'little')
+    for block in count():
+        digest = blake2b(block.to_bytes(8, 'little'), digest_size=64, key=key).digest()
+        yield from [value % ROLL_RANGE for value in WORDS.unpack(digest) if value < LIMIT]
+
+
+def encode(role_index: int, sex: str, seed: int, version: int = GENERATOR_VERSION) -> str:
+    """
+    Args:
+        role_index (int): index of the role in tables['roles']
+        sex (str): 'male' or 'female'
+        seed (int): 64 bit seed of the rolls
+        version (int): generator version
+
+    Returns:
+        str: id of the character
+    """
+    return ID.pack(version, role_index * 2 + SEXES.index(sex), seed).hex()
+
+
+def decode(character_id: str) -> tuple:
+    """
+    Args:
+        character_id (str): id made by encode
+
+    Returns:
+        tuple: version, role index, sex, seed
+    """
+    try:
+        version, role_sex, seed = ID.unpack(bytes.fromhex(character_id))
+    except (ValueError, struct.error):
+        raise ValueError(f"'{character_id}' is not a character id") from None
+    return version, role_sex // 2, SEXES[role_sex % 2], seed
+
+
+def character_from_id(character_id: str, tables_path='data/tables.yaml'):
+    """
+    Rebuild the character with the given id, exactly as it was generated.
+
+    Args:
+        character_id (str): id of a generated character, Character.id
+        tables_path (str): the path to the tables file the character was generated with
+
+    Returns:
+        Character: the character
+    """
+    import character_create
+    from table_store import load_tables
+
+    version, role_index, sex, seed = decode(character_id)
+    if version != GENERATOR_VERSION:
+        raise ValueError(f"Character id '{character_id}' is from generator version {version}, "
+                         f"this is version {GENERATOR_VERSION}")
+
+    tables = load_tables(Path(character_create.__file__).parent.resolve() / tables_path)
+    if role_index >= len(tables['roles']):
+        raise ValueError(f"'{character_id}' is not a character id")
+    return character_create.from_seed(None, tables['roles'][role_index].lower(), sex, tables, seed)
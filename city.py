@@ -0,0 +1,279 @@
+"""City of interlinked characters.
+
+A city is n characters where the friends, enemies and lovers of everyone are other characters of
+the city. Characters are kept as their role, sex and seed only and built again on demand (see
+character_id). Links are stored as CSR adjacency arrays, one pair per kind of people:
+
+    <kind>.offsets.npy   int64, n + 1 entries, the links of character i are targets[offsets[i]:offsets[i + 1]]
+    <kind>.npy           int32 index of the linked character, in the order of the rolled people
+    role.npy, sex.npy    uint8 index in tables['roles'] and SEXES
+    seed.npy             uint64 seed of the rolls of every character
+    meta.json            version, count and roles
+
+Every character keeps its own rolls: how many friends, enemies and lovers it has and their sex.
+Each rolled person is then linked to another character of that sex drawn from the city seed and
+takes its name, see City.character. Links are directed: a friend does not always count the character
+as a friend back, City.neighbors gives links either way and City.path follows both.
+
+    city = generate_city(100_000, seed=1)
+    city.neighbors(5, 'enemies')
+    city.path(5, 99)
+"""
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import character_create
+from character_id import GENERATOR_VERSION, SEXES
+from table_store import load_tables
+
+CITY_VERSION = 1
+
+# Kinds of people, as the Character fields
+KINDS = ('friends', 'enemies', 'love')
+
+DIRECTIONS = ('out', 'in', 'both')
+
+# Characters rolled per task of a worker
+CHUNK_SIZE = 4096
+
+
+def _tables(tables_path) -> dict:
+    return load_tables(Path(character_create.__file__).parent.resolve() / tables_path)
+
+
+def _roll_people(roles: np.ndarray, sexes: np.ndarray, seeds: np.ndarray, tables_path) -> dict:
+    """
+    Build a chunk of characters and keep only their people: kind to (count of every character,
+    sex index of every person) as bytes. Characters are dropped as soon as they are read.
+    """
+    tables = _tables(tables_path)
+    role_names = [role.lower() for role in tables['roles']]
+    counts = {kind: bytearray() for kind in KINDS}
+    people = {kind: bytearray() for kind in KINDS}
+    for role, sex, seed in zip(roles.tolist(), sexes.tolist(), seeds.tolist()):
+        char = character_create.from_seed(None, role_names[role], SEXES[sex], tables, seed)
+        for kind in KINDS:
+            persons = getattr(char, kind)
+            counts[kind].append(len(persons))
+            people[kind] += bytes(SEXES.index(person.sex) for person in persons)
+    return {kind: (bytes(counts[kind]), bytes(people[kind])) for kind in KINDS}
+
+
+def _draw_targets(rng: np.random.Generator, pool: np.ndarray, sources: np.ndarray) -> np.ndarray:
+    """Uniform character of the sorted pool for every source, never the source itself"""
+    position = np.searchsorted(pool, sources)
+    inside = pool[np.minimum(position, len(pool) - 1)] == sources
+    draw = rng.integers(len(pool) - inside)
+    return pool[draw + (inside & (draw >= position))]
+
+
+def generate_city(n: int, seed: int = None, workers: int = 1, tables_path='data/tables.yaml') -> 'City':
+    """
+    Generate n characters and link their friends, enemies and lovers to each other.
+    Only role, sex, seed and the link arrays are kept, there is no Python object per character or link.
+
+    Args:
+        n (int): number of characters, at least 2
+        seed (int): city seed, the same seed gives the same city for any number of workers
+        workers (int): number of worker processes rolling the characters, 0 for all cores
+        tables_path (str): the path to the tables file
+
+    Returns:
+        City: the city
+    """
+    if n < 2:
+        raise ValueError('A city needs at least 2 characters')
+    tables = _tables(tables_path)
+    rng = np.random.default_rng(seed)
+
+    roles = rng.integers(len(tables['roles']), size=n, dtype=np.uint8)
+    sexes = rng.integers(len(SEXES), size=n, dtype=np.uint8)
+    seeds = rng.integers(2 ** 64, size=n, dtype=np.uint64)
+
+    chunks = [(roles[start:start + CHUNK_SIZE], sexes[start:start + CHUNK_SIZE], seeds[start:start + CHUNK_SIZE],
+               tables_path) for start in range(0, n, CHUNK_SIZE)]
+    if workers == 1:
+        rolled = [_roll_people(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(workers or None) as executor:
+            rolled = list(executor.map(_roll_people, *zip(*chunks)))
+
+    # Characters of each sex, the whole city for a sex with less than two
+    everyone = np.arange(n)
+    pools = [np.flatnonzero(sexes == index) for index in range(len(SEXES))]
+    pools = [pool if len(pool) > 1 else everyone for pool in pools]
+
+    links = {}
+    for kind in KINDS:
+        counts = np.frombuffer(b''.join(chunk[kind][0] for chunk in rolled), dtype=np.uint8)
+        person_sexes = np.frombuffer(b''.join(chunk[kind][1] for chunk in rolled), dtype=np.uint8)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        sources = np.repeat(everyone, counts)
+        targets = np.empty(len(sources), dtype=np.int32)
+        for index, pool in enumerate(pools):
+            edges = np.flatnonzero(person_sexes == index)
+            targets[edges] = _draw_targets(rng, pool, sources[edges])
+        links[kind] = (offsets, targets)
+
+    return City(roles, sexes, seeds, links, tables_path)
+
+
+def _expand(offsets: np.ndarray, targets: np.ndarray, nodes: np.ndarray) -> tuple:
+    """All links of the nodes at once: (node of every link, its target)"""
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    positions = np.arange(counts.sum()) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return np.repeat(nodes, counts), targets[positions]
+
+
+class City(object):
+    """Characters by role, sex and seed with CSR links, see the module docstring"""
+
+    def __init__(self, roles: np.ndarray, sexes: np.ndarray, seeds: np.ndarray, links: dict,
+                 tables_path='data/tables.yaml') -> None:
+        self.roles = roles
+        self.sexes = sexes
+        self.seeds = seeds
+        self.links = links
+        self.tables = _tables(tables_path)
+        self._reverse = {}
+
+    def __len__(self) -> int:
+        return len(self.roles)
+
+    def _build(self, index: int) -> character_create.Character:
+        return character_create.from_seed(None, self.tables['roles'][self.roles[index]].lower(),
+                                          SEXES[self.sexes[index]], self.tables, int(self.seeds[index]))
+
+    def character(self, index: int) -> character_create.Character:
+        """
+        Build the character again from its seed. Its friends, enemies and lovers keep their own rolls
+        but take the name and sex of the characters they are linked to.
+
+        Args:
+            index (int): index of the character in the city
+
+        Returns:
+            Character: the character
+        """
+        char = self._build(index)
+        for kind in KINDS:
+            for person, target in zip(getattr(char, kind), self.neighbors(index, kind).tolist()):
+                linked = self._build(target)
+                person.name, person.sex = linked.name, linked.sex
+        return char
+
+    def _links(self, kind: str, direction: str) -> tuple:
+        """CSR arrays of the kind, the transposed ones for links in"""
+        if direction == 'out':
+            return self.links[kind]
+        reverse = self._reverse.get(kind)
+        if reverse is None:
+            offsets, targets = self.links[kind]
+            order = np.argsort(targets, kind='stable')
+            sources = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(offsets))[order]
+            reverse_offsets = np.zeros(len(self) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(targets, minlength=len(self)), out=reverse_offsets[1:])
+            reverse = self._reverse[kind] = (reverse_offsets, sources)
+        return reverse
+
+    def _kinds(self, kind) -> tuple:
+        kinds = KINDS if kind is None else (kind,) if isinstance(kind, str) else tuple(kind)
+        unknown = set(kinds) - set(KINDS)
+        if unknown:
+            raise ValueError(f'No kind {sorted(unknown)}. Choose from {list(KINDS)}')
+        return kinds
+
+    def neighbors(self, index: int, kind=None, direction: str = 'out') -> np.ndarray:
+        """
+        Args:
+            index (int): index of the character
+            kind (str | Iterable): 'friends', 'enemies', 'love' or several of them, all if not set
+            direction (str): 'out' for the people of the character, 'in' for the characters
+                that have it among their people, 'both' for either
+
+        Returns:
+            np.ndarray: indices of the linked characters, in rolled order for 'out', may repeat
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"No direction '{direction}'. Choose from {list(DIRECTIONS)}")
+        directions = ('out', 'in') if direction == 'both' else (direction,)
+        parts = []
+        for kind in self._kinds(kind):
+            for way in directions:
+                offsets, targets = self._links(kind, way)
+                parts.append(targets[offsets[index]:offsets[index + 1]])
+        return np.concatenate(parts)
+
+    def path(self, source: int, target: int, kind=None) -> list:
+        """
+        Shortest chain of links between two characters, links followed either way.
+        Breadth first, one vectorized step per distance.
+
+        Args:
+            source (int): index of the first character
+            target (int): index of the last character
+            kind (str | Iterable): kinds of links to follow, all if not set
+
+        Returns:
+            list: indices from source to target, None if they are not connected
+        """
+        graphs = [self._links(kind, way) for kind in self._kinds(kind) for way in ('out', 'in')]
+        parent = np.full(len(self), -1, dtype=np.int64)
+        parent[source] = source
+        frontier = np.array([source], dtype=np.int64)
+        while frontier.size and parent[target] < 0:
+            found = [_expand(offsets, targets, frontier) for offsets, targets in graphs]
+            nodes = np.concatenate([pair[0] for pair in found])
+            reached = np.concatenate([pair[1] for pair in found])
+            new = parent[reached] < 0
+            frontier, first = np.unique(reached[new], return_index=True)
+            parent[frontier] = nodes[new][first]
+
+        if parent[target] < 0:
+            return None
+        chain = [target]
+        while chain[-1] != source:
+            chain.append(int(parent[chain[-1]]))
+        return chain[::-1]
+
+    def save(self, path) -> None:
+        """Write the city as .npy files in the directory, see load_city"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, array in (('role', self.roles), ('sex', self.sexes), ('seed', self.seeds)):
+            np.save(path / f'{name}.npy', array)
+        for kind, (offsets, targets) in self.links.items():
+            np.save(path / f'{kind}.offsets.npy', offsets)
+            np.save(path / f'{kind}.npy', targets)
+        (path / 'meta.json').write_text(json.dumps({'version': CITY_VERSION, 'generator': GENERATOR_VERSION,
+                                                    'count': len(self), 'roles': list(self.tables['roles'])}))
+
+
+def load_city(path, tables_path='data/tables.yaml') -> City:
+    """
+    Open a city written by City.save, arrays are memory-mapped.
+
+    Args:
+        path (str | Path): city directory
+        tables_path (str): the path to the tables file the city was generated with
+
+    Returns:
+        City: the city
+    """
+    path = Path(path)
+    meta = json.loads((path / 'meta.json').read_text())
+    if (meta['version'], meta['generator'], meta['roles']) != (CITY_VERSION, GENERATOR_VERSION,
+                                                               list(_tables(tables_path)['roles'])):
+        raise ValueError(f'{path} is not a city of version {CITY_VERSION} made with the current generator and tables')
+
+    def load(name):
+        return np.load(path / f'{name}.npy', mmap_mode='r')
+
+    links = {kind: (load(f'{kind}.offsets'), load(kind)) for kind in KINDS}
+    return City(load('role'), load('sex'), load('seed'), links, tables_path)
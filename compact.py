@@ -0,0 +1,431 @@
+import re
+from dataclasses import fields
+from itertools import product
+from pathlib import Path
+from typing import NamedTuple
+
+import character_create
+import dice_engine
+import name_pool
+import roles
+import templates
+from table_store import load_tables
+
+TABLES_PATH = Path(__file__).parent.resolve() / 'data' / 'tables.yaml'
+
+# Byte of a roll that was not made, e.g. the partner of a Netrunner working alone
+NONE = 255
+
+# Name index of a name that is not from the name pool, the name is stored as a string
+CUSTOM_NAME = 0xFFFF
+
+SEXES = ('male', 'female')
+
+RELATIONSHIP_CLASSES = {'friends': character_create.Friend,
+                        'enemies': character_create.Enemy,
+                        'love': character_create.Love}
+
+# Bytes per person: friend - row, sex, name (2), enemy - type, sex, name (2), wrong, throw, dice, meet,
+# love - sex, name (2), row
+RELATIONSHIP_SIZES = {'friends': 4, 'enemies': 8, 'love': 4}
+
+# Kinds of slots that are rolled for every character of the role
+ALWAYS_ROLLED = ('flag', 'origin', 'language')
+
+
+class Slot(NamedTuple):
+    """
+    One byte of the compact form: the result of one roll.
+
+    kind:
+        row - row of the table named in source
+        row_by - row of a table chosen by another field: source is (field, {value: table})
+        choice - index in the options tuple in source
+        flag - 0 or 1, the field is None if 0 and the following slots are not rolled
+        split - option of a row with 'A/B/C' options
+        word - option of the word with 'A/B' options in a row
+        origin - row of Cultural Origins, the field is its region
+        language - index in the languages of the cultural origin
+    """
+    field: str
+    kind: str
+    source: object = None
+
+
+BASE_SLOTS = (
+    Slot('cultural_region', 'origin'),
+    Slot('cultural_region', 'split'),
+    Slot('language', 'language'),
+) + tuple(Slot(attribute, 'row', attribute.replace('_', ' ').title())
+          for attribute in character_create.Character.attributes_names)
+
+
+# Slots of the steps of roles.py. flag, split and word steps roll the row in a slot of its own
+STEP_SLOTS = {
+    'row': lambda field, source: (Slot(field, 'row', source),),
+    'split': lambda field, source: (Slot(field, 'row', source), Slot(field, 'split')),
+    'word': lambda field, source: (Slot(field, 'row', source), Slot(field, 'word')),
+    'flag': lambda field, source: (Slot(field, 'flag'), Slot(field, 'row', source)),
+    'choice': lambda field, source: (Slot(field, 'choice', source),),
+    'row_by': lambda field, source: (Slot(field, 'row_by', source),),
+}
+
+
+def _role_slots(role: roles.Role) -> tuple:
+    """Slots of the role in the order its steps roll them"""
+    return tuple(slot for field, kind, source, _ in role.steps for slot in STEP_SLOTS[kind](field, source))
+
+
+# Slots of every role in the order the role rolls them
+ROLE_SLOTS = {name: _role_slots(role) for name, role in roles.ROLES.items()}
+
+# Fixed part of the data: role, sex, name index (2 bytes), then the slots
+HEADER_SIZE = 4
+
+
+class Layout(object):
+    """Slots of one role and the offsets of the slots of each field"""
+
+    def __init__(self, role: str) -> None:
+        self.role = role
+        self.role_class = character_create.ROLE_CLASSES[role]
+        self.slots = BASE_SLOTS + ROLE_SLOTS[role]
+        self.size = HEADER_SIZE + len(self.slots)
+        self.fields = {}
+        for offset, slot in enumerate(self.slots, HEADER_SIZE):
+            self.fields.setdefault(slot.field, []).append((offset, slot))
+        self.defaults = {field.name: field.default for field in fields(self.role_class)}
+
+
+LAYOUTS = {role: Layout(role) for role in ROLE_SLOTS}
+
+# Row indices of table values, for compacting rows that are not refined by other slots
+_row_indexes = {}
+
+
+# Compiled tables shared by all compact characters, loaded on first use
+_shared_tables = None
+
+
+def _tables() -> dict:
+    global _shared_tables
+    if _shared_tables is None:
+        _shared_tables = load_tables(TABLES_PATH)
+    return _shared_tables
+
+
+def _row_index(table_name: str, value) -> int:
+    index = _row_indexes.get(table_name)
+    if index is None:
+        index = {}
+        for row, text in reversed(list(enumerate(_tables()[table_name]))):
+            index[text] = row
+        _row_indexes[table_name] = index
+    return index[value]
+
+
+def _refine(value: str, kind: str, option: int) -> str:
+    if kind == 'split':
+        return value.split('/')[option]
+    return ' '.join(word.split('/')[option] if '/' in word else word for word in value.split(' '))
+
+
+def _materialize(data, layout: Layout, field: str):
+    """
+    Value of a field from the bytes of its slots.
+    """
+    tables = _tables()
+    value = layout.defaults.get(field)
+    for offset, slot in layout.fields[field]:
+        index = data[offset]
+        if index == NONE:
+            if slot.kind in ('split', 'word'):
+                continue
+            return layout.defaults.get(field)
+
+        if slot.kind == 'row':
+            value = tables[slot.source][index]
+        elif slot.kind == 'row_by':
+            dependency, table_names = slot.source
+            value = tables[table_names[_materialize(data, layout, dependency)]][index]
+        elif slot.kind == 'choice':
+            value = slot.source[index]
+        elif slot.kind == 'flag':
+            if not index:
+                return layout.defaults.get(field)
+        elif slot.kind in ('split', 'word'):
+            value = _refine(value, slot.kind, index)
+        elif slot.kind == 'origin':
+            value = tables['Cultural Origins'][index]['Cultural Region']
+        elif slot.kind == 'language':
+            value = tables['Cultural Origins'][data[HEADER_SIZE]]['Languages'][index]
+
+    return value
+
+
+def _slot_range(data, layout: Layout, slot: Slot) -> range:
+    tables = _tables()
+    if slot.kind == 'row':
+        return range(len(tables[slot.source]))
+    if slot.kind == 'row_by':
+        dependency, table_names = slot.source
+        return range(len(tables[table_names[_materialize(data, layout, dependency)]]))
+    if slot.kind == 'choice':
+        return range(len(slot.source))
+    if slot.kind == 'flag':
+        return range(2)
+    if slot.kind == 'origin':
+        return range(len(tables['Cultural Origins']))
+    if slot.kind == 'language':
+        return range(len(tables['Cultural Origins'][data[HEADER_SIZE]]['Languages']))
+    return range(3)
+
+
+def _compact_field(data: bytearray, layout: Layout, field: str, value) -> None:
+    """
+    Find the slot bytes that materialize to the value and write them to data.
+    """
+    slots = layout.fields[field]
+    if len(slots) == 1 and slots[0][1].kind == 'row':
+        offset, slot = slots[0]
+        data[offset] = NONE if value is None else _row_index(slot.source, value)
+        return
+
+    # few slots with few options each: try the combinations, 'not rolled' first
+    ranges = [([] if slot.kind in ALWAYS_ROLLED else [NONE]) + list(_slot_range(data, layout, slot))
+              for _, slot in slots]
+    for indices in product(*ranges):
+        for (offset, _), index in zip(slots, indices):
+            data[offset] = index
+        try:
+            if _materialize(data, layout, field) == value:
+                return
+        except (IndexError, KeyError, AttributeError):
+            continue
+
+    raise ValueError(f"Can't compact {layout.role} {field} = {value!r}")
+
+
+def _throw_text(template: templates.Template, face: int) -> str:
+    """Enemy throw row with its {dice} expression rolled from the raw roll face, like Enemy does"""
+    if face == NONE:
+        return template.render()
+    return template.render(lambda expression: dice_engine.roll(expression, lambda sides: face % sides + 1))
+
+
+def _throw_faces(template: templates.Template):
+    """Raw rolls worth trying for the dice of an Enemy throw row"""
+    if not template.expressions:
+        return (NONE,)
+    return range(max(int(sides) for sides in re.findall(r'd(\d+)', template.expressions[0])))
+
+
+class CompactCharacter(object):
+    """
+    A character stored as the bytes of its rolls: role, sex, name index in the name pool,
+    one byte per table row or choice and the rolls of friends, enemies and lovers.
+    Text fields are looked up in the shared compiled tables when they are read.
+    Anything else a Character has (message_role, str()) is taken from a Character rebuilt
+    from the rolls, see to_character.
+    """
+    __slots__ = ('data', 'custom_name')
+
+    def __init__(self, data: bytes, custom_name: str = None) -> None:
+        self.data = data
+        self.custom_name = custom_name
+
+    @classmethod
+    def from_character(cls, char: character_create.Character) -> 'CompactCharacter':
+        """
+        Args:
+            char (Character): character generated with the default tables
+
+        Returns:
+            CompactCharacter: the same character in compact form
+        """
+        tables = _tables()
+        pool = name_pool.load_pool()
+        layout = LAYOUTS[char.class_name]
+
+        data = bytearray(layout.size)
+        data[0] = tables['roles'].index(char.class_name)
+        data[1] = SEXES.index(char.sex)
+
+        custom_name = None
+        name_index = pool.index_of(char.cultural_region, char.sex, char.name)
+        if name_index is None:
+            name_index, custom_name = CUSTOM_NAME, char.name
+        data[2:4] = name_index.to_bytes(2, 'big')
+
+        for field in layout.fields:
+            _compact_field(data, layout, field, getattr(char, field))
+
+        def name_bytes(person):
+            index = pool.index_of(char.cultural_region, person.sex, person.name)
+            if index is None:
+                raise ValueError(f"Name '{person.name}' is not from the name pool")
+            return index.to_bytes(2, 'big')
+
+        data.append(len(char.friends))
+        for friend in char.friends:
+            data.append(_row_index('Friend', friend.relationship))
+            data.append(SEXES.index(friend.sex))
+            data += name_bytes(friend)
+
+        data.append(len(char.enemies))
+        for enemy in char.enemies:
+            data.append(_row_index('Enemy type', enemy.enemy_type))
+            data.append(SEXES.index(enemy.sex))
+            data += name_bytes(enemy)
+            data.append(_row_index('Enemy wrong', enemy.wrong))
+            for row, template in enumerate(templates.load_templates(tables).dice['Enemy throw']):
+                face = next((face for face in _throw_faces(template) if _throw_text(template, face) == enemy.throw),
+                            None)
+                if face is not None:
+                    data += bytes((row, face))
+                    break
+            else:
+                raise ValueError(f"Can't compact enemy throw {enemy.throw!r}")
+            data.append(_row_index('Enemy meet', enemy.meet))
+
+        data.append(len(char.love))
+        for love in char.love:
+            data.append(SEXES.index(love.sex))
+            data += name_bytes(love)
+            data.append(_row_index('Love happened', love.happend))
+
+        return cls(bytes(data), custom_name)
+
+    @property
+    def layout(self) -> Layout:
+        return LAYOUTS[_tables()['roles'][self.data[0]]]
+
+    @property
+    def role(self) -> str:
+        return _tables()['roles'][self.data[0]].lower()
+
+    @property
+    def class_name(self) -> str:
+        return _tables()['roles'][self.data[0]]
+
+    @property
+    def sex(self) -> str:
+        return SEXES[self.data[1]]
+
+    @property
+    def name_index(self) -> int:
+        return int.from_bytes(self.data[2:4], 'big')
+
+    @property
+    def name(self) -> str:
+        if self.custom_name is not None:
+            return self.custom_name
+        return name_pool.load_pool().name(self.cultural_region, self.sex, self.name_index)
+
+    def _relationship_offsets(self) -> dict:
+        """Offsets of the friends, enemies and love counts"""
+        offsets = {}
+        offset = self.layout.size
+        for field, size in RELATIONSHIP_SIZES.items():
+            offsets[field] = offset
+            offset += 1 + self.data[offset] * size
+        return offsets
+
+    def _people(self, field: str) -> list:
+        tables = _tables()
+        pool = name_pool.load_pool()
+        region = self.cultural_region
+        offset = self._relationship_offsets()[field]
+        data = self.data
+
+        people = []
+        position = offset + 1
+        for _ in range(data[offset]):
+            person = object.__new__(RELATIONSHIP_CLASSES[field])
+            if field == 'friends':
+                person.relationship = tables['Friend'][data[position]]
+                position += 1
+            elif field == 'enemies':
+                person.enemy_type = tables['Enemy type'][data[position]]
+                position += 1
+
+            person.sex = SEXES[data[position]]
+            person.name = pool.name(region, person.sex, int.from_bytes(data[position + 1:position + 3], 'big'))
+            position += 3
+
+            if field == 'enemies':
+                person.wrong = tables['Enemy wrong'][data[position]]
+                person.throw = _throw_text(templates.load_templates(tables).dice['Enemy throw'][data[position + 1]],
+                                           data[position + 2])
+                person.meet = tables['Enemy meet'][data[position + 3]]
+                position += 4
+            elif field == 'love':
+                person.happend = tables['Love happened'][data[position]]
+                position += 1
+            people.append(person)
+
+        return people
+
+    def raw_rolls(self) -> list:
+        """
+        Raw rolls that make a Character throw exactly the stored results,
+        in the order Character and the role classes throw them.
+        """
+        data = self.data
+        layout = self.layout
+
+        def slot_rolls(slots, first):
+            return [index for index in data[first:first + len(slots)] if index != NONE]
+
+        rolls = slot_rolls(BASE_SLOTS[:3], HEADER_SIZE)
+        if self.custom_name is None:
+            rolls.append(self.name_index)
+        rolls += slot_rolls(BASE_SLOTS[3:], HEADER_SIZE + 3)
+
+        for field, offset in self._relationship_offsets().items():
+            size = RELATIONSHIP_SIZES[field]
+            count = data[offset]
+            rolls.append(count + 6 if count else 0) # max(0, 1d10 - 7) == count
+            for start in range(offset + 1, offset + 1 + count * size, size):
+                person = data[start:start + size]
+                if field == 'love': # sex, name, row
+                    rolls += [person[0], int.from_bytes(person[1:3], 'big'), person[3]]
+                    continue
+                # friend: row, sex, name; enemy: type, sex, name, wrong, throw, dice, meet
+                rolls += [person[0], person[1], int.from_bytes(person[2:4], 'big')]
+                rolls += [index for index in person[4:] if index != NONE]
+
+        rolls += slot_rolls(ROLE_SLOTS[layout.role], HEADER_SIZE + len(BASE_SLOTS))
+        return rolls
+
+    def to_character(self) -> character_create.Character:
+        """
+        Returns:
+            Character: full character rebuilt from the stored rolls
+        """
+        return self.layout.role_class(self.custom_name, self.role, self.sex, _tables(), rolls=iter(self.raw_rolls()))
+
+    def __getattr__(self, field: str):
+        layout = self.layout
+        if field in layout.fields:
+            return _materialize(self.data, layout, field)
+        if field in RELATIONSHIP_CLASSES:
+            return self._people(field)
+        if field in layout.defaults:
+            if field in ('tables', 'rolls'):
+                raise AttributeError(field)
+            return getattr(self.to_character(), field)
+        raise AttributeError(f"'{layout.role}' character has no field '{field}'")
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, CompactCharacter)
+                and self.data == other.data and self.custom_name == other.custom_name)
+
+    def __hash__(self) -> int:
+        return hash((self.data, self.custom_name))
+
+    def __str__(self) -> str:
+        return str(self.to_character())
+
+    def __repr__(self) -> str:
+        return f'CompactCharacter({self.data!r}, {self.custom_name!r})'
@@ -0,0 +1,146 @@
+"""Constrained generation: characters with some fields fixed, the rest random.
+
+where maps fields to values, e.g. {'role': 'solo', 'hairstyle': 'Mohawk', 'cultural_region': 'East Asian'}.
+Values are looked up in the inverted row index built when the tables are compiled
+(table_store.index_rows) and given to the character as table name to value, so a fixed field
+is set directly by Character.chosen_atribute / roll_role and nothing is generated and thrown away.
+The other fields are rolled as usual. Region and language pick the origin row by the chance it
+gives them, so constrained characters are distributed exactly like unconstrained ones that match.
+
+Fields that can be fixed: role, sex, cultural_region, language, the attributes of Character
+and the role fields rolled on one table that no other field depends on, see fields().
+"""
+from pathlib import Path
+
+import probability
+from character_create import Character
+from table_store import ROW_INDEX, load_tables
+
+SEXES = ('male', 'female')
+
+BASE_FIELDS = {'cultural_region': 'Cultural Region', 'language': 'Languages'}
+BASE_FIELDS.update({attribute: attribute.replace('_', ' ').title() for attribute in Character.attributes_names})
+
+
+def role_fields(role: str) -> dict:
+    """
+    Fields of the role that can be fixed: rolled on a single table, no dependencies either way.
+
+    Returns:
+        dict: field to table name
+    """
+    from compact import ROLE_SLOTS
+
+    class_name = role.capitalize()
+    nodes = probability.ROLE_NODES[class_name]
+    parents = {parent for node in nodes for parent in node.parents}
+    slots = {}
+    for slot in ROLE_SLOTS[class_name]:
+        slots.setdefault(slot.field, []).append(slot)
+
+    return {node.field: slots[node.field][0].source for node in nodes
+            if not node.parents and node.field not in parents and node.field in slots and
+            len(slots[node.field]) == 1 and slots[node.field][0].kind == 'row'}
+
+
+def fields(role: str = None) -> list:
+    """Fields that can be fixed for characters of the role, or of any role"""
+    return ['role', 'sex'] + list(BASE_FIELDS) + (list(role_fields(role)) if role else [])
+
+
+def parse_where(items: list) -> dict:
+    """
+    Args:
+        items (list): 'field=value' strings, e.g. from --where
+
+    Returns:
+        dict: field to value
+    """
+    where = {}
+    for item in items:
+        field, separator, value = item.partition('=')
+        if not separator or not field.strip():
+            raise ValueError(f"'{item}' is not field=value")
+        where[field.strip()] = value.strip()
+    return where
+
+
+def _match(options, value: str, field: str) -> str:
+    """The option equal to the value, ignoring case if there is no exact match"""
+    if value in options:
+        return value
+    matches = [option for option in options if option.casefold() == value.casefold()]
+    if len(matches) != 1:
+        raise ValueError(f"No {field} '{value}'. Choose from {list(options)}")
+    return matches[0]
+
+
+def resolve(where: dict, role: str = None, sex: str = None, tables: dict = None) -> tuple:
+    """
+    Check the fixed fields against the tables.
+
+    Args:
+        where (dict): field to value
+        role (str): role asked besides where, random if None
+        sex (str): sex asked besides where, random if None
+        tables (dict): compiled tables, the default ones if not set
+
+    Returns:
+        tuple: role, sex and the constraints of Character: table name to value
+    """
+    if tables is None:
+        tables = load_tables(Path(__file__).parent.resolve() / 'data' / 'tables.yaml')
+    where = dict(where)
+
+    if 'role' in where:
+        fixed_role = _match(tables['roles'], where.pop('role').capitalize(), 'role').lower()
+        if role and role.lower() != fixed_role:
+            raise ValueError(f"Role '{role}' contradicts role={fixed_role}")
+        role = fixed_role
+    if 'sex' in where:
+        fixed_sex = _match(SEXES, where.pop('sex'), 'sex')
+        if sex and sex != fixed_sex:
+            raise ValueError(f"Sex '{sex}' contradicts sex={fixed_sex}")
+        sex = fixed_sex
+
+    table_names = dict(BASE_FIELDS)
+    if role:
+        table_names.update(role_fields(role))
+
+    index = tables[ROW_INDEX]
+    constraints = {}
+    for field, value in where.items():
+        if field not in table_names:
+            raise ValueError(f"Field '{field}' can't be fixed{' for ' + role if role else ' without a role'}. "
+                             f"Choose from {fields(role)}")
+        table_name = table_names[field]
+        constraints[table_name] = _match(index[table_name], value, field)
+
+    if 'Cultural Region' in constraints and 'Languages' in constraints:
+        if not set(index['Cultural Region'][constraints['Cultural Region']]) & \
+                set(index['Languages'][constraints['Languages']]):
+            raise ValueError(f"No cultural origin with region '{constraints['Cultural Region']}' "
+                             f"and language '{constraints['Languages']}'")
+
+    return role, sex, constraints
+
+
+def generate(n: int, where: dict, role: str = None, sex: str = None, seed: int = None,
+             tables_path='data/tables.yaml') -> list:
+    """
+    Generate n characters with the fields in where fixed.
+
+    Args:
+        n (int): number of characters
+        where (dict): field to value, see fields()
+        role, sex, seed, tables_path: see character_create.main
+
+    Returns:
+        list: generated characters
+    """
+    import character_create
+    import dice_engine
+
+    if seed is not None:
+        dice_engine.seed(seed)
+    return [character_create.main(None, role, sex, tables_path, where=where) for _ in range(n)]
@@ -0,0 +1,146 @@
+import re
+from functools import lru_cache
+from random import Random
+from typing import Callable
+
+# The only source of randomness for character generation. Seed it with seed() to repeat a run
+rng = Random()
+
+TOKEN = re.compile(r'\s*(?:(\d*)d(\d+)t?|(\d+)|(\S))')
+
+OPERATORS = {
+    '+': lambda left, right: left + right,
+    '-': lambda left, right: left - right,
+    '*': lambda left, right: left * right,
+    '/': lambda left, right: left // right, # dice library divides rounding down
+}
+
+
+def seed(value=None) -> None:
+    """
+    Seed the generator all dice are thrown with.
+
+    Args:
+        value (int): seed, None to seed from the system
+    """
+    rng.seed(value)
+
+
+def throw(sides: int) -> int:
+    """
+    Throw one die with the shared generator.
+
+    Args:
+        sides (int): number of sides of the die
+
+    Returns:
+        int: result from 1 to sides
+    """
+    return rng.randrange(sides) + 1
+
+
+def _tokenize(expression: str) -> list:
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = TOKEN.match(expression, position)
+        count, sides, number, symbol = match.groups()
+        if sides is not None:
+            tokens.append(('dice', int(count or 1), int(sides)))
+        elif number is not None:
+            tokens.append(('number', int(number)))
+        elif symbol in OPERATORS or symbol in '()':
+            tokens.append(('symbol', symbol))
+        else:
+            raise ValueError(f"Unexpected '{symbol}' in dice expression '{expression}'")
+        position = match.end()
+
+    return tokens
+
+
+def _parse(tokens: list, expression: str) -> Callable:
+    """
+    Recursive descent over the tokens: sums of products of dice, numbers and brackets.
+    Returns a function of a throw function that evaluates the expression.
+    """
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else ('end', None)
+
+    def factor():
+        nonlocal position
+        token = peek()
+        position += 1
+        if token[0] == 'number':
+            value = token[1]
+            return lambda die: value
+        if token[0] == 'dice':
+            count, sides = token[1], token[2]
+            if count == 1:
+                return lambda die: die(sides)
+            return lambda die: sum(die(sides) for _ in range(count))
+        if token == ('symbol', '('):
+            inner = add()
+            if peek() != ('symbol', ')'):
+                raise ValueError(f"Missing ')' in dice expression '{expression}'")
+            position += 1
+            return inner
+        raise ValueError(f"Unexpected end of dice expression '{expression}'")
+
+    def binary(operand, symbols):
+        def parse():
+            nonlocal position
+            left = operand()
+            while peek()[0] == 'symbol' and peek()[1] in symbols:
+                operator = OPERATORS[peek()[1]]
+                position += 1
+                right = operand()
+                left = (lambda left, right, operator: lambda die: operator(left(die), right(die)))(
+                    left, right, operator)
+            return left
+        return parse
+
+    mul = binary(factor, '*/')
+    add = binary(mul, '+-')
+
+    result = add()
+    if position != len(tokens):
+        raise ValueError(f"Unexpected '{tokens[position][-1]}' in dice expression '{expression}'")
+    return result
+
+
+@lru_cache(maxsize=None)
+def compile_expression(expression: str) -> Callable:
+    """
+    Compile a dice expression like '1d10t', '2d6', '1d6/2' or '1d10 + 5' once.
+    The trailing 't' (total) of the dice library is accepted and ignored.
+
+    Args:
+        expression (str): dice expression
+
+    Returns:
+        Callable: function of an optional throw function (sides -> result) that rolls
+            the expression, throwing dice with the shared generator by default
+    """
+    evaluate = _parse(_tokenize(expression), expression)
+
+    def roll_compiled(die: Callable = None) -> int:
+        return evaluate(die or throw)
+
+    return roll_compiled
+
+
+def roll(expression: str, die: Callable = None) -> int:
+    """
+    Roll a dice expression, see compile_expression.
+
+    Args:
+        expression (str): dice expression
+        die (Callable): function throwing one die (sides -> result), the shared generator if not set
+
+    Returns:
+        int: result of the expression
+    """
+    return compile_expression(expression)(die)
@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+import sys
+from dataclasses import fields
+from typing import Iterable, Iterator
+
+import character_create
+import locales
+
+FORMATS = ('text', 'jsonl', 'csv')
+
+# Lines collected before one write to the output
+CHUNK_LINES = 1024
+
+# Dataclass fields that are generation state, not part of the character
+SKIPPED_FIELDS = ('tables', 'rolls', 'constraints')
+
+RELATIONSHIP_FIELDS = ('friends', 'enemies', 'love')
+
+
+def _columns() -> list:
+    """Fields of all roles in declaration order, the header of csv export"""
+    columns = []
+    for role_class in character_create.ROLE_CLASSES.values():
+        for field in fields(role_class):
+            if field.name not in SKIPPED_FIELDS and field.name not in columns:
+                columns.append(field.name)
+    return columns
+
+
+CSV_COLUMNS = _columns()
+
+
+def character_record(char: character_create.Character) -> dict:
+    """
+    Plain data of a character: its dataclass fields without the tables,
+    with friends, enemies and lovers as lists of dicts.
+
+    Args:
+        char (Character): generated character
+
+    Returns:
+        dict: field name to value
+    """
+    record = {}
+    for field in fields(char):
+        if field.name in SKIPPED_FIELDS:
+            continue
+
+        value = getattr(char, field.name)
+        if field.name in RELATIONSHIP_FIELDS:
+            value = [{slot: getattr(person, slot) for slot in person.__slots__} for person in value or ()]
+        record[field.name] = value
+
+    return record
+
+
+def to_text(char: character_create.Character) -> str:
+    return f'{char}\n'
+
+
+def to_locale_text(char: character_create.Character, locale: str) -> str:
+    """to_text in a locale of locales.py, picklable with functools.partial"""
+    return f'{locales.render(char, locale)}\n'
+
+
+def to_jsonl(char: character_create.Character) -> str:
+    return json.dumps(character_record(char), ensure_ascii=False) + '\n'
+
+
+def to_csv(char: character_create.Character) -> str:
+    record = character_record(char)
+    for name in RELATIONSHIP_FIELDS:
+        record[name] = json.dumps(record[name], ensure_ascii=False)
+
+    buffer = io.StringIO()
+    csv.DictWriter(buffer, CSV_COLUMNS).writerow(record)
+    return buffer.getvalue()
+
+
+RENDERERS = {'text': to_text, 'jsonl': to_jsonl, 'csv': to_csv}
+
+
+def csv_header() -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_COLUMNS)
+    return buffer.getvalue()
+
+
+def iter_lines(rendered: Iterable[str], format: str) -> Iterator[str]:
+    """
+    Add what the format needs around rendered characters: csv header, blank lines between texts.
+
+    Args:
+        rendered (Iterable[str]): characters rendered with RENDERERS[format]
+        format (str): one of FORMATS
+
+    Yields:
+        str: pieces of the output
+    """
+    if format == 'csv':
+        yield csv_header()
+
+    for number, line in enumerate(rendered):
+        if format == 'text' and number:
+            yield '\n'
+        yield line
+
+
+def write_chunks(lines: Iterable[str], out=None, chunk_lines: int = CHUNK_LINES) -> int:
+    """
+    Write lines to a file in chunks, holding at most chunk_lines of them in memory.
+
+    Args:
+        lines (Iterable[str]): output pieces
+        out (str | Path): output file, stdout if not set
+        chunk_lines (int): lines per write
+
+    Returns:
+        int: number of lines written
+    """
+    fo = open(out, 'w', encoding='utf-8', newline='') if out else sys.stdout
+    written = 0
+    try:
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) == chunk_lines:
+                fo.write(''.join(chunk))
+                written += len(chunk)
+                chunk.clear()
+        fo.write(''.join(chunk))
+        written += len(chunk)
+    finally:
+        if out:
+            fo.close()
+        else:
+            fo.flush()
+
+    return written
+
+
+def export(characters: Iterable, format: str = 'jsonl', out=None) -> int:
+    """
+    Stream characters to a file in the given format.
+
+    Args:
+        characters (Iterable): characters, e.g. a generator from parallel.generate_parallel
+        format (str): one of FORMATS
+        out (str | Path): output file, stdout if not set
+
+    Returns:
+        int: number of lines written
+    """
+    render = RENDERERS[format]
+    return write_chunks(iter_lines((render(char) for char in characters), format), out)
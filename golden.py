@@ -0,0 +1,240 @@
+"""Golden corpus: the output of the generator for fixed seeds, to catch changes nobody meant.
+
+Character i of the corpus has role tables['roles'][i % 10], sex SEXES[i // 10 % 2] and
+seed parallel.derive_seed(GOLDEN_SEED, i), so every role and sex is covered evenly.
+data/golden.json keeps, for chunks of CHUNK_SIZE characters:
+
+    rolls       digest of the rolls every character took from its seed, in order
+    text        digest of str() of every character
+    fields      digest of every field of FIELDS over the characters of the chunk, 8 hex digits each
+
+and samples, the first character of every role and sex in full: seed, roll vector, repr of every field
+and a digest per line of its text. verify rebuilds the chunks in parallel and tells which fields
+changed, the tables they are rolled on and for the samples the values and lines before and after.
+
+    python golden.py verify --workers 0     # all of the corpus
+    python golden.py record                 # after a change of the output that was meant, with GENERATOR_VERSION
+"""
+import json
+from dataclasses import fields as dataclass_fields
+from hashlib import blake2b
+from itertools import islice
+from operator import length_hint
+from pathlib import Path
+
+import character_create
+from character_id import GENERATOR_VERSION, SEXES, seed_rolls
+from parallel import derive_seed, run_chunks
+from table_store import load_tables
+
+GOLDEN_PATH = Path(__file__).parent.resolve() / 'data' / 'golden.json'
+
+GOLDEN_SEED = 2520
+
+CHUNK_SIZE = 2048
+
+# Characters of the corpus recorded by default
+GOLDEN_COUNT = 100_000
+
+# Rolls drawn ahead for a character, more than it can take (batch.ROLLS_PER_CHARACTER)
+ROLLS_AHEAD = 96
+
+# Fields of the character records of all roles, in order. Tables and rolls are not part of a character
+FIELDS = list(dict.fromkeys(field.name for role_class in character_create.ROLE_CLASSES.values()
+                            for field in dataclass_fields(role_class)
+                            if field.name not in ('tables', 'rolls', 'constraints')))
+
+# Tables the people of a character are rolled on
+PEOPLE_TABLES = {'friends': ['Friend'], 'enemies': ['Enemy type', 'Enemy wrong', 'Enemy throw', 'Enemy meet'],
+                 'love': ['Love happened']}
+
+
+def _digest(data: bytes, size: int = 8) -> str:
+    return blake2b(data, digest_size=size).hexdigest()
+
+
+def field_tables(field: str) -> list:
+    """Tables, or other sources, a field is rolled on"""
+    if field in character_create.ATTRIBUTE_TABLES:
+        return [character_create.ATTRIBUTE_TABLES[field]]
+    if field in ('cultural_region', 'language'):
+        return ['Cultural Origins']
+    if field == 'name':
+        return ['name pool']
+    if field in PEOPLE_TABLES:
+        return PEOPLE_TABLES[field]
+    if field == 'message_role':
+        return ['role frames']
+    tables = []
+    for role_class in character_create.ROLE_CLASSES.values():
+        for step_field, kind, source, _ in role_class.role_spec.steps:
+            if step_field == field:
+                tables += list(source[1].values()) if kind == 'row_by' else [] if kind == 'choice' else [source]
+    return list(dict.fromkeys(tables))
+
+
+def build(index: int, tables: dict) -> tuple:
+    """
+    Character of the corpus and the rolls it took.
+
+    Args:
+        index (int): index of the character in the corpus
+        tables (dict): compiled tables
+
+    Returns:
+        tuple: (Character, list of raw rolls)
+    """
+    role_names = tables['roles']
+    seed = derive_seed(GOLDEN_SEED, index)
+    drawn = list(islice(seed_rolls(seed), ROLLS_AHEAD))
+    rolls = iter(drawn)
+    try:
+        char = character_create.from_seed(None, role_names[index % len(role_names)].lower(),
+                                          SEXES[index // len(role_names) % len(SEXES)], tables, seed, rolls=rolls)
+    except StopIteration:
+        raise ValueError(f'Character {index} of the corpus takes more than {ROLLS_AHEAD} rolls') from None
+    return char, drawn[:len(drawn) - length_hint(rolls)]
+
+
+def chunk_digests(seed: int, index: int, size: int, tables_path='data/tables.yaml',
+                  chunk_size: int = CHUNK_SIZE) -> dict:
+    """Digests of one chunk, see the module docstring. seed is unused, the corpus has its own seeds"""
+    tables = load_tables(Path(character_create.__file__).parent.resolve() / tables_path)
+    rolls, text = blake2b(digest_size=8), blake2b(digest_size=8)
+    field_hashes = [blake2b(digest_size=4) for _ in FIELDS]
+    for position in range(index * chunk_size, index * chunk_size + size):
+        char, taken = build(position, tables)
+        rolls.update(len(taken).to_bytes(1, 'little') + b''.join(roll.to_bytes(2, 'little') for roll in taken))
+        text.update(str(char).encode() + b'\0')
+        values = char.__dict__
+        for field, field_hash in zip(FIELDS, field_hashes):
+            if field in values:
+                field_hash.update(repr(values[field]).encode() + b'\0')
+    return {'rolls': rolls.hexdigest(), 'text': text.hexdigest(),
+            'fields': ''.join(field_hash.hexdigest() for field_hash in field_hashes)}
+
+
+def sample(index: int, tables: dict) -> dict:
+    """A character of the corpus in full"""
+    char, taken = build(index, tables)
+    return {'index': index, 'role': char.class_name, 'sex': char.sex, 'seed': derive_seed(GOLDEN_SEED, index),
+            'rolls': taken, 'fields': {field: repr(char.__dict__[field]) for field in FIELDS if field in char.__dict__},
+            'lines': [_digest(line.encode()) for line in str(char).split('\n')]}
+
+
+def _chunks(count: int, workers: int, tables_path) -> list:
+    return list(run_chunks(chunk_digests, count, workers, 0, tables_path, chunk_size=CHUNK_SIZE))
+
+
+def record(count: int = GOLDEN_COUNT, workers: int = 1, path=GOLDEN_PATH, tables_path='data/tables.yaml') -> dict:
+    """
+    Write the corpus of the current generator.
+
+    Args:
+        count (int): number of characters, rounded up to whole chunks
+        workers (int): number of worker processes, 0 for all cores
+        path (str | Path): corpus file
+        tables_path (str): the path to the tables file
+
+    Returns:
+        dict: the corpus
+    """
+    count = -(-count // CHUNK_SIZE) * CHUNK_SIZE
+    tables = load_tables(Path(character_create.__file__).parent.resolve() / tables_path)
+    samples = len(tables['roles']) * len(SEXES)
+    corpus = {'generator': GENERATOR_VERSION, 'seed': GOLDEN_SEED, 'chunk_size': CHUNK_SIZE, 'count': count,
+              'fields': FIELDS, 'samples': [sample(index, tables) for index in range(samples)],
+              'chunks': _chunks(count, workers or None, tables_path)}
+    Path(path).write_text(json.dumps(corpus, ensure_ascii=False, separators=(',', ':')) + '\n')
+    return corpus
+
+
+def _field_change(field: str) -> str:
+    tables = field_tables(field)
+    return f"field '{field}'" + (f" (rolled on {', '.join(tables)})" if tables else '')
+
+
+def _field_digests(chunk: dict, fields: list) -> dict:
+    return {field: chunk['fields'][position * 8:position * 8 + 8] for position, field in enumerate(fields)}
+
+
+def _compare_sample(expected: dict, tables: dict) -> list:
+    found = sample(expected['index'], tables)
+    where = f"sample {expected['index']} ({expected['role']} {expected['sex']}, seed {expected['seed']})"
+    differences = []
+    if found['rolls'] != expected['rolls']:
+        first = next((position for position, (old, new) in enumerate(zip(expected['rolls'], found['rolls']))
+                      if old != new), min(len(expected['rolls']), len(found['rolls'])))
+        differences.append(f"{where}: rolls differ from roll {first}, {len(expected['rolls'])} rolls taken before, "
+                           f"{len(found['rolls'])} now")
+    for field in dict.fromkeys([*expected['fields'], *found['fields']]):
+        old, new = expected['fields'].get(field), found['fields'].get(field)
+        if old != new:
+            differences.append(f'{where}: {_field_change(field)} was {old}, now {new}')
+    if found['lines'] != expected['lines']:
+        text = str(build(expected['index'], tables)[0]).split('\n')
+        for number, (old, new) in enumerate(zip(expected['lines'], found['lines']), 1):
+            if old != new:
+                differences.append(f'{where}: line {number} of the text changed, now {text[number - 1]!r}')
+        if len(found['lines']) != len(expected['lines']):
+            differences.append(f"{where}: the text had {len(expected['lines'])} lines, now {len(found['lines'])}")
+    return differences
+
+
+def verify(count: int = None, workers: int = 1, path=GOLDEN_PATH, tables_path='data/tables.yaml') -> list:
+    """
+    Rebuild the corpus and compare it with the recorded one.
+
+    Args:
+        count (int): check the first count characters only, rounded up to whole chunks, all if not set
+        workers (int): number of worker processes, 0 for all cores
+        path (str | Path): corpus file
+        tables_path (str): the path to the tables file
+
+    Returns:
+        list: differences, one line each: the chunk or sample, the field and its tables, or the rolls or text.
+            Empty if the output is the same
+    """
+    corpus = json.loads(Path(path).read_text())
+    if (corpus['generator'], corpus['seed'], corpus['chunk_size']) != (GENERATOR_VERSION, GOLDEN_SEED, CHUNK_SIZE):
+        return [f"corpus of generator {corpus['generator']}, seed {corpus['seed']} and chunk size "
+                f"{corpus['chunk_size']}, record it again for generator {GENERATOR_VERSION}"]
+    tables = load_tables(Path(character_create.__file__).parent.resolve() / tables_path)
+
+    differences = []
+    for expected in corpus['samples']:
+        differences += _compare_sample(expected, tables)
+
+    count = corpus['count'] if count is None else min(count, corpus['count'])
+    found_chunks = _chunks(count, workers or None, tables_path)
+    for index, (expected, found) in enumerate(zip(corpus['chunks'], found_chunks)):
+        where = f'chunk {index} (characters {index * CHUNK_SIZE}-{index * CHUNK_SIZE + CHUNK_SIZE - 1})'
+        if found['rolls'] != expected['rolls']:
+            differences.append(f'{where}: rolls taken changed')
+        old, new = _field_digests(expected, corpus['fields']), _field_digests(found, FIELDS)
+        for field in dict.fromkeys([*corpus['fields'], *FIELDS]):
+            if old.get(field) != new.get(field):
+                differences.append(f'{where}: {_field_change(field)} changed')
+        if found['text'] != expected['text']:
+            differences.append(f'{where}: text changed')
+    return differences
+
+
+if __name__ == '__main__':
+    import sys
+    from argparse import ArgumentParser
+
+    parse = ArgumentParser(description='Record or verify the golden corpus of generated characters')
+    parse.add_argument('command', choices=['record', 'verify'])
+    parse.add_argument('-c', '--count', default=None, type=int,
+                       help=f'number of characters, {GOLDEN_COUNT} to record and all recorded to verify as default')
+    parse.add_argument('-w', '--workers', default=1, type=int, help='number of worker processes, 0 for all cores')
+    args = parse.parse_args()
+
+    if args.command == 'record':
+        corpus = record(args.count or GOLDEN_COUNT, args.workers)
+        print(f"{corpus['count']} characters recorded to {GOLDEN_PATH}")
+    else:
+        differences = verify(args.count, args.workers)
+        print('\n'.join(differences) or 'Same output as the golden corpus')
+        sys.exit(1 if differences else 0)
@@ -0,0 +1,444 @@
+"""Characters rendered in other languages.
+
+FRAMES below are the sentences of Character.__str__ and, from data/roles.yaml, of the message_role
+of every role, in English. A locale is an overlay file data/locales/<locale>.yaml beside the tables:
+
+    faker: ru_RU                  # Faker locale of the names
+    pronouns:                     # words that depend on the sex of the character
+      male: {appeal: он, appeal_other: его}
+    words: {male: мужчина, North American: Северная Америка}    # values that are not table rows
+    tables:                       # translated rows, numbered as in tables.yaml
+      Hairstyle: {1: Ирокез}
+      Rockerboy Leave: {1: {male: Он был ..., female: Она была ...}}    # a variant per sex
+    frames: {character: ...}      # frames with the keys of FRAMES
+
+Rows, words and frames missing from the overlay stay English. A frame is a format string over
+the fields of the character, or a list of them and of conditions:
+{'if': field, 'then': frame, 'else': frame}, also with 'startswith': text.
+Fields take operations after '|', applied in order:
+    person      row about 'you' told about the character (third_person), rows of a locale are written so
+    lower       first letter in lower case
+    lower_all   all letters in lower case
+    capitalize  str.capitalize
+    noarticle   without a leading 'A '
+    nostop      without a trailing '.'
+    dice        row of a table with dice, e.g. Enemy throw, translated with its rolled numbers
+
+Overlays are read on first use, then frames and row translations are compiled once per locale and
+tables, so a localized render only adds a dictionary lookup per value. CachedText keeps the text of
+a character per piece of its frame, to render again only what a re-roll changed (reroll.py).
+"""
+import itertools
+import re
+from pathlib import Path
+
+import name_pool
+import roles
+import templates
+
+LOCALES_DIR = Path(__file__).parent.resolve() / 'data' / 'locales'
+
+PRONOUNS = {
+    'male': {'appeal': 'he', 'appeal_other': 'his', 'object': 'him'},
+    'female': {'appeal': 'she', 'appeal_other': 'her', 'object': 'her'},
+}
+
+FRAMES = {
+    'character': [
+        'Name: {name} ({sex})\n'
+        'Role: {class_name}. {character_type}\n'
+        '{message_role}'
+        'Person:\n'
+        '{appeal|capitalize} is from {cultural_region} region. Speaks {language}.\n'
+        '{appeal|capitalize} is {personality|lower}.\n'
+        '{appeal|capitalize} is wearing {clothing_style}.\n'
+        '{appeal_other|capitalize} hairstyle is {hairstyle|lower}. {appeal_other} affectation is {affectation|lower}.\n'
+        '{appeal|capitalize} is value {motivation|person|lower} the most. '
+        '{appeal} feels about others "{relationships}".\n'
+        '{most_valued_person|person} is {appeal_other|lower} most valued person.\n'
+        '{appeal_other|capitalize} {most_valued_possession|noarticle} is most valued possession.\n'
+        'Family:\n'
+        '{appeal|capitalize} is from {family} family.\n'
+        '"{family_story}"\n'
+        '{appeal|capitalize} where spend {appeal_other|lower} childhood {childhood_environment|lower}\n'
+        'But {family_crisis|person|lower}\n'
+        'Life goals: {life_goals|person}\n'
+        'Friends:\n{friends}\n'
+        'Enemies:\n{enemies}\n'
+        'Love affairs:\n{love}'],
+    'friend': '{name}. {relationship}',
+    'enemy': '{name} ({sex}) ({enemy_type}) {wrong} Can throw {throw|dice|lower} If meet: {meet}',
+    'love': '{name} ({sex}). {happend}',
+}
+FRAMES.update({name.lower(): role.frame for name, role in roles.ROLES.items()})
+
+# Kinds of people to the frame of one of them
+PEOPLE = {'friends': 'friend', 'enemies': 'enemy', 'love': 'love'}
+
+# Values of the character frame that are not fields as they are, to the fields they are computed from,
+# see Locale.value. message_role is computed from the fields of the role, last
+DERIVED_VALUES = {
+    'name': ('name', 'cultural_region'),
+    'family': ('family_background',),
+    'family_story': ('family_background',),
+    'friends': ('friends', 'cultural_region'),
+    'enemies': ('enemies', 'cultural_region'),
+    'love': ('love', 'cultural_region'),
+    'message_role': (),
+}
+
+FIELD = re.compile(r'\{(\w+)((?:\|\w+)*)\}')
+
+OPERATIONS = {
+    'lower': lambda text: text[:1].lower() + text[1:],
+    'lower_all': str.lower,
+    'capitalize': str.capitalize,
+    'noarticle': lambda text: text[2:] if text.startswith('A ') else text,
+    'nostop': lambda text: text[:-1] if text.endswith('.') else text,
+}
+
+# Locales compiled in this process, keyed by locale and id of the tables
+_compiled = {}
+
+
+class Frame(object):
+    """Frame split into literal parts and fields, conditions are frames of their own"""
+    __slots__ = ('pieces',)
+
+    def __init__(self, frame, locale) -> None:
+        """
+        Args:
+            frame (str | list): frame, see the module docstring
+            locale (Locale): locale the frame is rendered in, fields named after its pronouns read them
+        """
+        self.pieces = []
+        for piece in frame if isinstance(frame, (list, tuple)) else [frame]:
+            if isinstance(piece, dict):
+                self.pieces.append((piece['if'], piece.get('startswith'),
+                                    Frame(piece.get('then', ''), locale), Frame(piece.get('else', ''), locale)))
+                continue
+            parts = FIELD.split(piece)
+            for position in range(0, len(parts), 3):
+                if parts[position]:
+                    self.pieces.append(parts[position])
+                if position + 1 < len(parts):
+                    field = parts[position + 1]
+                    operations = tuple(parts[position + 2].split('|')[1:])
+                    for operation in operations:
+                        if operation not in OPERATIONS and operation not in ('person', 'dice'):
+                            raise ValueError(f"No operation '{operation}' in frame '{piece}'")
+                    self.pieces.append((field, locale.converter(operations), field in locale.pronouns['male']))
+
+    def render(self, values: dict, locale, sex: str) -> str:
+        """
+        Args:
+            values (dict): fields of the character
+            locale (Locale): locale the frame was compiled for
+            sex (str): sex of the character
+
+        Returns:
+            str: the frame with the fields converted
+        """
+        return ''.join(self.render_pieces(values, locale, sex))
+
+    def render_pieces(self, values: dict, locale, sex: str, pieces: list = None) -> list:
+        """Text of every piece, or of the given pieces of this frame only, see render"""
+        pronouns = locale.pronouns[sex]
+        rendered = []
+        for piece in self.pieces if pieces is None else pieces:
+            if piece.__class__ is str:
+                rendered.append(piece)
+            elif len(piece) == 3:
+                field, convert, pronoun = piece
+                value = pronouns[field] if pronoun else values[field]
+                if convert is not None:
+                    value = convert(value, sex)
+                elif value.__class__ is not str:
+                    value = str(value)
+                rendered.append(value)
+            else:
+                field, prefix, then, otherwise = piece
+                value = values[field]
+                holds = value and (prefix is None or value.startswith(prefix))
+                rendered.append((then if holds else otherwise).render(values, locale, sex))
+        return rendered
+
+    @staticmethod
+    def reads(piece) -> set:
+        """Values a piece is rendered from, pronouns included"""
+        if piece.__class__ is str:
+            return set()
+        if len(piece) == 3:
+            return {piece[0]}
+        return {piece[0]}.union(*(Frame.reads(part) for frame in piece[2:] for part in frame.pieces))
+
+
+def _variants(row) -> tuple:
+    """Male and female text of a translated row"""
+    if isinstance(row, dict):
+        return (row['male'], row['female'])
+    return (row, row)
+
+
+def _choices(row: str) -> list:
+    """Texts a row with 'a/b' words can give, in the order of a word step of roles.py"""
+    words = [word.split('/') if '/' in word else [word] for word in row.split(' ')]
+    return [' '.join(choice) for choice in itertools.product(*words)]
+
+
+class Locale(object):
+    """Frames and row translations of one locale, compiled for one set of tables"""
+
+    def __init__(self, locale: str, tables: dict, overlay: dict = None) -> None:
+        overlay = overlay or {}
+        self.locale = locale
+        self.templates = templates.load_templates(tables)
+        self.faker = overlay.get('faker')
+        self.pronouns = {sex: {**words, **(overlay.get('pronouns') or {}).get(sex, {})}
+                         for sex, words in PRONOUNS.items()}
+
+        self.text = {word: _variants(translation) for word, translation in (overlay.get('words') or {}).items()}
+        self.dice = []
+        for table_name, rows in (overlay.get('tables') or {}).items():
+            if table_name not in tables:
+                raise ValueError(f"Locale '{locale}': no table '{table_name}'")
+            english_rows = tables[table_name]
+            numbered = rows.items() if isinstance(rows, dict) else enumerate(rows, 1)
+            for number, row in numbered:
+                self._add(english_rows[number - 1], row)
+
+        self.frames = {key: Frame(frame, self) for key, frame in {**FRAMES, **(overlay.get('frames') or {})}.items()}
+
+    def _add(self, english, row) -> None:
+        if isinstance(english, tuple): # Family Background: kind and story
+            for english_part, part in zip(english, row):
+                self._add(english_part, part)
+            return
+
+        variants = _variants(row)
+        self.text[english] = variants
+        if templates.DICE.search(english):
+            pattern = re.compile(''.join(r'(\d+)' if position % 2 else re.escape(part)
+                                         for position, part in enumerate(templates.DICE.split(english))))
+            self.dice.append((pattern, tuple(templates.DICE.split(variant) for variant in variants)))
+        if '/' in english:
+            for split in (lambda text: text.split('/'), _choices):
+                parts = list(zip(*(split(variant) for variant in variants)))
+                if len(parts) == len(split(english)):
+                    self.text.update(zip(split(english), parts))
+
+    def converter(self, operations: tuple):
+        """
+        Function converting the values of a field, compiled once per field of a frame.
+        Without translations it applies the operations only, 'person' as the templates of the tables.
+
+        Args:
+            operations (tuple): operation names of the field
+
+        Returns:
+            Callable: function of the value and the sex, None for values used as they are
+        """
+        if self.text or 'dice' in operations:
+            return lambda value, sex: self.convert(value, operations, sex)
+        if not operations:
+            return None
+
+        functions = tuple(OPERATIONS.get(operation) for operation in operations)
+        person = self.templates.person
+        if operations == ('person',):
+            return person
+        if len(operations) == 1:
+            return lambda value, sex: functions[0](value if value.__class__ is str else str(value))
+        if operations[0] == 'person' and len(operations) == 2:
+            return lambda value, sex: functions[1](person(value, sex))
+
+        def convert(value, sex):
+            if value.__class__ is not str:
+                value = str(value)
+            for function in functions:
+                value = person(value, sex) if function is None else function(value)
+            return value
+        return convert
+
+    def convert(self, value, operations: tuple, sex: str) -> str:
+        """Translate a value of the character and apply the operations of its field"""
+        if value.__class__ is not str:
+            value = str(value)
+        variants = self.text.get(value)
+        translated = variants is not None
+        if translated:
+            value = variants[sex == 'female']
+
+        for operation in operations:
+            if operation == 'person':
+                if not translated:
+                    value = self.templates.person(value, sex)
+            elif operation == 'dice':
+                if not translated:
+                    value, translated = self._dice(value, sex)
+            else:
+                value = OPERATIONS[operation](value)
+        return value
+
+    def _dice(self, value: str, sex: str) -> tuple:
+        """Row of a dice table after the roll, translated with the same numbers"""
+        for pattern, variants in self.dice:
+            match = pattern.fullmatch(value)
+            if match:
+                parts = variants[sex == 'female']
+                numbers = match.groups()
+                return ''.join(part if position % 2 == 0 else numbers[position // 2]
+                               for position, part in enumerate(parts)), True
+        return value, False
+
+    def name(self, name: str, region: str, sex: str) -> str:
+        """The name from the name pool of the Faker locale, at the same place as in the English pool"""
+        if not self.faker or region is None:
+            return name
+        position = name_pool.load_pool().index_of(region, sex, name)
+        if position is None: # given by the user
+            return name
+        return name_pool.load_pool(locale=self.faker).name(region, sex, position)
+
+    def people(self, people: list, kind: str, region: str, sex: str) -> str:
+        """Friends, enemies or lovers, as the list they are printed as in English"""
+        frame = self.frames[kind]
+        rendered = []
+        for person in people or ():
+            values = {slot: getattr(person, slot) for slot in person.__slots__}
+            values['name'] = self.name(person.name, region, person.sex)
+            rendered.append(frame.render(values, self, sex))
+        return '[' + ', '.join(rendered) + ']'
+
+    def value(self, char, name: str, values: dict):
+        """
+        Value of the character frame, see DERIVED_VALUES. message_role is rendered from the other values.
+
+        Args:
+            char (Character): generated character
+            name (str): name of the value
+            values (dict): the other values, see values
+
+        Returns:
+            the value
+        """
+        if name == 'name':
+            return self.name(char.name, char.cultural_region, char.sex)
+        if name in ('family', 'family_story'):
+            return char.family_background[name == 'family_story']
+        if name in PEOPLE:
+            return self.people(char.__dict__[name], PEOPLE[name], char.cultural_region, char.sex)
+        if name == 'message_role':
+            if self.locale in (None, 'en'): # told with the same frame by Character.render_role
+                return char.message_role
+            return self.frames[char.role_spec.name.lower()].render(values, self, char.sex)
+        return char.__dict__[name]
+
+    def values(self, char) -> dict:
+        """Values the frames of a character read: its fields, with those of DERIVED_VALUES computed"""
+        values = dict(char.__dict__)
+        for name in DERIVED_VALUES:
+            values[name] = self.value(char, name, values)
+        return values
+
+    def render(self, char) -> str:
+        """
+        Args:
+            char (Character): generated character
+
+        Returns:
+            str: the character in this locale, as str(char) in English
+        """
+        return self.frames['character'].render(self.values(char), self, char.sex)
+
+
+class CachedText(object):
+    """
+    Text of a character kept per piece of the character frame. After fields of the character change,
+    e.g. by reroll.reroll, update renders only the pieces that read them.
+    """
+
+    def __init__(self, char, locale: str = None) -> None:
+        """
+        Args:
+            char (Character): generated character
+            locale (str): see load_locale
+        """
+        self.locale = load_locale(locale, char.tables)
+        self.frame = self.locale.frames['character']
+        self.values = self.locale.values(char)
+        self.parts = self.frame.render_pieces(self.values, self.locale, char.sex)
+        self.text = ''.join(self.parts)
+
+        # Value name to the positions of the pieces reading it
+        self.readers = {}
+        for position, piece in enumerate(self.frame.pieces):
+            for name in Frame.reads(piece):
+                self.readers.setdefault(name, []).append(position)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def update(self, char, fields) -> str:
+        """
+        Args:
+            char (Character): the character of the text, after its fields changed
+            fields (Iterable): names of the changed fields
+
+        Returns:
+            str: the new text
+        """
+        fields = set(fields)
+        names = fields | {name for name, reads in DERIVED_VALUES.items() if not fields.isdisjoint(reads)}
+        if not fields.isdisjoint(name for name, _ in char.role_spec.fields):
+            names.add('message_role')
+
+        values = self.values
+        for name in fields - set(DERIVED_VALUES):
+            values[name] = char.__dict__[name]
+        for name in DERIVED_VALUES: # message_role last, it reads the others
+            if name in names:
+                values[name] = self.locale.value(char, name, values)
+
+        positions = sorted({position for name in names for position in self.readers.get(name, ())})
+        rendered = self.frame.render_pieces(values, self.locale, char.sex, [self.frame.pieces[position]
+                                                                            for position in positions])
+        for position, text in zip(positions, rendered):
+            self.parts[position] = text
+        self.text = ''.join(self.parts)
+        return self.text
+
+
+def available() -> list:
+    """Locales with an overlay file"""
+    return sorted(path.stem for path in LOCALES_DIR.glob('*.yaml'))
+
+
+def load_locale(locale: str, tables: dict) -> Locale:
+    """
+    Args:
+        locale (str): name of an overlay in LOCALES_DIR, e.g. 'ru', None or 'en' for English
+        tables (dict): compiled tables, see table_store.load_tables
+
+    Returns:
+        Locale: the locale compiled for the tables, on first use
+    """
+    compiled = _compiled.get((locale, id(tables)))
+    if compiled is not None and compiled[0] is tables:
+        return compiled[1]
+
+    overlay = None
+    if locale not in (None, 'en'):
+        path = LOCALES_DIR / f'{locale}.yaml'
+        if not path.is_file():
+            raise ValueError(f"No locale '{locale}'. Choose from {['en'] + available()}")
+        import yaml
+        overlay = yaml.safe_load(path.read_text(encoding='utf-8'))
+
+    compiled = _compiled[(locale, id(tables))] = (tables, Locale(locale, tables, overlay))
+    return compiled[1]
+
+
+def render(char, locale: str = None) -> str:
+    """Text of the character in the locale, picklable with functools.partial for workers"""
+    return load_locale(locale, char.tables).render(char)
@@ -0,0 +1,265 @@
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Iterator
+
+import dice_engine
+
+# Bump when the pool layout or the way names are built changes
+POOL_VERSION = 2
+
+# Faker of every region, sex and locale is seeded from this, so a build gives the same names
+# on every machine with the same Faker version
+POOL_SEED = 2020
+
+# Names per region and sex. 2520 is divisible by every die size, so batch.py can pick
+# a name with raw roll % POOL_SIZE without skewing the choice
+POOL_SIZE = 2520
+
+MAGIC = b'CPNP'
+HEADER = struct.Struct('<4sII') # magic, version, length of the json index
+OFFSET = struct.Struct('<I')
+
+DEFAULT_PATH = Path(__file__).parent.resolve() / 'data' / '__pycache__' / 'names.pool'
+
+SEXES = ('male', 'female')
+
+# Cultural regions as returned by Character.cultural_origins() and the Faker locales
+# their names are taken from. Locales are chosen for names that read well in Latin script,
+# names in other scripts are transliterated
+REGION_LOCALES = {
+    'North American': ('en_US', 'fr_CA'),
+    'South American': ('es_CO', 'pt_BR'),
+    'Central American': ('es_MX',),
+    'Western European': ('en_GB', 'de_DE', 'fr_FR', 'it_IT', 'nl_NL', 'es_ES', 'pt_PT', 'no_NO'),
+    'Eastern European': ('pl_PL', 'cs_CZ', 'ro_RO', 'hu_HU', 'ru_RU', 'uk_UA'),
+    'Middle Eastern': ('tr_TR',),
+    'North African': ('tr_TR', 'fr_FR'),
+    'Sub-Saharan African': ('tw_GH',),
+    'South Asian': ('en_IN',),
+    'South East Asian': ('id_ID', 'en_TH'),
+    'East Asian': ('ja_JP', 'zh_CN', 'ko_KR'),
+    'Oceania': ('en_NZ',),
+    'Pacific Islander': ('en_NZ',),
+}
+
+
+def regions(locale: str = None) -> dict:
+    """Faker locales of every region: REGION_LOCALES, or the one locale for all of them"""
+    if locale is None:
+        return REGION_LOCALES
+    return {region: (locale,) for region in REGION_LOCALES}
+
+
+def pool_path(locale: str = None) -> Path:
+    """File of the default pool, or of the pool with names of one Faker locale, see locales.py"""
+    return DEFAULT_PATH if locale is None else DEFAULT_PATH.with_name(f'names.{locale}.pool')
+
+
+# Pools opened by this process, keyed by path
+_opened = {}
+
+
+def _call_first(fake, methods):
+    for method in methods:
+        if hasattr(fake, method):
+            return getattr(fake, method)()
+
+
+def _fake_name(fake, sex: str, latin: bool = True) -> str:
+    """
+    Build one name with the given Faker locale, without prefixes and suffixes like 'Dr.'
+    Names are in Latin script if latin is set, in the script of the locale otherwise.
+    """
+    from text_unidecode import unidecode
+
+    first_methods = (f'first_romanized_name_{sex}', f'first_name_{sex}')
+    last_methods = ('last_romanized_name', f'last_name_{sex}', 'last_name')
+    if not latin:
+        first_methods, last_methods = first_methods[1:], last_methods[1:]
+    first = _call_first(fake, first_methods)
+    last = _call_first(fake, last_methods)
+
+    parts = []
+    for part in (first, last):
+        if latin and any(ord(char) > 0x24f for char in part): # not a Latin script
+            part = unidecode(part).strip().title()
+        parts.append(part)
+
+    return ' '.join(parts)
+
+
+def _faker_version() -> str:
+    from importlib.metadata import version
+    return version('Faker')
+
+
+def _locale_seed(region: str, sex: str, locale: str) -> int:
+    from hashlib import blake2b
+    digest = blake2b(f'{POOL_SEED}:{region}/{sex}/{locale}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def build_pool(path: Path = DEFAULT_PATH, size: int = POOL_SIZE, locale: str = None) -> None:
+    """
+    Generate name pools with Faker and write them to a file that can be memory-mapped.
+    File layout: header, json index, offsets of every name (uint32), utf-8 names.
+    Every region, sex and locale has its own Faker seeded from POOL_SEED,
+    so the file is the same for the same seed and Faker version.
+
+    Args:
+        path (Path): file to write
+        size (int): number of names per region and sex
+        locale (str): Faker locale of all the names, in its own script. Names of the locales
+            of each region in Latin script if not set
+    """
+    from faker import Faker
+
+    latin = locale is None
+    names = []
+    pools = {}
+    for region, locales in regions(locale).items():
+        for sex in SEXES:
+            pools[f'{region}/{sex}'] = [len(names), size]
+            fakers = {}
+            for i in range(size):
+                faker_locale = locales[i % len(locales)]
+                if faker_locale not in fakers:
+                    fakers[faker_locale] = Faker(faker_locale)
+                    fakers[faker_locale].seed_instance(_locale_seed(region, sex, faker_locale))
+                names.append(_fake_name(fakers[faker_locale], sex, latin).encode())
+
+    index = json.dumps({'size': size, 'seed': POOL_SEED, 'faker': _faker_version(), 'regions': regions(locale),
+                        'pools': pools}).encode()
+
+    offsets = bytearray()
+    position = 0
+    for name in names:
+        offsets += OFFSET.pack(position)
+        position += len(name)
+    offsets += OFFSET.pack(position)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f'{path.name}.{os.getpid()}')
+    with open(temp, 'wb') as fo:
+        fo.write(HEADER.pack(MAGIC, POOL_VERSION, len(index)))
+        fo.write(index)
+        fo.write(offsets)
+        fo.write(b''.join(names))
+    os.replace(temp, path)
+
+
+class NamePool(object):
+    """Read only view of a name pool file. Pages are shared by every process that maps the file"""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, 'rb') as fo:
+            self._map = mmap.mmap(fo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != POOL_VERSION:
+            raise ValueError(f'{path} is not a name pool of version {POOL_VERSION}')
+
+        self.index = json.loads(self._map[HEADER.size:HEADER.size + index_length])
+        self._pools = {tuple(key.split('/', 1)): value for key, value in self.index['pools'].items()}
+        total = sum(count for _, count in self._pools.values())
+        self._offsets = HEADER.size + index_length
+        self._names = self._offsets + (total + 1) * OFFSET.size
+        self._indexes = {}
+
+    def size(self, region: str, sex: str) -> int:
+        return self._pools[(region, sex)][1]
+
+    def name(self, region: str, sex: str, index: int) -> str:
+        """
+        Args:
+            region (str): cultural region
+            sex (str): 'male' or 'female'
+            index (int): index of the name in the pool
+
+        Returns:
+            str: name
+        """
+        first, count = self._pools[(region, sex)]
+        if not 0 <= index < count:
+            raise IndexError(f'name index {index} out of range for {region}/{sex}')
+
+        start, end = struct.unpack_from('<II', self._map, self._offsets + (first + index) * OFFSET.size)
+        return self._map[self._names + start:self._names + end].decode()
+
+    def index_of(self, region: str, sex: str, name: str) -> int:
+        """
+        Index of a name in the pool of the region and sex. The reverse index of a pool
+        is built on first use.
+
+        Returns:
+            int: index of the first occurrence of the name, None if it is not in the pool
+        """
+        index = self._indexes.get((region, sex))
+        if index is None:
+            index = {}
+            for position in reversed(range(self.size(region, sex))):
+                index[self.name(region, sex, position)] = position
+            self._indexes[(region, sex)] = index
+
+        return index.get(name)
+
+    def sample(self, region: str, sex: str, rolls: Iterator = None) -> str:
+        """
+        Pick a random name from the pool of the region and sex.
+
+        Args:
+            region (str): cultural region
+            sex (str): 'male' or 'female'
+            rolls (Iterator): pre-drawn raw rolls (see batch.generate_batch),
+                the shared dice_engine generator is used if not given
+
+        Returns:
+            str: name
+        """
+        count = self._pools[(region, sex)][1]
+        index = dice_engine.rng.randrange(count) if rolls is None else next(rolls) % count
+        return self.name(region, sex, index)
+
+
+def load_pool(path: Path = DEFAULT_PATH, locale: str = None) -> NamePool:
+    """
+    Open the name pool, building it first if it is missing or out of date:
+    built with another size, regions, seed or Faker version.
+
+    Args:
+        path (Path): pool file
+        locale (str): open the pool of names of this Faker locale instead, see build_pool
+
+    Returns:
+        NamePool: opened pool, shared by all callers in this process
+    """
+    if locale is not None:
+        path = pool_path(locale)
+    pool = _opened.get(path) # DEFAULT_PATH is looked up without building a new Path
+    if pool is not None:
+        return pool
+
+    path = Path(path)
+    pool = _opened.get(path)
+    if pool is not None:
+        return pool
+
+    try:
+        pool = NamePool(path)
+        if pool.index['size'] != POOL_SIZE or pool.index['regions'] != {
+                region: list(locales) for region, locales in regions(locale).items()} or \
+                pool.index.get('seed') != POOL_SEED or pool.index.get('faker') != _faker_version():
+            pool = None
+    except (OSError, ValueError):
+        pool = None
+
+    if pool is None:
+        build_pool(path, locale=locale)
+        pool = NamePool(path)
+
+    _opened[path] = pool
+    return pool
@@ -0,0 +1,140 @@
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator
+
+import character_create
+import dice_engine
+import name_pool
+from table_store import load_tables
+
+# Characters are generated in chunks of this size, each from its own seed.
+# It does not depend on the number of workers, so neither does the output
+CHUNK_SIZE = 256
+
+# Chunks submitted ahead of the one being consumed, per worker
+CHUNKS_AHEAD = 2
+
+
+def derive_seed(master_seed: int, index: int) -> int:
+    """
+    Derive a 64 bit seed from the master seed for the chunk with the given index.
+    Stable across runs, processes and Python versions.
+
+    Args:
+        master_seed (int): seed of the whole run
+        index (int): index of the chunk
+
+    Returns:
+        int: seed of the chunk
+    """
+    digest = hashlib.blake2b(f'{master_seed}:{index}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _init_worker(tables_path) -> None:
+    """Load tables and open the name pool once per worker process"""
+    load_tables(Path(character_create.__file__).parent.resolve() / tables_path)
+    name_pool.load_pool()
+
+
+def generate_chunk(master_seed: int, index: int, size: int, name: str = None, role: str = None,
+                   sex: str = None, tables_path='data/tables.yaml', render: Callable = None,
+                   where: dict = None) -> list:
+    """
+    Generate one chunk of characters from the seed derived for it.
+
+    Args:
+        master_seed (int): seed of the whole run
+        index (int): index of the chunk
+        size (int): number of characters in the chunk
+        name, role, sex, tables_path, where: see character_create.main
+        render (Callable): function applied to every character in the worker, e.g. str.
+            Characters are returned without their tables if not set
+
+    Returns:
+        list: generated (and rendered) characters
+    """
+    dice_engine.seed(derive_seed(master_seed, index))
+    chunk = []
+    for _ in range(size):
+        char = character_create.main(name, role, sex, tables_path, where=where)
+        chunk.append(render(char) if render else char)
+
+    return chunk
+
+
+def generate_parallel(count: int, workers: int = None, seed: int = None, name: str = None,
+                      role: str = None, sex: str = None, tables_path='data/tables.yaml',
+                      render: Callable = None, where: dict = None) -> Iterator:
+    """
+    Generate characters with a pool of worker processes and stream them back in order.
+    The output depends only on the seed, not on the number of workers.
+    At most CHUNKS_AHEAD chunks per worker are kept in flight, so memory does not grow with count.
+
+    Args:
+        count (int): number of characters
+        workers (int): number of worker processes, all cores if not set.
+            With one worker characters are generated in this process
+        seed (int): master seed, random if not set
+        name, role, sex, tables_path, where: see character_create.main
+        render (Callable): picklable function applied to every character in the workers, e.g. str
+
+    Yields:
+        generated characters, or their rendered form if render is set
+    """
+    tables = load_tables(Path(character_create.__file__).parent.resolve() / tables_path)
+    chunks = run_chunks(generate_chunk, count, workers, seed, name=name, role=role, sex=sex,
+                        tables_path=tables_path, render=render, where=where)
+    for chunk in chunks:
+        yield from _attach_tables(chunk, tables, render)
+
+
+def run_chunks(task: Callable, count: int, workers: int = None, seed: int = None,
+               tables_path='data/tables.yaml', chunk_size: int = CHUNK_SIZE, **options) -> Iterator:
+    """
+    Run task(seed, index, size, tables_path=tables_path, **options) for every chunk of count characters
+    with a pool of worker processes, at most CHUNKS_AHEAD chunks per worker in flight.
+
+    Args:
+        task (Callable): picklable function of a chunk, e.g. generate_chunk
+        count, workers, seed, tables_path: see generate_parallel
+        chunk_size (int): characters per chunk, the output of generate_chunk depends on it
+        options: more keyword arguments of task
+
+    Yields:
+        the results of task, in chunk order
+    """
+    if seed is None:
+        seed = int.from_bytes(os.urandom(8), 'little')
+    workers = workers or os.cpu_count()
+
+    chunks = ((index, min(chunk_size, count - start))
+              for index, start in enumerate(range(0, count, chunk_size)))
+
+    if workers == 1:
+        for index, size in chunks:
+            yield task(seed, index, size, tables_path=tables_path, **options)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(tables_path,)) as executor:
+        pending = deque()
+        for index, size in chunks:
+            pending.append(executor.submit(task, seed, index, size, tables_path=tables_path, **options))
+            if len(pending) < workers * CHUNKS_AHEAD:
+                continue
+
+            yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def _attach_tables(chunk: list, tables: dict, render: Callable) -> list:
+    """Characters come back from workers without tables, give them the tables of this process"""
+    if render is None:
+        for char in chunk:
+            char.tables = tables
+    return chunk
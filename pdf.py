@@ -0,0 +1,224 @@
+"""PDF books of characters, written with the standard library only.
+
+Pages are written to the file as soon as they are full, so memory does not grow with the
+number of characters: only the object offsets, a few bytes per page, are kept for the
+cross-reference table. All pages share one resources object with the two standard fonts
+(Helvetica, Helvetica-Bold), nothing is embedded and nothing is fetched.
+
+Text is laid out by the character block: the name as a heading, then the lines of
+str(char) (role, message_role and the rest) wrapped to the page width. A block is kept on one
+page when it fits. Blocks can be made by worker processes (render=character_block with
+parallel.generate_parallel), pages are always put together here, so the book is the same for
+any number of workers.
+"""
+import zlib
+from pathlib import Path
+from typing import Iterable
+
+# A4 in points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+
+FONT_SIZE = 10
+HEADING_SIZE = 13
+LEADING = 1.3
+
+FONTS = {'F1': 'Helvetica', 'F2': 'Helvetica-Bold'}
+
+# Helvetica widths of ASCII 32..126 in 1/1000 of the font size, from its AFM.
+# Bold is a little wider, wrapping keeps a margin for it
+WIDTHS = (278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+          556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+          1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+          667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+          333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+          556, 556, 333, 500, 278, 556, 556, 722, 500, 500, 500, 334, 260, 334, 584)
+DEFAULT_WIDTH = 556
+BOLD_FACTOR = 1.08
+
+# Fixed objects: catalog, page tree, fonts, shared resources. Pages start after them
+CATALOG, PAGES, RESOURCES = 1, 2, 3
+FIRST_FREE = 4 + len(FONTS)
+
+
+def text_width(text: str, size: float, bold: bool = False) -> float:
+    width = sum(WIDTHS[ord(char) - 32] if 32 <= ord(char) < 127 else DEFAULT_WIDTH for char in text)
+    return width * size / 1000 * (BOLD_FACTOR if bold else 1)
+
+
+def wrap(text: str, size: float, width: float, bold: bool = False) -> list:
+    """Split a line at spaces into lines not wider than width"""
+    lines = []
+    current = ''
+    for word in text.split(' '):
+        candidate = f'{current} {word}' if current else word
+        if current and text_width(candidate, size, bold) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    lines.append(current)
+    return lines
+
+
+def _pdf_string(text: str) -> bytes:
+    """Literal string in WinAnsiEncoding, letters it has no glyph for are transliterated"""
+    try:
+        data = text.encode('cp1252')
+    except UnicodeEncodeError:
+        from text_unidecode import unidecode
+        data = ''.join(char if char.encode('cp1252', 'ignore') else unidecode(char)
+                       for char in text).encode('cp1252', 'replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def character_block(char) -> tuple:
+    """
+    Lines of one character, ready to be put on pages. Picklable, so workers can make them.
+
+    Returns:
+        tuple: (bold, size, text) lines
+    """
+    width = PAGE_WIDTH - 2 * MARGIN
+    lines = [(True, HEADING_SIZE, line) for line in wrap(f'{char.name} - {char.role.capitalize()} ({char.sex})',
+                                                         HEADING_SIZE, width, True)]
+    for paragraph in str(char).split('\n')[1:]: # the first line is the name, in the heading
+        lines += [(paragraph.endswith(':'), FONT_SIZE, line)
+                  for line in wrap(paragraph, FONT_SIZE, width, paragraph.endswith(':'))]
+    return tuple(lines)
+
+
+class PdfWriter(object):
+    """Writes objects straight to the file, keeping only their offsets"""
+
+    def __init__(self, fo) -> None:
+        self.fo = fo
+        self.offsets = {}
+        self.position = 0
+        self.pages = []
+        self.next_object = FIRST_FREE
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+        fonts = []
+        for number, (name, base_font) in enumerate(FONTS.items(), RESOURCES + 1):
+            self._object(number, f'<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} '
+                                 f'/Encoding /WinAnsiEncoding >>'.encode())
+            fonts.append(f'/{name} {number} 0 R')
+        self._object(RESOURCES, f'<< /Font << {" ".join(fonts)} >> /ProcSet [/PDF /Text] >>'.encode())
+
+    def _write(self, data: bytes) -> None:
+        self.fo.write(data)
+        self.position += len(data)
+
+    def _object(self, number: int, body: bytes) -> None:
+        self.offsets[number] = self.position
+        self._write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+
+    def add_page(self, content: bytes) -> None:
+        """Write a page with the content stream, compressed"""
+        stream, page = self.next_object, self.next_object + 1
+        self.next_object += 2
+        data = zlib.compress(content)
+        self._object(stream, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(data) + data + b'\nendstream')
+        self._object(page, f'<< /Type /Page /Parent {PAGES} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                           f'/Resources {RESOURCES} 0 R /Contents {stream} 0 R >>'.encode())
+        self.pages.append(page)
+
+    def close(self, title: str = None) -> None:
+        kids = ' '.join(f'{page} 0 R' for page in self.pages)
+        self._object(PAGES, f'<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>'.encode())
+        self._object(CATALOG, f'<< /Type /Catalog /Pages {PAGES} 0 R >>'.encode())
+        info = self.next_object
+        self._object(info, b'<< /Title ' + _pdf_string(title or 'Characters') + b' /Producer (cyberpunk) >>')
+
+        xref = self.position
+        lines = [f'xref\n0 {info + 1}\n', '0000000000 65535 f \n']
+        lines += [f'{self.offsets[number]:010d} 00000 n \n' for number in range(1, info + 1)]
+        self._write(''.join(lines).encode())
+        self._write(f'trailer\n<< /Size {info + 1} /Root {CATALOG} 0 R /Info {info} 0 R >>\n'
+                    f'startxref\n{xref}\n%%EOF\n'.encode())
+
+
+class Book(object):
+    """Puts character blocks on pages, a page is written as soon as the next block does not fit"""
+
+    def __init__(self, writer: PdfWriter) -> None:
+        self.writer = writer
+        self.commands = []
+        self.top = PAGE_HEIGHT - MARGIN
+        self.y = self.top
+
+    def _line_height(self, size: float) -> float:
+        return size * LEADING
+
+    def _finish_page(self) -> None:
+        number = len(self.writer.pages) + 1
+        self.commands.append(b'BT /F1 8 Tf %d %d Td ' % (PAGE_WIDTH // 2 - 8, MARGIN // 2) +
+                             _pdf_string(str(number)) + b' Tj ET')
+        self.writer.add_page(b'\n'.join(self.commands))
+        self.commands = []
+        self.y = self.top
+
+    def add(self, block: tuple) -> None:
+        height = sum(self._line_height(size) for _, size, _ in block)
+        if self.y != self.top:
+            if self.y - height - FONT_SIZE < MARGIN:
+                self._finish_page()
+            else: # rule between characters
+                self.y -= FONT_SIZE / 2
+                self.commands.append(b'0.6 G %d %.1f m %d %.1f l S 0 G' % (MARGIN, self.y, PAGE_WIDTH - MARGIN, self.y))
+                self.y -= FONT_SIZE / 2
+
+        for bold, size, text in block:
+            if self.y - self._line_height(size) < MARGIN: # longer than a page
+                self._finish_page()
+            self.y -= self._line_height(size)
+            self.commands.append(b'BT /%s %d Tf %d %.1f Td ' % (b'F2' if bold else b'F1', size, MARGIN, self.y) +
+                                 _pdf_string(text) + b' Tj ET')
+
+    def close(self) -> None:
+        if self.commands or not self.writer.pages:
+            self._finish_page()
+
+
+def write_pdf(blocks: Iterable, out, title: str = None) -> int:
+    """
+    Write a book of characters.
+
+    Args:
+        blocks (Iterable): characters, or their character_block made in workers
+        out (str | Path): pdf file
+        title (str): document title
+
+    Returns:
+        int: number of pages
+    """
+    with open(Path(out), 'wb') as fo:
+        writer = PdfWriter(fo)
+        book = Book(writer)
+        for block in blocks:
+            book.add(block if isinstance(block, tuple) else character_block(block))
+        book.close()
+        writer.close(title)
+    return len(writer.pages)
+
+
+def export_pdf(count: int, out, workers: int = 1, seed: int = None, name: str = None, role: str = None,
+               sex: str = None, tables_path='data/tables.yaml', where: dict = None, title: str = None) -> int:
+    """
+    Generate count characters and write them as a book. With several workers the characters
+    and their blocks are made in worker processes and the pages put together here.
+
+    Args:
+        count (int): number of characters
+        workers (int): worker processes, all cores if None
+        seed, name, role, sex, tables_path, where: see parallel.generate_parallel
+        title (str): document title
+
+    Returns:
+        int: number of pages
+    """
+    from parallel import generate_parallel
+    blocks = generate_parallel(count, workers, seed, name, role, sex, tables_path, render=character_block, where=where)
+    return write_pdf(blocks, out, title)
@@ -0,0 +1,298 @@
+"""Exact probabilities of generated characters, computed from the tables instead of sampled.
+
+Every field of a role is a node with a distribution over its values, conditioned on the
+fields it depends on, made from the steps of the role spec (roles.py): Exec division split,
+Rockerboy in_group / were_in_group / leave, Netrunner, Tech and Medtech alone / partner,
+Fixer partner, Nomad pack_type / pack_do.
+joint() walks only the nodes the asked fields depend on, so results come in milliseconds.
+Probabilities are Fractions.
+
+Fields are the dataclass fields of the roles, plus role and sex. friends, enemies and love
+are their counts. Fields that are not rolled (name, message_role, ...) are not modelled.
+"""
+from fractions import Fraction
+from itertools import product
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import dice_engine
+import roles
+import templates
+from table_store import load_tables
+
+SEXES = ('male', 'female')
+
+
+class Node(NamedTuple):
+    """
+    field: name of the field, hidden rolls start with _
+    parents: fields the distribution depends on
+    distribution: function of the tables and the parent values returning {value: probability}
+    """
+    field: str
+    parents: tuple
+    distribution: Callable
+
+
+def uniform(options) -> dict:
+    """Distribution of choose(options): equal shares, repeated options add up"""
+    result = {}
+    share = Fraction(1, len(options))
+    for option in options:
+        result[option] = result.get(option, 0) + share
+    return result
+
+
+def mix(*weighted) -> dict:
+    """
+    Args:
+        weighted: (probability, distribution) pairs
+
+    Returns:
+        dict: the mixture of the distributions
+    """
+    result = {}
+    for weight, distribution in weighted:
+        for value, probability in distribution.items():
+            result[value] = result.get(value, 0) + weight * probability
+    return result
+
+
+def expression_distribution(expression: str) -> dict:
+    """
+    Exact distribution of a dice expression, e.g. '1d6/2', by trying every face of every die.
+
+    Args:
+        expression (str): dice expression, see dice_engine
+
+    Returns:
+        dict: result to probability
+    """
+    class Branch(Exception):
+        pass
+
+    result = {}
+    pending = [()]
+    while pending:
+        prefix = pending.pop()
+        sides_used = []
+
+        def die(sides):
+            if len(sides_used) == len(prefix):
+                raise Branch(sides)
+            sides_used.append(sides)
+            return prefix[len(sides_used) - 1]
+
+        try:
+            value = dice_engine.roll(expression, die)
+        except Branch as branch:
+            pending.extend(prefix + (face,) for face in range(1, branch.args[0] + 1))
+            continue
+
+        probability = Fraction(1)
+        for sides in sides_used:
+            probability /= sides
+        result[value] = result.get(value, 0) + probability
+
+    return result
+
+
+def _row(table_name: str) -> Callable:
+    return lambda tables: uniform(tables[table_name])
+
+
+def _relationship_count(tables) -> dict:
+    """max(0, 1d10 - 7) of get_friends_enemies_or_love"""
+    return uniform([max(0, roll - 7) for roll in range(1, 11)])
+
+
+BASE_NODES = (
+    Node('_origin', (), lambda tables: uniform(range(len(tables['Cultural Origins'])))),
+    Node('cultural_region', ('_origin',),
+         lambda tables, row: uniform(tables['Cultural Origins'][row]['Cultural Region'].split('/'))),
+    Node('language', ('_origin',), lambda tables, row: uniform(tables['Cultural Origins'][row]['Languages'])),
+) + tuple(Node(attribute, (), _row(attribute.replace('_', ' ').title()))
+          for attribute in ('personality', 'clothing_style', 'hairstyle', 'affectation', 'motivation',
+                            'relationships', 'most_valued_person', 'most_valued_possession',
+                            'family_background', 'childhood_environment', 'family_crisis', 'life_goals')) + (
+    Node('friends', (), _relationship_count),
+    Node('enemies', (), _relationship_count),
+    Node('love', (), _relationship_count),
+)
+
+
+def _split(table_name: str) -> Callable:
+    """Row of the table, a row with 'A/B/C' parts gives one of its parts"""
+    return lambda tables: mix(*((Fraction(1, len(tables[table_name])),
+                                 uniform(row.split('/')) if '/' in row else {row: 1})
+                                for row in tables[table_name]))
+
+
+def _words(table_name: str) -> Callable:
+    """Row of the table with a choice for every 'A/B' word"""
+    def distribution(tables):
+        rows = tables[table_name]
+        return mix(*((Fraction(1, len(rows)),
+                      uniform([' '.join(choice) for choice in
+                               product(*(word.split('/') if '/' in word else [word] for word in row.split(' ')))]))
+                     for row in rows))
+    return distribution
+
+
+def _row_by(tables_by_value: dict) -> Callable:
+    return lambda tables, value: uniform(tables[tables_by_value[value]])
+
+
+# Distribution of the field of every kind of step of roles.py
+STEP_DISTRIBUTIONS = {
+    'row': _row,
+    'split': _split,
+    'word': _words,
+    'flag': _row,
+    'choice': lambda options: lambda tables: uniform(options),
+}
+
+
+def _when(when: tuple, distribution: Callable) -> Callable:
+    """The distribution when the parent has the value, None otherwise"""
+    return lambda tables, value, *parents: distribution(tables, *parents) if value == when[1] else {None: 1}
+
+
+def _role_nodes(role) -> tuple:
+    """
+    Nodes of the fields of a role spec: the steps, a hidden coin before a flag step,
+    and the fields that are not rolled with their default.
+    """
+    nodes = [Node(field, (), lambda tables, default=default: {default: 1})
+             for field, default in role.fields if field not in {step[0] for step in role.steps}]
+    for field, kind, source, when in role.steps:
+        parents = ()
+        if kind == 'row_by':
+            parents, distribution = (source[0],), _row_by(source[1])
+        else:
+            distribution = STEP_DISTRIBUTIONS[kind](source)
+        if kind == 'flag':
+            nodes.append(Node(f'_has_{field}', (), lambda tables: uniform((0, 1))))
+            when = (f'_has_{field}', 1)
+        if when is not None:
+            parents, distribution = (when[0],) + parents, _when(when, distribution)
+        nodes.append(Node(field, parents, distribution))
+    return tuple(nodes)
+
+
+ROLE_NODES = {name: _role_nodes(role) for name, role in roles.ROLES.items()}
+
+
+def fields(role: str) -> list:
+    """Fields of the role that joint() can be asked about"""
+    return ['role', 'sex'] + [node.field for node in BASE_NODES + ROLE_NODES[role.capitalize()]
+                              if not node.field.startswith('_')]
+
+
+def _role_joint(tables: dict, role: str, asked: tuple, sex: str = None) -> dict:
+    nodes = {node.field: node for node in BASE_NODES + ROLE_NODES[role]}
+    nodes['role'] = Node('role', (), lambda tables: {role.lower(): 1})
+    nodes['sex'] = Node('sex', (), lambda tables: {sex: 1} if sex else uniform(SEXES))
+    for field in asked:
+        if field not in nodes:
+            raise ValueError(f"No field '{field}' for role {role}. Choose from {fields(role)}")
+
+    # the asked fields and everything they depend on, in generation order
+    needed = set()
+    stack = list(asked)
+    while stack:
+        field = stack.pop()
+        if field not in needed:
+            needed.add(field)
+            stack.extend(nodes[field].parents)
+    order = [field for field in nodes if field in needed]
+    position = {field: index for index, field in enumerate(order)}
+
+    states = {(): Fraction(1)}
+    for field in order:
+        node = nodes[field]
+        walked = {}
+        for state, probability in states.items():
+            distribution = node.distribution(tables, *(state[position[parent]] for parent in node.parents))
+            for value, share in distribution.items():
+                walked[state + (value,)] = walked.get(state + (value,), 0) + probability * share
+        states = walked
+
+    result = {}
+    for state, probability in states.items():
+        outcome = tuple(state[position[field]] for field in asked)
+        result[outcome] = result.get(outcome, 0) + probability
+    return result
+
+
+def joint(asked, role: str = None, sex: str = None, tables_path='data/tables.yaml') -> dict:
+    """
+    Exact joint distribution of fields of a character made by character_create.main.
+
+    Args:
+        asked (Sequence[str]): field names, see fields()
+        role (str): role of the character, random like main if not set. Fields must then exist for every role
+        sex (str): sex of the character, random if not set
+        tables_path (str | Path): the path to the tables file
+
+    Returns:
+        dict: tuple of values of the fields to probability
+    """
+    tables = load_tables(Path(__file__).parent.resolve() / tables_path)
+    roles = [role.capitalize()] if role else list(tables['roles'])
+    return mix(*((Fraction(1, len(roles)), _role_joint(tables, name, tuple(asked), sex)) for name in roles))
+
+
+def marginal(field: str, role: str = None, sex: str = None, tables_path='data/tables.yaml') -> dict:
+    """
+    Returns:
+        dict: value of the field to probability, see joint
+    """
+    return {outcome[0]: probability for outcome, probability in joint((field,), role, sex, tables_path).items()}
+
+
+def probability(role: str = None, sex: str = None, tables_path='data/tables.yaml', **values) -> Fraction:
+    """
+    Probability that a character has all the given field values,
+    e.g. probability('nomad', pack_type='sea', pack_philosophy='...').
+    """
+    outcome = tuple(values.values())
+    return joint(tuple(values), role, sex, tables_path).get(outcome, Fraction(0))
+
+
+def person_marginal(kind: str, field: str, tables_path='data/tables.yaml') -> dict:
+    """
+    Distribution of a field of one friend, enemy or lover, e.g. ('Enemy', 'throw')
+    with the dice of the throw rows rolled out.
+
+    Args:
+        kind (str): Friend, Enemy or Love
+        field (str): attribute of the person: relationship, sex, enemy_type, wrong, throw, meet, happend
+
+    Returns:
+        dict: value to probability
+    """
+    tables = load_tables(Path(__file__).parent.resolve() / tables_path)
+    table_names = {('Friend', 'relationship'): 'Friend', ('Enemy', 'enemy_type'): 'Enemy type',
+                   ('Enemy', 'wrong'): 'Enemy wrong', ('Enemy', 'meet'): 'Enemy meet',
+                   ('Love', 'happend'): 'Love happened'}
+    if field == 'sex':
+        return uniform(SEXES)
+    if (kind, field) in table_names:
+        return uniform(tables[table_names[(kind, field)]])
+    if (kind, field) != ('Enemy', 'throw'):
+        raise ValueError(f"No field '{field}' for {kind}")
+
+    rows = []
+    for template in templates.load_templates(tables).dice['Enemy throw']:
+        distributions = [expression_distribution(expression) for expression in template.expressions]
+        throws = {}
+        for numbers in product(*(distribution.items() for distribution in distributions)):
+            share = Fraction(1)
+            for _, number_probability in numbers:
+                share *= number_probability
+            rolled = iter(number for number, _ in numbers)
+            text = template.render(lambda expression: next(rolled))
+            throws[text] = throws.get(text, 0) + share
+        rows.append((Fraction(1, len(tables['Enemy throw'])), throws))
+    return mix(*rows)
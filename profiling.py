@@ -0,0 +1,226 @@
+"""Opt-in instrumentation of character generation.
+
+Enabled with the CYBERPUNK_PROFILE environment variable (table or json) or the --profile flag
+of character_create.py. Functions of character_create are wrapped with timers counting calls
+and time per stage and role class; nothing is wrapped, and nothing costs, while it is off.
+The summary is printed to stderr at exit.
+
+Stages:
+    dice            roll_die, roll_expression, choose
+    table lookup    roll_role, random_attributes, cultural_origins
+    naming          generate_name
+    relationships   get_friends_enemies_or_love
+    rendering       __str__, render_role, person
+    other           the rest of __post_init__
+
+Times are self times: time spent in a nested stage, e.g. the dice rolled by roll_role,
+is counted for that stage only.
+
+Metrics systems can read snapshot() at any time, or add_hook(hook) to get every timed call
+as hook(role, stage, seconds).
+"""
+import atexit
+import sys
+from time import perf_counter_ns
+from types import ModuleType
+from typing import Callable
+
+ENV_VAR = 'CYBERPUNK_PROFILE'
+
+OUTPUTS = ('table', 'json')
+
+FUNCTIONS = {
+    'roll_die': 'dice',
+    'roll_expression': 'dice',
+    'choose': 'dice',
+    'generate_name': 'naming',
+}
+
+METHODS = {
+    'roll_role': 'table lookup',
+    'random_attributes': 'table lookup',
+    'cultural_origins': 'table lookup',
+    'get_friends_enemies_or_love': 'relationships',
+    '__str__': 'rendering',
+    'render_role': 'rendering',
+    'person': 'rendering',
+    '__post_init__': 'other',
+}
+
+# Role of the character being generated, for stages outside its methods
+NO_ROLE = '-'
+
+# (role, stage) to [calls, nanoseconds]
+_stats = {}
+
+# Time spent in nested timed calls, one entry per timed call in progress
+_children = []
+
+_roles = [NO_ROLE]
+
+_hooks = []
+
+# Original functions of instrumented modules, to restore them on disable
+_originals = {}
+
+_output = None
+
+
+def _record(role: str, stage: str, elapsed: int) -> None:
+    entry = _stats.get((role, stage))
+    if entry is None:
+        entry = _stats[(role, stage)] = [0, 0]
+    entry[0] += 1
+    entry[1] += elapsed
+    for hook in _hooks:
+        hook(role, stage, elapsed / 1e9)
+
+
+def _timed(function: Callable, stage: str) -> Callable:
+    def timed(*args, **kwargs):
+        _children.append(0)
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = perf_counter_ns() - start
+            own = elapsed - _children.pop()
+            if _children:
+                _children[-1] += elapsed
+            _record(_roles[-1], stage, own)
+
+    timed.__wrapped__ = function
+    return timed
+
+
+def _timed_method(function: Callable, stage: str) -> Callable:
+    """Like _timed, calls inside the method are counted for the role of self"""
+    def timed(self, *args, **kwargs):
+        _roles.append(type(self).__name__)
+        _children.append(0)
+        start = perf_counter_ns()
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            elapsed = perf_counter_ns() - start
+            own = elapsed - _children.pop()
+            if _children:
+                _children[-1] += elapsed
+            _record(_roles.pop(), stage, own)
+
+    timed.__wrapped__ = function
+    return timed
+
+
+def _classes(base: type) -> list:
+    classes = [base]
+    for subclass in base.__subclasses__():
+        classes.extend(_classes(subclass))
+    return classes
+
+
+def instrument(module: ModuleType) -> None:
+    """
+    Wrap the functions of a character_create module with timers. Calling it again does nothing.
+
+    Args:
+        module (ModuleType): character_create, or __main__ when it is run as a script
+    """
+    if module.__name__ in _originals:
+        return
+
+    originals = _originals[module.__name__] = []
+    for name, stage in FUNCTIONS.items():
+        originals.append((module, name, getattr(module, name)))
+        setattr(module, name, _timed(getattr(module, name), stage))
+
+    for cls in _classes(module.Character):
+        for name, stage in METHODS.items():
+            if name in cls.__dict__:
+                originals.append((cls, name, cls.__dict__[name]))
+                setattr(cls, name, _timed_method(cls.__dict__[name], stage))
+
+
+def enable(output: str = 'table', module: ModuleType = None) -> None:
+    """
+    Start collecting and print the summary at exit.
+
+    Args:
+        output (str): one of OUTPUTS, format of the summary
+        module (ModuleType): module to instrument, character_create if not set
+    """
+    global _output
+    if module is None:
+        import character_create as module
+
+    if _output is None:
+        atexit.register(_report_at_exit)
+    _output = output if output in OUTPUTS else 'table'
+    instrument(module)
+
+
+def disable() -> None:
+    """Restore the original functions and stop printing the summary at exit"""
+    global _output
+    for originals in _originals.values():
+        for owner, name, original in originals:
+            setattr(owner, name, original)
+    _originals.clear()
+    if _output is not None:
+        atexit.unregister(_report_at_exit)
+    _output = None
+
+
+def add_hook(hook: Callable) -> None:
+    """
+    Args:
+        hook (Callable): called as hook(role, stage, seconds) for every timed call
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable) -> None:
+    _hooks.remove(hook)
+
+
+def reset() -> None:
+    _stats.clear()
+
+
+def snapshot() -> dict:
+    """
+    Returns:
+        dict: role to stage to {'calls': int, 'seconds': float}
+    """
+    result = {}
+    for (role, stage), (calls, elapsed) in sorted(_stats.items()):
+        result.setdefault(role, {})[stage] = {'calls': calls, 'seconds': elapsed / 1e9}
+    return result
+
+
+def summary_table() -> str:
+    """Stages of every role with calls, total and mean time, and the totals per stage"""
+    totals = {}
+    lines = [f'{"role":<12}{"stage":<16}{"calls":>10}{"total, ms":>12}{"per call, us":>14}']
+    for role, stages in snapshot().items():
+        for stage, entry in stages.items():
+            total = totals.setdefault(stage, {'calls': 0, 'seconds': 0.0})
+            total['calls'] += entry['calls']
+            total['seconds'] += entry['seconds']
+            lines.append(f'{role:<12}{stage:<16}{entry["calls"]:>10}{entry["seconds"] * 1e3:>12.2f}'
+                         f'{entry["seconds"] / entry["calls"] * 1e6:>14.2f}')
+
+    for stage, entry in sorted(totals.items(), key=lambda item: -item[1]['seconds']):
+        lines.append(f'{"all":<12}{stage:<16}{entry["calls"]:>10}{entry["seconds"] * 1e3:>12.2f}'
+                     f'{entry["seconds"] / entry["calls"] * 1e6:>14.2f}')
+    return '\n'.join(lines)
+
+
+def _report_at_exit() -> None:
+    if not _stats:
+        return
+    if _output == 'json':
+        import json
+        print(json.dumps(snapshot()), file=sys.stderr)
+    else:
+        print(summary_table(), file=sys.stderr)
@@ -0,0 +1,268 @@
+"""Hot reloadable table sets shared by processes.
+
+TableRegistry lives in the process that owns the tables, e.g. the server. It watches the yaml
+files of named table sets. When a file changes, only the top-level tables whose yaml differs
+(e.g. 'Solo Gunning') are compiled again. The other tables and their part of the row index
+are kept. The tables are then pickled into a new shared memory block, and the version in the
+small control block of the set is bumped.
+
+Worker processes read a set through SharedTables, set as the source of its path in
+table_store, so character_create.main and load_tables see the new version on their next call.
+They unpickle a block that was complete before its version was published, so every character
+is made from one version of the tables. No worker parses yaml.
+
+    registry = TableRegistry({'default': 'data/tables.yaml', 'street': 'data/street.yaml'})
+    registry.start()                                           # watch the files
+    ProcessPoolExecutor(initializer=attach, initargs=(registry.prefix, registry.paths))
+"""
+import hashlib
+import os
+import pickle
+import threading
+import warnings
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import table_store
+import templates
+from table_store import ROW_INDEX, check_tables, compile_table, index_rows
+
+# Seconds between two checks of the files
+INTERVAL = 1.0
+
+# Bytes of the version in the control block, and of the length in a data block
+HEADER = 8
+
+# Keys of the row index made from Cultural Origins
+ORIGIN_KEYS = ('Cultural Region', 'Languages')
+
+
+def _block_name(prefix: str, name: str, version: int = None) -> str:
+    """Shared memory name of the control block of a set, or of one version of its tables"""
+    key = hashlib.blake2b(name.encode(), digest_size=4).hexdigest()
+    return f'{prefix}_{key}' if version is None else f'{prefix}_{key}_{version}'
+
+
+def _attach(block_name: str) -> SharedMemory:
+    """Open a block created by the registry, without leaving its cleanup to this process"""
+    try:
+        return SharedMemory(block_name, track=False) # Python 3.13+
+    except TypeError:
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            return SharedMemory(block_name)
+        finally:
+            resource_tracker.register = register
+
+
+def _resolve(tables_path) -> Path:
+    """Paths are relative to the project, as --tables-path of character_create"""
+    return (Path(__file__).parent.resolve() / tables_path).resolve()
+
+
+def update_index(index: dict, tables: dict, changed: set) -> dict:
+    """
+    Row index of the tables, computing again only the entries of the changed tables.
+
+    Args:
+        index (dict): row index before the change
+        tables (dict): compiled tables after the change
+        changed (set): names of the changed or removed tables
+
+    Returns:
+        dict: row index, the same as table_store.index_rows(tables)
+    """
+    fresh = index_rows({table_name: tables[table_name] for table_name in changed if table_name in tables})
+    origins_changed = 'Cultural Origins' in changed
+    updated = {key: value for key, value in index.items()
+               if key not in changed and (key not in ORIGIN_KEYS or not origins_changed)}
+    updated.update({key: value for key, value in fresh.items() if key not in ORIGIN_KEYS or origins_changed})
+    return updated
+
+
+class _TableSet(object):
+    """Published state of one named set"""
+
+    def __init__(self, path: Path, control: SharedMemory) -> None:
+        self.path = path
+        self.control = control
+        self.block = None
+        self.mtime = None
+        self.raw = {}
+        self.tables = {}
+        self.version = 0
+
+
+class TableRegistry(object):
+    """Compiles named table sets, publishes them in shared memory and reloads them when their files change"""
+
+    def __init__(self, paths: dict, prefix: str = None) -> None:
+        """
+        Args:
+            paths (dict): set name to tables yaml path, relative to the project
+            prefix (str): prefix of the shared memory names, unique per registry if not set
+        """
+        self.prefix = prefix or f'cyberpunk{os.getpid()}_{id(self) % 10000}'
+        self.paths = {name: _resolve(path) for name, path in paths.items()}
+        self._sets = {}
+        self._stop = threading.Event()
+        self._thread = None
+        for name, path in self.paths.items():
+            control = SharedMemory(_block_name(self.prefix, name), create=True, size=HEADER)
+            control.buf[:HEADER] = bytes(HEADER)
+            self._sets[name] = _TableSet(path, control)
+            if not self._reload(name, path.stat().st_mtime_ns):
+                self.close()
+                raise ValueError(f"Table set '{name}': {path} can't be compiled")
+            table_store.set_source(path, lambda table_set=self._sets[name]: table_set.tables)
+
+    def tables(self, name: str) -> dict:
+        """Current compiled tables of the set"""
+        return self._sets[name].tables
+
+    def version(self, name: str) -> int:
+        """Version of the set, bumped by every reload"""
+        return self._sets[name].version
+
+    def refresh(self) -> list:
+        """
+        Reload the sets whose files changed since the last check.
+
+        Returns:
+            list: names of the reloaded sets
+        """
+        reloaded = []
+        for name, table_set in self._sets.items():
+            try:
+                mtime = table_set.path.stat().st_mtime_ns
+            except OSError:
+                continue # being replaced, next time
+            if mtime != table_set.mtime and self._reload(name, mtime):
+                reloaded.append(name)
+        return reloaded
+
+    def _reload(self, name: str, mtime: int) -> bool:
+        """
+        Compile the changed tables of the set and publish them.
+        A file that does not compile, e.g. saved in the middle of an edit, keeps the last version.
+
+        Returns:
+            bool: whether a new version was published
+        """
+        import yaml
+
+        table_set = self._sets[name]
+        table_set.mtime = mtime
+        try:
+            raw = yaml.safe_load(table_set.path.read_bytes())
+            if not isinstance(raw, dict):
+                raise ValueError('no tables')
+            changed = {table_name for table_name, rows in raw.items()
+                       if table_name not in table_set.raw or table_set.raw[table_name] != rows}
+            changed |= set(table_set.raw) - set(raw)
+            if not changed:
+                return False
+
+            tables = {table_name: compile_table(table_name, rows) if table_name in changed
+                      else table_set.tables[table_name] for table_name, rows in raw.items()}
+            check_tables(tables)
+            tables[ROW_INDEX] = update_index(table_set.tables.get(ROW_INDEX, {}), tables, changed)
+        except (OSError, yaml.YAMLError, ValueError) as error:
+            warnings.warn(f"Table set '{name}' not reloaded, {table_set.path}: {error}", RuntimeWarning)
+            return False
+
+        self._publish(table_set, name, tables)
+        table_set.raw = raw
+        return True
+
+    def _publish(self, table_set: _TableSet, name: str, tables: dict) -> None:
+        """Write the tables to a new block, then switch the version. The old block is unlinked,
+        readers that opened it keep their mapping"""
+        data = pickle.dumps(tables, protocol=pickle.HIGHEST_PROTOCOL)
+        version = table_set.version + 1
+        block = SharedMemory(_block_name(self.prefix, name, version), create=True, size=HEADER + len(data))
+        block.buf[:HEADER] = len(data).to_bytes(HEADER, 'little')
+        block.buf[HEADER:HEADER + len(data)] = data
+        table_set.control.buf[:HEADER] = version.to_bytes(HEADER, 'little')
+
+        old_block, old_tables = table_set.block, table_set.tables
+        table_set.block, table_set.tables, table_set.version = block, tables, version
+        if old_block is not None:
+            old_block.close()
+            old_block.unlink()
+        templates.discard(old_tables)
+
+    def start(self, interval: float = INTERVAL) -> None:
+        """Check the files every interval seconds in a background thread"""
+        def watch():
+            while not self._stop.wait(interval):
+                self.refresh()
+
+        self._thread = threading.Thread(target=watch, name='table-registry', daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop watching and remove the shared memory"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        for table_set in self._sets.values():
+            table_store.set_source(table_set.path)
+            for block in (table_set.block, table_set.control):
+                if block is not None:
+                    block.close()
+                    block.unlink()
+            table_set.block = None
+        self._sets = {}
+
+
+class SharedTables(object):
+    """
+    Tables of a set published by a TableRegistry of another process. Calling it returns the
+    current version: a read of the version number, and unpickling only when it changed.
+    """
+
+    def __init__(self, prefix: str, name: str) -> None:
+        self.prefix = prefix
+        self.name = name
+        self.control = _attach(_block_name(prefix, name))
+        self.version = 0
+        self.tables = None
+
+    def __call__(self) -> dict:
+        version = int.from_bytes(self.control.buf[:HEADER], 'little')
+        if version != self.version:
+            self._load(version)
+        return self.tables
+
+    def _load(self, version: int) -> None:
+        while True:
+            try:
+                block = _attach(_block_name(self.prefix, self.name, version))
+                break
+            except FileNotFoundError: # replaced by a newer version meanwhile
+                version = int.from_bytes(self.control.buf[:HEADER], 'little')
+
+        try:
+            length = int.from_bytes(block.buf[:HEADER], 'little')
+            with block.buf[HEADER:HEADER + length] as data:
+                tables = pickle.loads(data)
+        finally:
+            block.close()
+        if self.tables is not None:
+            templates.discard(self.tables)
+        self.tables, self.version = tables, version
+
+
+def attach(prefix: str, paths: dict) -> None:
+    """
+    Read the sets of a registry in this process, e.g. as initializer of worker processes.
+
+    Args:
+        prefix (str): TableRegistry.prefix
+        paths (dict): TableRegistry.paths
+    """
+    for name, path in paths.items():
+        table_store.set_source(path, SharedTables(prefix, name))
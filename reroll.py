@@ -0,0 +1,110 @@
+"""Re-roll one field of a generated character, as players do at the table.
+
+Only the field and the fields derived from it are rolled again, the rest of the character stays:
+
+    cultural_region     also language, rolled from the new origin
+    language            from the languages of the origins of the region
+    name                from the name pool of the region
+    friends, enemies, love      the whole list
+    attributes          e.g. hairstyle, life_goals, one row of their table
+    role fields         the step of the field, then every step that depends on it by 'when' or 'by'
+                        (e.g. partner when alone flips), see roles.py. message_role is told again
+
+The text of the character is then kept per piece of its frame (locales.CachedText) and only
+the pieces reading the changed fields are rendered again, str(char) gives it.
+
+    reroll(char, 'office')
+    print(char)
+"""
+import character_id
+import locales
+from character_create import ATTRIBUTE_TABLES, Enemy, Friend, Love, generate_name
+
+PEOPLE = {'friends': Friend, 'enemies': Enemy, 'love': Love}
+
+
+def dependents(role_spec, field: str) -> list:
+    """
+    Role fields rolled from the value of field, directly or not.
+
+    Args:
+        role_spec (roles.Role): spec of the role
+        field (str): field of the role
+
+    Returns:
+        list: the field and its dependents, in the order of the steps
+    """
+    fields = {field}
+    for step_field, kind, source, when in role_spec.steps:
+        if (when is not None and when[0] in fields) or (kind == 'row_by' and source[0] in fields):
+            fields.add(step_field)
+    return [step[0] for step in role_spec.steps if step[0] in fields]
+
+
+def rerollable(char) -> list:
+    """Fields of the character that reroll takes"""
+    role_fields = list(dict.fromkeys(step[0] for step in char.role_spec.steps))
+    return ['name', 'cultural_region', 'language', *ATTRIBUTE_TABLES, *PEOPLE, *role_fields]
+
+
+def _roll(char, field: str) -> list:
+    """Roll the field and its dependents with the rolls of the character, returns the changed fields"""
+    if field == 'name':
+        char.name = generate_name(char.sex, char.cultural_region, char.rolls)
+        return ['name']
+    if field == 'cultural_region':
+        char.cultural_region, char.language = char.cultural_origins()
+        return ['cultural_region', 'language']
+    if field == 'language':
+        constraints = char.constraints
+        char.constraints = {**(constraints or {}), 'Cultural Region': char.cultural_region}
+        try:
+            _, char.language = char.chosen_origins()
+        finally:
+            char.constraints = constraints
+        return ['language']
+    if field in ATTRIBUTE_TABLES:
+        char.set_attributes([field])
+        return [field]
+    if field in PEOPLE:
+        char.__dict__[field] = char.get_friends_enemies_or_love(PEOPLE[field])
+        return [field]
+
+    fields = dependents(char.role_spec, field)
+    defaults = dict(char.role_spec.fields)
+    for name in fields:
+        char.__dict__[name] = defaults[name]
+    char.roll_role(tuple(step for step in char.role_spec.steps if step[0] in fields))
+    char.message_role = char.render_role()
+    return fields
+
+
+def reroll(char, field: str, seed: int = None) -> list:
+    """
+    Roll one field of the character again, in place. A table fixed in the constraints of the character
+    keeps its value. The character no longer matches its id, which is cleared.
+
+    Args:
+        char (Character): generated character
+        field (str): field to re-roll, see rerollable
+        seed (int): seed of the rolls, the shared dice_engine rng if not set
+
+    Returns:
+        list: names of the fields that were rolled
+    """
+    if field not in rerollable(char):
+        raise ValueError(f"Field '{field}' can not be re-rolled. Choose from {rerollable(char)}")
+
+    if char.__dict__.get('text_cache') is None:
+        char.text_cache = locales.CachedText(char)
+
+    rolls = char.rolls
+    char.rolls = None if seed is None else character_id.seed_rolls(seed)
+    try:
+        fields = _roll(char, field)
+    finally:
+        char.rolls = rolls
+    char.id = None
+
+    char.text_cache.update(char, fields)
+    return fields
@@ -0,0 +1,114 @@
+"""Role specs: the fields of every role, how they are rolled and how they are told.
+
+Roles are described in data/roles.yaml, not in code. The spec of a role is compiled once into a
+flat plan, a tuple of steps, and cached beside the file like the tables (table_store.load_compiled).
+Character.roll_role runs the plan of any role, character_create builds a dataclass per role from
+its fields, compact.py and probability.py derive their slots and nodes from the same steps.
+
+A step is a plain tuple (field, kind, source, when):
+    row     source is the table name, the field is one of its rows
+    split   row, then one part of a row with 'A/B/C' parts
+    word    row, then one option of every word with 'A/B' options
+    flag    a coin, on 1 a row of the table, the field is None on 0
+    choice  source is a tuple of options, the field is one of them
+    row_by  source is (field, {value: table name}), a row of the table named after the value of field
+    when    None, or (field, value): the step is rolled only when the field has the value
+"""
+from pathlib import Path
+from typing import NamedTuple
+
+from table_store import load_compiled
+
+ROLES_PATH = Path(__file__).parent.resolve() / 'data' / 'roles.yaml'
+
+# Keys of a step in the yaml
+STEP_KEYS = {'field', 'table', 'split', 'words', 'flag', 'choice', 'by', 'when'}
+
+
+class Role(NamedTuple):
+    """
+    name: role name as in tables['roles'], e.g. 'Fixer'
+    fields: (field, default) pairs in the order of the character record
+    steps: the plan, see the module docstring
+    frame: message_role frame, see locales.py
+    """
+    name: str
+    fields: tuple
+    steps: tuple
+    frame: object
+
+
+def _step(role: str, step: dict, known: set) -> tuple:
+    """Compile one step of the yaml, table names get the role name as prefix like in tables.yaml"""
+    unknown = set(step) - STEP_KEYS
+    if unknown or 'field' not in step:
+        raise ValueError(f"Role '{role}': step {step} needs a field and takes only {sorted(STEP_KEYS)}")
+    field = step['field']
+
+    when = step.get('when')
+    if when is not None:
+        if not isinstance(when, dict) or len(when) != 1 or next(iter(when)) not in known:
+            raise ValueError(f"Role '{role}', field '{field}': when must be one field rolled before")
+        when = next(iter(when.items()))
+
+    if 'choice' in step:
+        return (field, 'choice', tuple(step['choice']), when)
+    table = step.get('table')
+    if table is None:
+        raise ValueError(f"Role '{role}', field '{field}': no table or choice")
+    if 'by' in step:
+        if step['by'] not in known or not isinstance(table, dict):
+            raise ValueError(f"Role '{role}', field '{field}': by needs a field rolled before "
+                             'and a table for each of its values')
+        return (field, 'row_by', (step['by'], {value: f'{role} {name}' for value, name in table.items()}), when)
+
+    kinds = [kind for key, kind in (('split', 'split'), ('words', 'word'), ('flag', 'flag')) if step.get(key)]
+    if len(kinds) > 1:
+        raise ValueError(f"Role '{role}', field '{field}': only one of split, words and flag")
+    return (field, kinds[0] if kinds else 'row', f'{role} {table}', when)
+
+
+def compile_roles(source: bytes) -> dict:
+    """
+    Parse role specs and compile their plans.
+
+    Args:
+        source (bytes): content of the roles yaml file
+
+    Returns:
+        dict: role name to Role, in the order of the file
+    """
+    import yaml
+
+    roles = {}
+    for name, spec in yaml.safe_load(source).items():
+        known = set()
+        steps = []
+        for step in spec.get('steps', ()):
+            steps.append(_step(name, step, known))
+            known.add(step['field'])
+
+        defaults = spec.get('defaults') or {}
+        names = spec.get('fields') or list(dict.fromkeys(step[0] for step in steps))
+        missing = (known | set(defaults)) - set(names)
+        if missing:
+            raise ValueError(f"Role '{name}': fields {sorted(missing)} are not in its fields")
+        frame = spec.get('frame', '')
+        roles[name] = Role(name, tuple((field, defaults.get(field)) for field in names), tuple(steps),
+                           tuple(frame) if isinstance(frame, list) else frame)
+    return roles
+
+
+def load_roles(path=ROLES_PATH) -> dict:
+    """
+    Args:
+        path (str | Path): roles yaml file
+
+    Returns:
+        dict: role name to Role, compiled on first use and cached
+    """
+    return load_compiled(path, compile_roles)
+
+
+# Roles of data/roles.yaml
+ROLES = load_roles()
@@ -0,0 +1,288 @@
+"""Local HTTP service generating characters, stdlib asyncio only.
+
+    GET /character?name=&role=&sex=&seed=&format=&tables=   one character, json (default) or text
+    GET /batch?n=&role=&sex=&seed=&tables=                  n characters as chunked jsonl
+
+Tables, name pool and templates are loaded once at start. tables= names a table set, 'default'
+is --tables-path, others are added with --tables NAME=PATH. The table files are watched and
+edits reach all the workers through the registry (registry.py), without a restart. Batches are generated
+in chunks by a pool of worker processes, the same chunks and seeds as parallel.generate_parallel,
+so /batch?n=N&seed=S returns the same lines as `character_create.py -c N --seed S -f jsonl`.
+
+Usage: python server.py [--host 127.0.0.1] [--port 8000] [--workers N] [--tables NAME=PATH]
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from random import Random
+from urllib.parse import parse_qs, urlsplit
+
+import character_create
+import name_pool
+import parallel
+import registry
+import templates
+from export import character_record, to_jsonl
+from table_store import load_tables
+
+# Largest batch one request may ask for
+MAX_BATCH = 1_000_000
+
+# Longest request line or header accepted
+MAX_LINE = 8192
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str = None) -> None:
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+def _response_head(status: HTTPStatus, content_type: str, length: int = None, keep_alive: bool = True) -> bytes:
+    lines = [f'HTTP/1.1 {status.value} {status.phrase}', f'Content-Type: {content_type}']
+    lines.append(f'Content-Length: {length}' if length is not None else 'Transfer-Encoding: chunked')
+    lines.append('Connection: keep-alive' if keep_alive else 'Connection: close')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode()
+
+
+def _chunk(data: bytes) -> bytes:
+    """One piece of a chunked response body"""
+    return f'{len(data):x}\r\n'.encode() + data + b'\r\n'
+
+
+def _init_worker(prefix: str, paths: dict, tables_path) -> None:
+    """Read the table sets published by the server, then load the rest as parallel workers do"""
+    registry.attach(prefix, paths)
+    parallel._init_worker(tables_path)
+
+
+def _parse_options(query: dict, paths: dict) -> dict:
+    """role, sex, seed and tables query parameters shared by all endpoints"""
+    options = {'role': query.get('role'), 'sex': query.get('sex'), 'seed': None,
+               'tables_path': paths.get(query.get('tables', 'default'))}
+    if options['tables_path'] is None:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"No table set '{query['tables']}'. Choose from {list(paths)}")
+    if options['sex'] not in (None, 'male', 'female'):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"No such sex '{options['sex']}'. Choose from male, female")
+    if query.get('seed') is not None:
+        try:
+            options['seed'] = int(query['seed'])
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"seed must be an integer, got '{query['seed']}'") from None
+    return options
+
+
+class Server(object):
+    """
+    Generation state kept for the whole life of the service: table registry, name pool, templates
+    and the pool of worker processes.
+    """
+
+    def __init__(self, tables_path='data/tables.yaml', workers: int = None, table_sets: dict = None,
+                 interval: float = registry.INTERVAL) -> None:
+        self.tables_path = tables_path
+        self.workers = workers or os.cpu_count()
+        self.registry = registry.TableRegistry({**(table_sets or {}), 'default': tables_path})
+        if interval:
+            self.registry.start(interval)
+        name_pool.load_pool()
+        templates.load_templates(self.tables)
+        # not fork: workers forked from this process later would inherit the client sockets
+        # open at that moment and keep the connections from closing
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.executor = ProcessPoolExecutor(self.workers, multiprocessing.get_context(start_method),
+                                            initializer=_init_worker,
+                                            initargs=(self.registry.prefix, self.registry.paths, tables_path))
+        list(self.executor.map(abs, range(self.workers))) # start and warm up all the workers now
+
+    @property
+    def tables(self) -> dict:
+        """Current tables of the default set"""
+        return self.registry.tables('default')
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+        self.registry.close()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests of one connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    if name.strip().lower() == 'connection' and value.strip().lower() == 'close':
+                        keep_alive = False
+
+                keep_alive = await self.respond(request_line, writer, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):  # closed by the client or a line over the limit
+            pass
+        except asyncio.CancelledError:  # the server is stopping
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, request_line: bytes, writer: asyncio.StreamWriter, keep_alive: bool) -> bool:
+        """
+        Write the response to one request.
+
+        Returns:
+            bool: whether the connection can be kept open
+        """
+        try:
+            parts = request_line.decode('latin-1').split()
+            if len(parts) != 3 or len(request_line) > MAX_LINE:
+                raise HTTPError(HTTPStatus.BAD_REQUEST)
+            method, target, version = parts
+            keep_alive = keep_alive and version == 'HTTP/1.1'
+            if method != 'GET':
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+
+            url = urlsplit(target)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if url.path == '/character':
+                self.character(query, writer, keep_alive)
+            elif url.path == '/batch':
+                await self.batch(query, writer, keep_alive)
+            else:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"No such endpoint '{url.path}'")
+        except HTTPError as error:
+            body = json.dumps({'error': str(error)}).encode()
+            writer.write(_response_head(error.status, 'application/json', len(body), keep_alive) + body)
+
+        return keep_alive
+
+    def character(self, query: dict, writer: asyncio.StreamWriter, keep_alive: bool) -> None:
+        """
+        One character is cheaper than a round trip to a worker, it is generated right here.
+        A seeded one is drawn from its own generator, so the shared one stays unpredictable to clients.
+        """
+        options = _parse_options(query, self.registry.paths)
+        format = query.get('format', 'json')
+        if format not in ('json', 'text'):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"No such format '{format}'. Choose from json, text")
+
+        try:
+            rng = None if options['seed'] is None else Random(options['seed'])
+            char = character_create.main(query.get('name'), options['role'], options['sex'],
+                                         options['tables_path'], rng=rng)
+        except AssertionError as error:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(error)) from None
+
+        if format == 'text':
+            body, content_type = f'{char}\n'.encode(), 'text/plain; charset=utf-8'
+        else:
+            body, content_type = json.dumps(character_record(char), ensure_ascii=False).encode(), 'application/json'
+        writer.write(_response_head(HTTPStatus.OK, content_type, len(body), keep_alive) + body)
+
+    async def batch(self, query: dict, writer: asyncio.StreamWriter, keep_alive: bool) -> None:
+        """
+        Stream n characters as jsonl. Chunks are generated by the workers, at most
+        parallel.CHUNKS_AHEAD per worker in flight, and written as soon as the next one in order is done.
+        """
+        options = _parse_options(query, self.registry.paths)
+        try:
+            count = int(query.get('n', 1))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"n must be an integer, got '{query['n']}'") from None
+        if not 0 < count <= MAX_BATCH:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f'n must be between 1 and {MAX_BATCH}')
+        if options['role']:
+            tables_roles = load_tables(options['tables_path'])['roles']
+            if options['role'].capitalize() not in tables_roles:
+                raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                f"No such role '{options['role']}'. Choose from {list(tables_roles)}")
+
+        seed = options['seed']
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), 'little')
+
+        loop = asyncio.get_running_loop()
+        writer.write(_response_head(HTTPStatus.OK, 'application/x-ndjson; charset=utf-8', keep_alive=keep_alive))
+        pending = deque()
+        for index, start in enumerate(range(0, count, parallel.CHUNK_SIZE)):
+            size = min(parallel.CHUNK_SIZE, count - start)
+            pending.append(loop.run_in_executor(self.executor, _jsonl_chunk, seed, index, size,
+                                                options['role'], options['sex'], options['tables_path']))
+            if len(pending) >= self.workers * parallel.CHUNKS_AHEAD:
+                writer.write(_chunk(await pending.popleft()))
+                await writer.drain()
+
+        while pending:
+            writer.write(_chunk(await pending.popleft()))
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+
+
+def _jsonl_chunk(seed: int, index: int, size: int, role: str, sex: str, tables_path) -> bytes:
+    """Worker side of /batch: one chunk already encoded, so only bytes cross the process boundary"""
+    lines = parallel.generate_chunk(seed, index, size, None, role, sex, tables_path, render=to_jsonl)
+    return ''.join(lines).encode()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8000, tables_path='data/tables.yaml',
+                workers: int = None, table_sets: dict = None) -> None:
+    """
+    Run the service until cancelled.
+
+    Args:
+        host (str): address to listen on
+        port (int): port to listen on
+        tables_path (str | Path): see character_create.main
+        workers (int): worker processes for batches, all cores if not set
+        table_sets (dict): more table sets, name to tables path
+    """
+    server = Server(tables_path, workers, table_sets)
+    try:
+        listener = await asyncio.start_server(server.handle, host, port, limit=MAX_LINE * 2)
+        async with listener:
+            print(f'Serving on http://{host}:{port} with {server.workers} workers', flush=True)
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+    parse = ArgumentParser(description='Serve random characters for Cyberpunk Red over HTTP')
+    parse.add_argument('--host', default='127.0.0.1', type=str,
+                       help='address to listen on, 127.0.0.1 as default')
+    parse.add_argument('-p', '--port', default=8000, type=int,
+                       help='port to listen on, 8000 as default')
+    parse.add_argument('-t', '--tables-path', default='data/tables.yaml', type=Path,
+                       help='relative path to tables yaml file, data/tables.yaml as default')
+    parse.add_argument('-w', '--workers', default=0, type=int,
+                       help='worker processes for batches, 0 (all cores) as default')
+    parse.add_argument('--tables', action='append', default=None, metavar='NAME=PATH',
+                       help='serve another table set as ?tables=NAME. Can be repeated')
+    args = parse.parse_args()
+
+    table_sets = {}
+    for item in args.tables or ():
+        set_name, separator, set_path = item.partition('=')
+        if not separator or not set_name or set_name == 'default':
+            parse.error(f"--tables takes NAME=PATH with a name other than default, got '{item}'")
+        table_sets[set_name] = Path(set_path)
+
+    # stop on SIGTERM like on Ctrl+C, so the worker processes are shut down too
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(serve(args.host, args.port, args.tables_path, args.workers or None, table_sets))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,95 @@
+"""Aggregate statistics of generated characters, without keeping them.
+
+Characters are generated chunk by chunk (see parallel.run_chunks) and counted into exact histograms
+as they come, each chunk in its worker. Workers send back their Stats only, which are merged in order,
+so memory depends on the number of distinct values, not on the number of characters, and the
+report is the same for any number of workers.
+
+    python character_create.py --stats 1000000 --workers 0 --seed 1
+"""
+from collections import Counter
+
+from parallel import generate_chunk, run_chunks
+
+# Histogram name to the value of a character it counts
+HISTOGRAMS = {
+    'role': lambda char: char.class_name,
+    'sex': lambda char: char.sex,
+    'cultural_region': lambda char: char.cultural_region,
+    'language': lambda char: char.language,
+    'family_crisis': lambda char: char.family_crisis,
+    'friends': lambda char: len(char.friends),
+    'enemies': lambda char: len(char.enemies),
+    'love': lambda char: len(char.love),
+}
+
+# Histograms counting every enemy instead of every character
+ENEMY_HISTOGRAMS = {
+    'enemy_type': lambda enemy: enemy.enemy_type,
+    'enemy_throw': lambda enemy: enemy.throw,
+}
+
+
+class Stats(object):
+    """Count of characters and a Counter per histogram, see HISTOGRAMS and ENEMY_HISTOGRAMS"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.histograms = {name: Counter() for name in (*HISTOGRAMS, *ENEMY_HISTOGRAMS)}
+
+    def add(self, char) -> None:
+        self.count += 1
+        histograms = self.histograms
+        for name, value in HISTOGRAMS.items():
+            histograms[name][value(char)] += 1
+        for enemy in char.enemies:
+            for name, value in ENEMY_HISTOGRAMS.items():
+                histograms[name][value(enemy)] += 1
+
+    def merge(self, other: 'Stats') -> 'Stats':
+        """Add the counts of other, e.g. of a worker, to these"""
+        self.count += other.count
+        for name, histogram in other.histograms.items():
+            self.histograms[name].update(histogram)
+        return self
+
+    def to_dict(self) -> dict:
+        return {'count': self.count,
+                'histograms': {name: dict(histogram.most_common()) for name, histogram in self.histograms.items()}}
+
+    def report(self) -> str:
+        """Histograms as text: value, count and share of the total, most common first"""
+        lines = [f'Characters: {self.count}']
+        for name, histogram in self.histograms.items():
+            total = sum(histogram.values())
+            lines.append(f'\n{name} ({len(histogram)} values, {total} counted)')
+            for value, number in sorted(histogram.items(), key=lambda item: (-item[1], str(item[0]))):
+                lines.append(f'{number:>12} {number / total:7.2%}  {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def stats_chunk(seed: int, index: int, size: int, **options) -> Stats:
+    """Stats of one chunk of characters, generated as parallel.generate_chunk does"""
+    stats = Stats()
+    for char in generate_chunk(seed, index, size, **options):
+        stats.add(char)
+    return stats
+
+
+def collect_stats(count: int, workers: int = None, seed: int = None, role: str = None, sex: str = None,
+                  tables_path='data/tables.yaml', where: dict = None) -> Stats:
+    """
+    Generate count characters and count them, the characters are never kept.
+
+    Args:
+        count (int): number of characters
+        workers, seed, role, sex, tables_path, where: see parallel.generate_parallel
+
+    Returns:
+        Stats: merged counts of all chunks, the same as for generate_parallel with the same seed
+    """
+    stats = Stats()
+    for chunk in run_chunks(stats_chunk, count, workers, seed, tables_path, role=role, sex=sex, where=where):
+        stats.merge(chunk)
+    return stats
+
@@ -0,0 +1,290 @@
+import os
+import pickle
+from pathlib import Path
+from typing import Callable
+
+# Bump when the compiled layout changes, so old caches are never reused
+CACHE_VERSION = 2
+
+# Dice thrown on each table. Every numbered table must have exactly this many rows
+DIE_SIZES = {
+    'Cultural Origins': 10,
+    'Personality': 10,
+    'Clothing Style': 10,
+    'Hairstyle': 10,
+    'Affectation': 10,
+    'Motivation': 10,
+    'Relationships': 10,
+    'Most Valued Person': 10,
+    'Most Valued Possession': 10,
+    'Family Background': 10,
+    'Childhood Environment': 10,
+    'Family Crisis': 10,
+    'Friend': 10,
+    'Enemy type': 10,
+    'Enemy wrong': 10,
+    'Enemy throw': 10,
+    'Enemy meet': 10,
+    'Love happened': 10,
+    'Life Goals': 10,
+    'Fixer Type': 10,
+    'Fixer Office': 6,
+    'Fixer Partner': 6,
+    'Fixer Side Clients': 6,
+    'Fixer Gunner': 6,
+    'Media Type': 6,
+    'Media Source': 6,
+    'Media Ethics': 6,
+    'Media Stories': 6,
+    'Exec Type': 10,
+    'Exec Division': 6,
+    'Exec Good/Bad': 6,
+    'Exec Based': 6,
+    'Exec Gunning': 6,
+    'Exec Boss': 6,
+    'Rockerboy Type': 10,
+    'Rockerboy Perform': 6,
+    'Rockerboy Leave': 6,
+    'Rockerboy Gunning': 6,
+    'Solo Type': 6,
+    'Solo Moral Compass': 6,
+    'Solo Operational Territory': 6,
+    'Solo Gunning': 6,
+    'Netrunner Type': 6,
+    'Netrunner Partner': 6,
+    'Netrunner Workspace': 6,
+    'Netrunner Clients': 6,
+    'Netrunner Supplies': 6,
+    'Netrunner Gunning': 6,
+    'Tech Type': 10,
+    'Tech Partner': 6,
+    'Tech Workspace': 6,
+    'Tech Clients': 6,
+    'Tech Supplies': 6,
+    'Tech Gunning': 6,
+    'Medtech Type': 10,
+    'Medtech Partner': 6,
+    'Medtech Workspace': 6,
+    'Medtech Clients': 6,
+    'Medtech Supplies': 6,
+    'Lawman Type': 6,
+    'Lawman Jurisdiction': 6,
+    'Lawman Corrupt': 6,
+    'Lawman Gunning': 6,
+    'Lawman Target': 6,
+    'Nomad Pack Size': 6,
+    'Nomad Land': 10,
+    'Nomad Air': 6,
+    'Nomad Sea': 6,
+    'Nomad Role': 6,
+    'Nomad Pack Philosophy': 6,
+    'Nomad Pack Gunning': 6,
+}
+
+# Key of the inverted index in compiled tables, see index_rows
+ROW_INDEX = 'Row Index'
+
+# Compiled files (tables, roles) already loaded by this process, keyed by resolved path
+_loaded = {}
+
+# Functions returning the current tables of a path, when something else compiles them
+# (registry.SharedTables), keyed by resolved path
+_sources = {}
+
+
+def _freeze(value):
+    """
+    Recursively convert parsed yaml values to their frozen form.
+    Lists become tuples and dicts numbered 1..N become tuples of rows,
+    so a row rolled on a dN is found at index roll - 1.
+
+    Args:
+        value: value parsed from yaml
+
+    Returns:
+        frozen value
+    """
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+
+    if isinstance(value, dict):
+        if value and all(isinstance(key, int) for key in value):
+            if sorted(value) != list(range(1, len(value) + 1)):
+                raise ValueError(f'rows must be numbered 1..{len(value)}, got {sorted(value)}')
+            return tuple(_freeze(value[key]) for key in range(1, len(value) + 1))
+
+        return {key: _freeze(item) for key, item in value.items()}
+
+    return value
+
+
+def index_rows(tables: dict) -> dict:
+    """
+    Inverted index of the tables: for every table of text rows, row text to positions of the rows
+    with that text. Cultural Origins are indexed by each part of 'A/B' regions as 'Cultural Region'
+    and by each language as 'Languages'.
+
+    Args:
+        tables (dict): compiled tables
+
+    Returns:
+        dict: table name to value to tuple of row positions (roll - 1)
+    """
+    index = {}
+    for table_name, rows in tables.items():
+        if isinstance(rows, tuple) and all(isinstance(row, str) for row in rows):
+            table_index = index[table_name] = {}
+            for position, row in enumerate(rows):
+                table_index[row] = table_index.get(row, ()) + (position,)
+
+    origins = tables.get('Cultural Origins', ())
+    for key, values in (('Cultural Region', lambda origin: origin['Cultural Region'].split('/')),
+                        ('Languages', lambda origin: origin['Languages'])):
+        table_index = index[key] = {}
+        for position, origin in enumerate(origins):
+            for value in dict.fromkeys(values(origin)):
+                table_index[value] = table_index.get(value, ()) + (position,)
+
+    return index
+
+
+def compile_table(table_name: str, rows):
+    """
+    Convert one parsed yaml table to the compiled form and check its rows against DIE_SIZES.
+
+    Args:
+        table_name (str): top-level key of the table
+        rows: parsed yaml value of the table
+
+    Returns:
+        frozen table, see _freeze
+    """
+    try:
+        table = _freeze(rows)
+    except ValueError as error:
+        raise ValueError(f"Table '{table_name}': {error}") from None
+
+    die_size = DIE_SIZES.get(table_name)
+    if die_size is not None and len(table) != die_size:
+        raise ValueError(f"Table '{table_name}' has {len(table)} rows, but it is rolled on 1d{die_size}")
+    return table
+
+
+def check_tables(tables: dict) -> None:
+    """Check that every table from DIE_SIZES exists"""
+    for table_name in DIE_SIZES:
+        if table_name not in tables:
+            raise ValueError(f"Table '{table_name}' is missing")
+
+
+def compile_tables(source: bytes) -> dict:
+    """
+    Parse yaml tables and convert them to the compiled form.
+    Checks that every table from DIE_SIZES exists and has a row for each side of its die.
+
+    Args:
+        source (bytes): content of the tables yaml file
+
+    Returns:
+        dict: table name to tuple of rows (roles to tuple of role names),
+            and the inverted index of the rows under ROW_INDEX
+    """
+    import yaml
+
+    tables = {table_name: compile_table(table_name, rows) for table_name, rows in yaml.safe_load(source).items()}
+    check_tables(tables)
+    tables[ROW_INDEX] = index_rows(tables)
+    return tables
+
+
+def cache_path(path: Path) -> Path:
+    """
+    Path of the compiled cache for the given yaml file.
+    """
+    return path.parent / '__pycache__' / f'{path.name}.pickle'
+
+
+def _write_cache(cache: Path, key: tuple, tables: dict) -> None:
+    try:
+        cache.parent.mkdir(exist_ok=True)
+        temp = cache.with_name(f'{cache.name}.{os.getpid()}')
+        with open(temp, 'wb') as fo:
+            pickle.dump((key, tables), fo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, cache)
+    except OSError:
+        pass # read only location, keep compiled tables in memory only
+
+
+def set_source(tables_path, source=None) -> None:
+    """
+    Take the tables of a path from a function instead of the file, e.g. from a registry
+    publishing them in shared memory. None goes back to the file.
+
+    Args:
+        tables_path (str | Path): path to the tables yaml file
+        source (Callable): function without arguments returning the compiled tables
+    """
+    tables_path = Path(tables_path).resolve()
+    if source is None:
+        _sources.pop(tables_path, None)
+    else:
+        _sources[tables_path] = source
+
+
+def load_compiled(path, compile: Callable):
+    """
+    Load a yaml file compiled by the given function. The result is compiled once and stored in a
+    binary cache next to the file, keyed on the file path, mtime and content hash.
+    The file is only read and hashed when its mtime differs from the cached one.
+    Repeated calls in one process return the same object while the file is unchanged.
+
+    Args:
+        path (str | Path): path to the yaml file
+        compile (Callable): function of the file content returning the compiled, picklable form
+
+    Returns:
+        the compiled file
+    """
+    path = Path(path).resolve()
+    mtime = path.stat().st_mtime_ns
+
+    loaded = _loaded.get(path)
+    if loaded is not None and loaded[0] == mtime:
+        return loaded[1]
+
+    cache = cache_path(path)
+    try:
+        with open(cache, 'rb') as fo:
+            cached_key, compiled = pickle.load(fo)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        cached_key, compiled = (None, None, None, None), None
+
+    if cached_key[:3] != (CACHE_VERSION, str(path), mtime):
+        import hashlib
+
+        source = path.read_bytes()
+        key = (CACHE_VERSION, str(path), mtime, hashlib.sha256(source).hexdigest())
+        if cached_key[:2] != key[:2] or cached_key[3] != key[3]:
+            compiled = compile(source)
+        _write_cache(cache, key, compiled)
+
+    _loaded[path] = (mtime, compiled)
+    return compiled
+
+
+def load_tables(tables_path) -> dict:
+    """
+    Load compiled tables, see load_compiled. yaml is only imported when the tables have to be compiled.
+    Paths with a source set by set_source are not read at all, the source gives the tables.
+
+    Args:
+        tables_path (str | Path): path to the tables yaml file
+
+    Returns:
+        dict: compiled tables, see compile_tables
+    """
+    tables_path = Path(tables_path).resolve()
+    source = _sources.get(tables_path)
+    if source is not None:
+        return source()
+    return load_compiled(tables_path, compile_tables)
@@ -0,0 +1,181 @@
+import re
+from typing import Callable
+
+import dice_engine
+
+# Words with letters, apostrophes and hyphens, e.g. "you're", "brain-burn"
+WORD = re.compile(r"([A-Za-z][A-Za-z'\-]*)")
+
+DICE = re.compile(r'\{(.*?)\}')
+
+SUBJECT = {'male': 'he', 'female': 'she'}
+OBJECT = {'male': 'him', 'female': 'her'}
+POSSESSIVE = {'male': 'his', 'female': 'her'}
+
+# Second person words that do not depend on the role of 'you' in the sentence
+FIXED = {
+    'your': POSSESSIVE,
+    'yours': {'male': 'his', 'female': 'hers'},
+    'yourself': {'male': 'himself', 'female': 'herself'},
+    "you're": {'male': "he's", 'female': "she's"},
+    "you've": {'male': "he's", 'female': "she's"},
+    "you'll": {'male': "he'll", 'female': "she'll"},
+}
+
+# Present tense verbs of the tables in the third person
+CONJUGATION = {
+    'are': 'is', 'were': 'was', 'have': 'has', 'do': 'does', "don't": "doesn't",
+    'take': 'takes', 'enjoy': 'enjoys', 'work': 'works', 'hit': 'hits', 'keep': 'keeps',
+    'design': 'designs', 'rage': 'rages', 'think': 'thinks', 'swear': 'swears', 'know': 'knows',
+    'find': 'finds', 'need': 'needs', 'sweep': 'sweeps', 'invent': 'invents', 'like': 'likes',
+    'understand': 'understands', 'report': 'reports', 'brain-burn': 'brain-burns', 'engage': 'engages',
+    'sell': 'sells', 'learn': 'learns', 'live': 'lives', 'go': 'goes',
+}
+
+# Words after 'you' that make it the subject and stay as they are
+SUBJECT_WORDS = {
+    'will', 'must', 'may', 'can', 'could', 'would', 'should', 'did', 'got', 'had', 'decided', 'lived',
+    'grew', 'started', 'learned', 'screwed', 'escaped', 'went',
+}
+
+# 'you' meaning both sides, e.g. 'One of you was a romantic rival.', has no third person form
+MUTUAL = re.compile(r"\bone of you\b|\byou\b.*\beach other\b", re.IGNORECASE)
+
+# Tables about the character and another person, rendered as they are and never through person()
+RELATIONSHIP_TABLES = ('Friend', 'Enemy type', 'Enemy wrong', 'Enemy throw', 'Enemy meet', 'Love happened')
+
+# Adverbs that can stand between the subject and its verb
+ADVERBS = {'only', 'just', 'alone', 'usually', 'also', 'always', 'never', 'probably', 'definitely'}
+
+
+def _match_case(word: str, replacement: str) -> str:
+    return replacement[0].upper() + replacement[1:] if word[0].isupper() else replacement
+
+
+def third_person(text: str, sex: str) -> str:
+    """
+    Rewrite a table row about 'you' into the third person: 'you' becomes he/him or she/her
+    depending on its role in the sentence, 'your' his/her and so on, whole words only.
+    The present tense verb after a subject 'you' is conjugated.
+    Rows where 'you' means both sides (MUTUAL) are returned as they are.
+
+    Args:
+        text (str): table row
+        sex (str): 'male' or 'female'
+
+    Returns:
+        str: rewritten row
+    """
+    if MUTUAL.search(text):
+        return text
+
+    tokens = WORD.split(text) # separators at even, words at odd positions
+    for position in range(1, len(tokens), 2):
+        word = tokens[position]
+        lower = word.lower()
+        if lower in FIXED:
+            tokens[position] = _match_case(word, FIXED[lower][sex])
+            continue
+        if lower != 'you':
+            continue
+
+        # find the verb: skip adverbs separated by spaces only
+        verb = position + 2
+        while verb < len(tokens) and tokens[verb - 1] == ' ' and tokens[verb].lower() in ADVERBS:
+            verb += 2
+        is_verb = verb < len(tokens) and tokens[verb - 1] == ' '
+        next_word = tokens[verb].lower() if is_verb else None
+
+        if next_word in CONJUGATION:
+            tokens[position] = _match_case(word, SUBJECT[sex])
+            tokens[verb] = _match_case(tokens[verb], CONJUGATION[next_word])
+        elif next_word in SUBJECT_WORDS:
+            tokens[position] = _match_case(word, SUBJECT[sex])
+        else:
+            tokens[position] = _match_case(word, OBJECT[sex])
+
+    return ''.join(tokens)
+
+
+class Template(object):
+    """
+    Table row split at its {dice} expressions: literal parts and the expressions between them.
+    Rendering rolls the expressions and joins the parts.
+    """
+    __slots__ = ('parts', 'expressions')
+
+    def __init__(self, text: str) -> None:
+        pieces = DICE.split(text)
+        self.parts = tuple(pieces[0::2])
+        self.expressions = tuple(pieces[1::2])
+        for expression in self.expressions:
+            dice_engine.compile_expression(expression)
+
+    def render(self, roll: Callable = None) -> str:
+        """
+        Args:
+            roll (Callable): function rolling a dice expression, dice_engine.roll if not set
+
+        Returns:
+            str: row with the rolled numbers in place of the expressions
+        """
+        if not self.expressions:
+            return self.parts[0]
+
+        roll = roll or dice_engine.roll
+        pieces = [self.parts[0]]
+        for expression, part in zip(self.expressions, self.parts[1:]):
+            pieces.append(str(roll(expression)))
+            pieces.append(part)
+        return ''.join(pieces)
+
+
+class Templates(object):
+    """Templates compiled from all rows of a set of tables"""
+
+    def __init__(self, tables: dict) -> None:
+        self.dice = {}
+        self.persons = {}
+        for table_name, rows in tables.items():
+            if not isinstance(rows, tuple):
+                continue
+            self.dice[table_name] = tuple(Template(row) if isinstance(row, str) else None for row in rows)
+            if table_name in RELATIONSHIP_TABLES:
+                continue
+            for row in rows:
+                if isinstance(row, str) and row not in self.persons:
+                    self.persons[row] = {sex: third_person(row, sex) for sex in SUBJECT}
+
+    def person(self, text: str, sex: str) -> str:
+        """
+        Precomputed third_person variant of a table row.
+        """
+        variants = self.persons.get(text)
+        if variants is None:
+            return third_person(text, sex)
+        return variants['female' if sex == 'female' else 'male']
+
+
+# Templates of the tables loaded by this process, keyed by id of the tables
+_compiled = {}
+
+
+def load_templates(tables: dict) -> Templates:
+    """
+    Args:
+        tables (dict): compiled tables, see table_store.load_tables
+
+    Returns:
+        Templates: templates of the tables, compiled on first use
+    """
+    compiled = _compiled.get(id(tables))
+    if compiled is None or compiled[0] is not tables:
+        compiled = _compiled[id(tables)] = (tables, Templates(tables))
+    return compiled[1]
+
+
+def discard(tables: dict) -> None:
+    """Forget the templates of tables that will not be used again, e.g. replaced by a reload"""
+    compiled = _compiled.get(id(tables))
+    if compiled is not None and compiled[0] is tables:
+        del _compiled[id(tables)]
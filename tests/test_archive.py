@@ -0,0 +1,35 @@
+import sys
+sys.path.append('../')
+
+from archive import Archive, write_archive
+from parallel import generate_parallel
+
+
+def test_queries_match_the_characters(tmp_path):
+    characters = list(generate_parallel(600, workers=1, seed=4))
+    characters.append(next(generate_parallel(1, workers=1, seed=1, name='Johnny Silverhand', role='rockerboy')))
+    assert write_archive(tmp_path, characters) == len(characters)
+    archive = Archive(tmp_path)
+
+    def expected(check):
+        return [position for position, char in enumerate(characters) if check(char)]
+
+    exec_boss = next(char.boss for char in characters if char.role == 'exec')
+    pack_do = next(char.pack_do for char in characters if char.role == 'nomad')
+    queries = [
+        ({'role': 'exec', 'boss': exec_boss}, lambda char: char.role == 'exec' and char.boss == exec_boss),
+        ({'hairstyle': 1}, lambda char: char.hairstyle == 'Mohawk'),
+        ({'cultural_region': 'Central American'}, lambda char: char.cultural_region == 'Central American'),
+        ({'language': 'English', 'sex': 'female'}, lambda char: char.language == 'English' and char.sex == 'female'),
+        ({'pack_do': pack_do}, lambda char: char.role == 'nomad' and char.pack_do == pack_do),
+        ({'partner': None, 'role': ['tech', 'netrunner']}, lambda char: char.role in ('tech', 'netrunner')
+         and char.partner is None),
+        ({'in_group': True}, lambda char: char.role == 'rockerboy' and char.in_group),
+        ({'enemies': lambda counts: counts >= 2}, lambda char: len(char.enemies) >= 2),
+    ]
+    for conditions, check in queries:
+        assert archive.select(**conditions).tolist() == expected(check), conditions
+        assert archive.count(**conditions) == len(expected(check))
+
+    positions = archive.select(role='solo')[:5].tolist() + [len(characters) - 1]
+    assert list(archive.render(positions)) == [str(characters[position]) for position in positions]
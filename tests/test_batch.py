@@ -0,0 +1,33 @@
+import sys
+sys.path.append('../')
+
+from collections import Counter
+
+from batch import generate_batch
+from character_create import Solo
+
+
+def test_generate_batch_seeded():
+    first = [str(char) for char in generate_batch(50, seed=7)]
+    second = [str(char) for char in generate_batch(50, seed=7)]
+
+    assert first == second
+
+
+def test_generate_batch_role_and_sex():
+    characters = generate_batch(100, role='solo', sex='female', seed=1)
+
+    assert all(isinstance(char, Solo) for char in characters)
+    assert all(char.sex == 'female' for char in characters)
+
+
+def test_generate_batch_distribution():
+    characters = generate_batch(5000, role='nomad', seed=2)
+
+    # every row of a d10 table should come up about 1/10 of the time
+    counts = Counter(char.hairstyle for char in characters)
+    assert len(counts) == 10
+    assert all(400 < count < 600 for count in counts.values())
+
+    counts = Counter(char.pack_type for char in characters)
+    assert all(1500 < count < 1850 for count in counts.values())
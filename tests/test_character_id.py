@@ -0,0 +1,53 @@
+import sys
+sys.path.append('../')
+
+from pathlib import Path
+
+import pytest
+
+import character_id
+import name_pool
+from character_create import main
+from table_store import load_tables
+
+TABLES_PATH = Path(Path(__file__).parent, '../data/tables.yaml').resolve()
+
+
+def test_round_trip_every_role():
+    for role in load_tables(TABLES_PATH)['roles']:
+        for seed in range(20):
+            char = main(None, role, None, seed=seed)
+            rebuilt = character_id.character_from_id(char.id)
+
+            assert repr(rebuilt) == repr(char)
+            assert str(rebuilt) == str(char)
+            assert rebuilt.id == char.id
+
+
+def test_id_layout():
+    assert character_id.encode(3, 'female', 2 ** 64 - 1) == '0207ffffffffffffffff'
+    assert character_id.decode('0207ffffffffffffffff') == (2, 3, 'female', 2 ** 64 - 1)
+    assert main('Johnny Silverhand', 'rockerboy', 'male', seed=1).id is None
+
+
+def test_same_character_from_a_rebuilt_pool(tmp_path, monkeypatch):
+    chars = [main(None, role, None, seed=seed) for seed, role in enumerate(('solo', 'nomad', 'exec'))]
+
+    name_pool.build_pool(tmp_path / 'names.pool')
+    monkeypatch.setitem(name_pool._opened, name_pool.DEFAULT_PATH, name_pool.NamePool(tmp_path / 'names.pool'))
+    for char in chars:
+        assert repr(character_id.character_from_id(char.id)) == repr(char)
+
+
+def test_seed_rolls_are_stable():
+    rolls = character_id.seed_rolls(42)
+
+    assert [next(rolls) for _ in range(8)] == [1003, 1200, 1578, 964, 1292, 869, 772, 280]
+    assert all(0 <= next(rolls) < character_id.ROLL_RANGE for _ in range(1000))
+
+
+def test_bad_ids():
+    with pytest.raises(ValueError):
+        character_id.character_from_id('not an id')
+    with pytest.raises(ValueError):
+        character_id.character_from_id('ff07ffffffffffffffff')
@@ -5,13 +5,13 @@ from character_create import *
 # from ..character_create import Netrunner, Tech, Medtech, Lawmen, Nomad
 
 # import pytest
-import yaml
 from pathlib import Path
 
+from table_store import load_tables
+
 def test_character():
     tables_path = Path(Path(__file__).parent, '../data/tables.yaml').resolve()
-    with open(tables_path) as fo:
-        tables = yaml.safe_load(fo)
+    tables = load_tables(tables_path)
 
     for role in tables['roles']:
         role_class = globals()[role.capitalize()]
@@ -0,0 +1,48 @@
+import sys
+sys.path.append('../')
+
+import numpy as np
+import pytest
+
+from city import KINDS, generate_city, load_city
+
+
+def test_links_are_the_rolled_people():
+    city = generate_city(3000, seed=7)
+    for index in range(0, 3000, 97):
+        char = city.character(index)
+        for kind in KINDS:
+            targets = city.neighbors(index, kind).tolist()
+            assert len(targets) == len(getattr(char, kind))
+            assert index not in targets
+            for person, target in zip(getattr(char, kind), targets):
+                linked = city.character(target)
+                assert (person.name, person.sex) == (linked.name, linked.sex)
+                assert index in city.neighbors(target, kind, 'in')
+
+
+def test_same_city_for_any_workers(tmp_path):
+    city = generate_city(5000, seed=3)
+    other = generate_city(5000, seed=3, workers=2)
+    city.save(tmp_path)
+    for copy in (other, load_city(tmp_path)):
+        assert (copy.seeds == city.seeds).all()
+        for kind in KINDS:
+            assert all((np.asarray(mine) == np.asarray(theirs)).all()
+                       for mine, theirs in zip(city.links[kind], copy.links[kind]))
+    assert str(load_city(tmp_path).character(42)) == str(city.character(42))
+
+
+def test_path():
+    city = generate_city(2000, seed=1)
+    linked = [index for index in range(2000) if len(city.neighbors(index, direction='both')) > 2]
+    chain = city.path(linked[0], linked[-1])
+    assert chain[0] == linked[0] and chain[-1] == linked[-1]
+    for first, second in zip(chain, chain[1:]):
+        assert second in city.neighbors(first, direction='both')
+    assert city.path(5, 5) == [5]
+
+    loner = next(index for index in range(2000) if not len(city.neighbors(index, 'love', 'both')))
+    assert city.path(loner, 0 if loner else 1, 'love') is None
+    with pytest.raises(ValueError):
+        city.neighbors(0, 'rivals')
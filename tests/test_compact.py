@@ -0,0 +1,31 @@
+import sys
+sys.path.append('../')
+
+from compact import CompactCharacter
+from parallel import generate_parallel
+from table_store import load_tables
+from pathlib import Path
+
+TABLES_PATH = Path(Path(__file__).parent, '../data/tables.yaml').resolve()
+
+
+def test_compact_round_trip():
+    for role in load_tables(TABLES_PATH)['roles']:
+        for char in generate_parallel(40, workers=1, seed=9, role=role):
+            compact = CompactCharacter.from_character(char)
+
+            assert str(compact) == str(char)
+            assert compact.hairstyle == char.hairstyle
+            assert compact.character_type == char.character_type
+            assert repr(compact.enemies) == repr(char.enemies)
+            assert sys.getsizeof(compact) + sys.getsizeof(compact.data) < 200
+
+
+def test_custom_name_and_slots():
+    char = next(generate_parallel(1, workers=1, seed=1, name='Johnny Silverhand', role='rockerboy'))
+    compact = CompactCharacter.from_character(char)
+
+    assert compact.name == 'Johnny Silverhand'
+    assert str(compact) == str(char)
+    assert not hasattr(compact, '__dict__')
+    assert all(not hasattr(person, '__dict__') for person in char.friends + char.enemies + char.love)
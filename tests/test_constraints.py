@@ -0,0 +1,75 @@
+import sys
+sys.path.append('../')
+
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+import constraints
+import probability
+from character_create import choose_weighted, from_seed, main
+from table_store import load_tables
+
+TABLES_PATH = Path(Path(__file__).parent, '../data/tables.yaml').resolve()
+
+
+def test_fixed_fields():
+    where = {'role': 'Solo', 'hairstyle': 'mohawk', 'cultural_region': 'East Asian',
+             'life_goals': 'Gain power and control.', 'gunning': 'A Fixer who sees you as a threat'}
+    for char in constraints.generate(50, where, seed=1):
+        assert (char.role, char.hairstyle, char.cultural_region) == ('solo', 'Mohawk', 'East Asian')
+        assert char.life_goals == 'Gain power and control.'
+        assert char.gunning == 'A Fixer who sees you as a threat'
+        assert char.id is None
+        assert "A Fixer who sees " in str(char)
+
+    assert len({str(char) for char in constraints.generate(20, {'sex': 'female'}, seed=2)}) == 20
+
+
+def test_region_given_language_is_exact():
+    samples = 4000
+    counts = Counter(main(None, None, None, where={'language': 'English'}).cultural_region
+                     for _ in range(samples))
+    exact = {region: share for (region, language), share in
+             probability.joint(('cultural_region', 'language')).items() if language == 'English'}
+    total = sum(exact.values())
+
+    assert set(counts) == set(exact)
+    for region, share in exact.items():
+        assert abs(counts[region] / samples - share / total) < 0.025
+
+
+def test_language_on_seeded_rolls():
+    tables = load_tables(TABLES_PATH)
+    for seed in range(50):
+        char = from_seed(None, 'tech', 'male', tables, seed, {'Languages': 'English'})
+        assert char.language == 'English'
+        assert repr(char) == repr(from_seed(None, 'tech', 'male', tables, seed, {'Languages': 'English'}))
+
+
+def test_choose_weighted():
+    assert choose_weighted('abc', [1, 0, 2], iter([0, 1, 2, 5])) == 'a'
+    assert choose_weighted('abc', [1, 0, 2], iter([2])) == 'c'
+    assert choose_weighted('ab', [1, 999], iter([2500, 2000, 1])) == 'b' # rolls from 2000 are skipped
+    assert Counter(choose_weighted('ab', [1, 3]) for _ in range(4000))['b'] > 2800
+    # total over ROLL_RANGE: two raw rolls make one number below 2520 ** 2
+    assert choose_weighted('ab', [3000, 2819], iter([1, 0])) == 'a' # 1 * 2520 + 0 < 3000
+    assert choose_weighted('ab', [3000, 2819], iter([1, 500])) == 'b'
+    assert choose_weighted('ab', [6000, 11638], iter([2519, 2519, 0, 5])) == 'a' # 2520 ** 2 - 1 is skipped
+    assert choose_weighted('ab', [2, 4], iter([1])) == 'b' # reduced to 1, 2
+
+
+def test_bad_constraints():
+    assert constraints.parse_where(['cultural_region = East Asian', 'a=b=c']) == {'cultural_region': 'East Asian',
+                                                                                 'a': 'b=c'}
+    with pytest.raises(ValueError):
+        constraints.parse_where(['hairstyle'])
+    with pytest.raises(ValueError, match='without a role'):
+        constraints.resolve({'gunning': 'A Fixer who sees you as a threat'})
+    with pytest.raises(ValueError, match='Choose from'):
+        constraints.resolve({'hairstyle': 'Dreadlocks'})
+    with pytest.raises(ValueError, match='contradicts'):
+        constraints.resolve({'role': 'nomad'}, 'solo')
+    with pytest.raises(ValueError, match='No cultural origin'):
+        constraints.resolve({'cultural_region': 'East Asian', 'language': 'Hindi'})
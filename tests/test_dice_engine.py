@@ -0,0 +1,35 @@
+import sys
+sys.path.append('../')
+
+import pytest
+
+import dice_engine
+
+
+def test_roll_ranges():
+    dice_engine.seed(1)
+    for expression, expected in [('1d10t', range(1, 11)), ('1d6/2', range(0, 4)), ('1d10 + 5', range(6, 16)),
+                                 ('2d6', range(2, 13)), ('(1d3 + 1) * 2', (4, 6, 8))]:
+        results = {dice_engine.roll(expression) for _ in range(2000)}
+        assert results == set(expected)
+
+
+def test_seed_repeats_rolls():
+    dice_engine.seed(42)
+    first = [dice_engine.roll('1d10t') for _ in range(20)]
+    dice_engine.seed(42)
+
+    assert first == [dice_engine.roll('1d10t') for _ in range(20)]
+
+
+def test_compiled_once_and_custom_die():
+    assert dice_engine.compile_expression('1d6/2') is dice_engine.compile_expression('1d6/2')
+    assert dice_engine.roll('1d10/2', lambda sides: 7) == 3
+    assert dice_engine.roll('3d6 - 1', lambda sides: 6) == 17
+
+
+def test_bad_expression():
+    with pytest.raises(ValueError):
+        dice_engine.roll('1d6 +')
+    with pytest.raises(ValueError):
+        dice_engine.roll('1d6 % 2')
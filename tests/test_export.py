@@ -0,0 +1,35 @@
+import sys
+sys.path.append('../')
+
+import csv
+import json
+
+from export import CSV_COLUMNS, character_record, export
+from parallel import generate_parallel
+
+
+def test_character_record():
+    char = next(generate_parallel(1, workers=1, seed=2, role='exec'))
+    record = character_record(char)
+
+    assert 'tables' not in record and 'rolls' not in record
+    assert record['boss'] == char.boss
+    assert all(isinstance(enemy, dict) for enemy in record['enemies'])
+    assert len(record['enemies']) == len(char.enemies)
+
+
+def test_export_formats(tmp_path):
+    for format in ('jsonl', 'csv', 'text'):
+        path = tmp_path / f'characters.{format}'
+        export(generate_parallel(30, workers=1, seed=5), format, path)
+
+        with open(path, newline='') as fo:
+            if format == 'jsonl':
+                records = [json.loads(line) for line in fo]
+                assert len(records) == 30
+            elif format == 'csv':
+                rows = list(csv.DictReader(fo))
+                assert len(rows) == 30
+                assert list(rows[0]) == CSV_COLUMNS
+            else:
+                assert fo.read().count('Name: ') == 30
@@ -0,0 +1,26 @@
+import sys
+sys.path.append('../')
+
+from pathlib import Path
+
+import golden
+from table_store import load_tables
+
+TABLES_PATH = Path(Path(__file__).parent, '../data/tables.yaml').resolve()
+
+
+def test_same_output_as_the_corpus():
+    differences = golden.verify(count=2 * golden.CHUNK_SIZE)
+    assert not differences, '\n'.join(differences)
+
+
+def test_changes_are_told(monkeypatch):
+    tables = load_tables(TABLES_PATH)
+    monkeypatch.setitem(tables, 'Hairstyle', tuple(row + '!' for row in tables['Hairstyle']))
+
+    differences = golden.verify(count=golden.CHUNK_SIZE)
+    assert "chunk 0 (characters 0-2047): field 'hairstyle' (rolled on Hairstyle) changed" in differences
+    assert 'chunk 0 (characters 0-2047): text changed' in differences
+    assert not any('rolls' in difference or "field 'affectation'" in difference for difference in differences)
+    sample = next(difference for difference in differences if difference.startswith('sample 0 '))
+    assert "field 'hairstyle' (rolled on Hairstyle) was '" in sample and sample.endswith("!'")
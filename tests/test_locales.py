@@ -0,0 +1,48 @@
+import sys
+sys.path.append('../')
+
+import re
+
+import pytest
+
+import locales
+import name_pool
+from character_create import main
+
+
+def test_english_frames_are_str():
+    for seed in range(300):
+        char = main(None, None, None, seed=seed)
+        assert locales.render(char) == str(char)
+        assert locales.render(char, 'en') == str(char)
+
+
+def test_russian_render():
+    for seed in range(200):
+        char = main(None, None, None, seed=seed)
+        text = locales.render(char, 'ru')
+        assert not re.search('[A-Za-z]', text), text
+        name = text.split('\n', 1)[0]
+        assert re.search('[А-Яа-яЁё]', name)
+
+    rockerboy = main(None, 'rockerboy', 'female', seed=1)
+    assert 'Роль: Рокербой.' in locales.render(rockerboy, 'ru')
+
+
+def test_same_name_position():
+    char = main(None, None, 'male', seed=3)
+    name = locales.render(char, 'ru').split('\n', 1)[0][len('Имя: '):-len(' (мужчина)')]
+    position = name_pool.load_pool().index_of(char.cultural_region, 'male', char.name)
+    assert name_pool.load_pool(locale='ru_RU').index_of(char.cultural_region, 'male', name) == position
+    assert locales.render(main('Vik Vektor', None, 'male', seed=3), 'ru').startswith('Имя: Vik Vektor (мужчина)')
+
+
+def test_dice_rows_keep_numbers():
+    locale = locales.load_locale('ru', main(None, None, None, seed=0).tables)
+    assert locale.convert('Themselves and 4 friends.', ('dice',), 'male') == 'Сам враг и 4 друзей.'
+    assert locale.convert('An entire gang (at least 12 people).', ('dice',), 'male') == 'Целая банда (не меньше 12 человек).'
+
+
+def test_unknown_locale():
+    with pytest.raises(ValueError):
+        locales.render(main(None, None, None, seed=0), 'xx')
@@ -0,0 +1,31 @@
+import sys
+sys.path.append('../')
+
+from name_pool import POOL_SEED, REGION_LOCALES, NamePool, build_pool, load_pool
+
+
+def test_build_and_read_pool(tmp_path):
+    path = tmp_path / 'names.pool'
+    build_pool(path, size=12)
+    pool = NamePool(path)
+
+    for region in REGION_LOCALES:
+        for sex in ('male', 'female'):
+            assert pool.size(region, sex) == 12
+            names = [pool.name(region, sex, index) for index in range(12)]
+            assert all(name and ' ' in name for name in names)
+
+
+def test_sample_by_rolls():
+    pool = load_pool()
+
+    assert pool.sample('East Asian', 'female', iter([5])) == pool.name('East Asian', 'female', 5)
+    assert load_pool() is pool
+
+
+def test_builds_are_the_same(tmp_path):
+    build_pool(tmp_path / 'first.pool', size=12)
+    build_pool(tmp_path / 'second.pool', size=12)
+
+    assert (tmp_path / 'first.pool').read_bytes() == (tmp_path / 'second.pool').read_bytes()
+    assert NamePool(tmp_path / 'first.pool').index['seed'] == POOL_SEED
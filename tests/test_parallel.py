@@ -0,0 +1,32 @@
+import sys
+sys.path.append('../')
+
+import name_pool
+from character_create import Character
+from parallel import CHUNK_SIZE, generate_parallel
+
+
+def test_same_output_for_any_number_of_workers():
+    count = CHUNK_SIZE + 10
+    single = list(generate_parallel(count, workers=1, seed=3, render=str))
+    several = list(generate_parallel(count, workers=2, seed=3, render=str))
+
+    assert len(single) == count
+    assert single == several
+    assert single != list(generate_parallel(count, workers=1, seed=4, render=str))
+
+
+def test_characters_come_back_with_tables():
+    characters = list(generate_parallel(20, workers=2, seed=1, role='medtech'))
+
+    assert all(isinstance(char, Character) and char.tables for char in characters)
+    assert [str(char) for char in characters] == list(generate_parallel(20, workers=1, seed=1,
+                                                                         role='medtech', render=str))
+
+
+def test_same_output_with_a_rebuilt_pool(tmp_path, monkeypatch):
+    expected = list(generate_parallel(40, workers=1, seed=5, render=str))
+
+    name_pool.build_pool(tmp_path / 'names.pool')
+    monkeypatch.setitem(name_pool._opened, name_pool.DEFAULT_PATH, name_pool.NamePool(tmp_path / 'names.pool'))
+    assert list(generate_parallel(40, workers=1, seed=5, render=str)) == expected
@@ -0,0 +1,43 @@
+import sys
+sys.path.append('../')
+
+import re
+import zlib
+
+import pdf
+from character_create import main
+
+
+def _objects(data: bytes) -> dict:
+    return {int(number): body for number, body in re.findall(rb'(\d+) 0 obj\n(.*?)\nendobj', data, re.S)}
+
+
+def test_book_structure(tmp_path):
+    pages = pdf.write_pdf((main(None, None, None, seed=seed) for seed in range(40)), tmp_path / 'book.pdf')
+    data = (tmp_path / 'book.pdf').read_bytes()
+    objects = _objects(data)
+
+    assert data.startswith(b'%PDF-1.4') and data.endswith(b'%%EOF\n')
+    assert pages > 1
+    assert b'/Count %d' % pages in objects[pdf.PAGES]
+    assert data.count(b'/Type /Font') == len(pdf.FONTS) # declared once, shared by every page
+    assert data.count(b'/Resources %d 0 R' % pdf.RESOURCES) == pages
+
+    xref = int(data.rsplit(b'startxref\n', 1)[1].split()[0])
+    entries = data[xref:].split(b'\n')[3:3 + len(objects)]
+    for number, entry in enumerate(entries, 1):
+        assert data[int(entry[:10]):].startswith(b'%d 0 obj' % number)
+
+    text = b''.join(zlib.decompress(re.search(rb'stream\n(.*?)\nendstream', body, re.S).group(1))
+                    for body in objects.values() if body.startswith(b'<< /Length'))
+    assert pdf._pdf_string(main(None, None, None, seed=39).name)[:-1] in text
+
+
+def test_same_book_for_any_number_of_workers(tmp_path):
+    assert pdf.export_pdf(30, tmp_path / 'one.pdf', 1, seed=5) == pdf.export_pdf(30, tmp_path / 'two.pdf', 2, seed=5)
+    assert (tmp_path / 'one.pdf').read_bytes() == (tmp_path / 'two.pdf').read_bytes()
+
+
+def test_text():
+    assert pdf._pdf_string('Łukasz (a\\b)') == b'(Lukasz \\(a\\\\b\\))'
+    assert pdf.wrap('a b c', 10, pdf.text_width('a b', 10)) == ['a b', 'c']
@@ -0,0 +1,48 @@
+import sys
+sys.path.append('../')
+
+import dataclasses
+from collections import Counter
+from fractions import Fraction
+
+import character_create
+import probability
+from character_create import main
+
+ROLES = ('rockerboy', 'solo', 'netrunner', 'tech', 'medtech', 'media', 'exec', 'lawman', 'fixer', 'nomad')
+
+UNROLLED = {'name', 'class_name', 'message_role', 'rolls', 'tables', 'id', 'constraints'}
+
+
+def test_fields_cover_the_roles():
+    for role in ROLES:
+        cls = getattr(character_create, role.capitalize())
+        assert set(probability.fields(role)) == {field.name for field in dataclasses.fields(cls)} - UNROLLED
+        for field in probability.fields(role):
+            assert sum(probability.marginal(field, role).values()) == 1
+
+
+def test_exact_values():
+    assert probability.marginal('enemies') == {0: Fraction(7, 10), 1: Fraction(1, 10),
+                                               2: Fraction(1, 10), 3: Fraction(1, 10)}
+    assert probability.marginal('leave', 'rockerboy')[None] == Fraction(3, 4)
+    assert probability.marginal('division', 'exec')['Publicity'] == Fraction(1, 18)
+    assert probability.probability('nomad', pack_type='sea') == Fraction(1, 3)
+    assert probability.probability(role='nomad') == 1
+    assert probability.marginal('role')['solo'] == Fraction(1, 10)
+    assert probability.expression_distribution('1d6/2') == {0: Fraction(1, 6), 1: Fraction(1, 3),
+                                                            2: Fraction(1, 3), 3: Fraction(1, 6)}
+    assert sum(probability.person_marginal('Enemy', 'throw').values()) == 1
+
+
+def test_matches_generated_characters():
+    samples = 3000
+    pack_types = Counter()
+    leaves = Counter()
+    for seed in range(samples):
+        pack_types[main(None, 'nomad', None, seed=seed).pack_type] += 1
+        leaves[main(None, 'rockerboy', None, seed=seed).leave is None] += 1
+
+    for pack_type, exact in probability.marginal('pack_type', 'nomad').items():
+        assert abs(pack_types[pack_type] / samples - exact) < 0.04
+    assert abs(leaves[True] / samples - 3 / 4) < 0.04
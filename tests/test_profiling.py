@@ -0,0 +1,28 @@
+import sys
+sys.path.append('../')
+
+import character_create
+import profiling
+
+
+def test_stages_by_role_and_hooks():
+    original = character_create.roll_die
+    calls = []
+    profiling.reset()
+    profiling.enable('json', character_create)
+    profiling.add_hook(lambda role, stage, seconds: calls.append((role, stage)))
+    try:
+        char = character_create.main(None, 'tech', 'female', seed=1)
+        str(char)
+        stats = profiling.snapshot()
+    finally:
+        profiling.disable()
+        profiling._hooks.clear()
+        profiling.reset()
+
+    assert set(stats) == {'Tech'}
+    assert {'dice', 'table lookup', 'naming', 'relationships', 'rendering', 'other'} <= set(stats['Tech'])
+    assert stats['Tech']['other']['calls'] == 1 # Character __post_init__, roles have no code of their own
+    assert len(calls) == sum(stage['calls'] for stage in stats['Tech'].values())
+    assert character_create.roll_die is original
+    assert 'timed' not in character_create.Tech.__post_init__.__name__
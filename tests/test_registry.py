@@ -0,0 +1,73 @@
+import sys
+sys.path.append('../')
+
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+import registry
+from character_create import main
+from table_store import ROW_INDEX, compile_tables, load_tables
+
+TABLES = Path(__file__).parent.parent / 'data' / 'tables.yaml'
+
+
+def _edit(path: Path, old: str, new: str) -> None:
+    stat = path.stat()
+    path.write_text(path.read_text().replace(old, new))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def _first_gunning(tables_path) -> str:
+    return load_tables(tables_path)['Solo Gunning'][0]
+
+
+@pytest.fixture
+def tables_path(tmp_path):
+    path = tmp_path / 'tables.yaml'
+    shutil.copy(TABLES, path)
+    return path
+
+
+def test_reload_compiles_only_changed_tables(tables_path):
+    tables_registry = registry.TableRegistry({'street': tables_path})
+    try:
+        shared = registry.SharedTables(tables_registry.prefix, 'street')
+        before = tables_registry.tables('street')
+        assert shared() == before == compile_tables(tables_path.read_bytes())
+        assert tables_registry.refresh() == []
+
+        _edit(tables_path, 'A Corporation you may have angered', 'A Corporation you robbed')
+        assert tables_registry.refresh() == ['street']
+        after = tables_registry.tables('street')
+        assert after['Hairstyle'] is before['Hairstyle']
+        assert after == compile_tables(tables_path.read_bytes())
+        assert shared() == after and shared.version == tables_registry.version('street') == 2
+        assert after[ROW_INDEX]['Solo Gunning']['A Corporation you robbed'] == (0,)
+        assert main(None, 'solo', None, tables_path) # generated from the registry
+
+        _edit(tables_path, '  6: A rival Solo who sees you as their nemesis\n', '')
+        with pytest.warns(RuntimeWarning):
+            assert tables_registry.refresh() == []
+        assert tables_registry.tables('street') is after and shared() == after and shared.version == 2
+    finally:
+        tables_registry.close()
+    with pytest.raises(ValueError): # from the file again
+        load_tables(tables_path)
+
+
+def test_workers_see_reloads(tables_path):
+    tables_registry = registry.TableRegistry({'default': TABLES, 'street': tables_path})
+    try:
+        with ProcessPoolExecutor(1, initializer=registry.attach,
+                                 initargs=(tables_registry.prefix, tables_registry.paths)) as executor:
+            assert executor.submit(_first_gunning, tables_path).result() == 'A Corporation you may have angered'
+            _edit(tables_path, 'A Corporation you may have angered', 'A Corporation you robbed')
+            tables_registry.refresh()
+            assert executor.submit(_first_gunning, tables_path).result() == 'A Corporation you robbed'
+            assert executor.submit(_first_gunning, TABLES).result() == 'A Corporation you may have angered'
+    finally:
+        tables_registry.close()
@@ -0,0 +1,50 @@
+import sys
+sys.path.append('../')
+
+import pickle
+
+import pytest
+
+from character_create import main
+from reroll import dependents, reroll, rerollable
+
+
+def test_text_follows_the_fields():
+    for seed in range(100):
+        char = main(None, None, None, seed=seed)
+        for position, field in enumerate(rerollable(char)):
+            reroll(char, field, seed=seed * 100 + position)
+            cached = str(char)
+            del char.text_cache
+            assert cached == str(char), field
+            reroll(char, field)
+
+
+def test_only_the_field_and_its_dependents_change():
+    char = main(None, 'rockerboy', None, seed=4)
+    assert dependents(char.role_spec, 'in_group') == ['in_group', 'were_in_group', 'leave']
+    before = dict(char.__dict__)
+    for seed in range(20):
+        assert reroll(char, 'in_group', seed=seed) == ['in_group', 'were_in_group', 'leave']
+        if char.in_group:
+            assert char.were_in_group is None and char.leave is None
+        assert [name for name in before if name not in ('in_group', 'were_in_group', 'leave', 'message_role', 'id',
+                                                        'text_cache')
+                and char.__dict__[name] is not before[name]] == []
+    assert char.id is None
+
+    nomad = main(None, 'nomad', None, seed=1)
+    assert reroll(nomad, 'pack_type', seed=1) == ['pack_type', 'pack_do']
+    assert nomad.pack_do in nomad.tables['Nomad ' + nomad.pack_type.capitalize()]
+    assert reroll(nomad, 'cultural_region', seed=1) == ['cultural_region', 'language']
+
+
+def test_seeded_reroll():
+    first, second = main(None, 'fixer', None, seed=2), main(None, 'fixer', None, seed=2)
+    reroll(first, 'office', seed=8)
+    reroll(second, 'office', seed=8)
+    assert str(first) == str(second)
+    assert 'text_cache' not in pickle.loads(pickle.dumps(first)).__dict__
+
+    with pytest.raises(ValueError):
+        reroll(first, 'boss')
@@ -0,0 +1,70 @@
+import sys
+sys.path.append('../')
+
+from pathlib import Path
+
+import pytest
+
+import roles
+from character_create import ROLE_CLASSES, main, from_seed
+from table_store import load_tables
+
+TABLES_PATH = Path(Path(__file__).parent, '../data/tables.yaml').resolve()
+
+
+def test_every_role_has_a_spec():
+    tables = load_tables(TABLES_PATH)
+    assert sorted(roles.ROLES) == sorted(tables['roles'])
+    for role in roles.ROLES.values():
+        for field, kind, source, when in role.steps:
+            names = source[1].values() if kind == 'row_by' else () if kind == 'choice' else (source,)
+            for name in names:
+                assert tables[name], name
+
+
+def test_steps_fill_fields():
+    for seed in range(200):
+        char = main(None, 'rockerboy', None, seed=seed)
+        if char.in_group:
+            assert char.were_in_group is None and char.leave is None
+        elif not char.were_in_group:
+            assert char.leave is None
+        else:
+            assert char.leave in char.tables['Rockerboy Leave']
+
+        nomad = main(None, 'nomad', None, seed=seed)
+        assert nomad.character_type == ''
+        assert nomad.pack_do in char.tables['Nomad ' + nomad.pack_type.capitalize()]
+
+
+def test_role_from_spec_only():
+    spec = b"""
+Fixer:
+  fields: [character_type, office, clients]
+  steps:
+  - {field: character_type, table: Type}
+  - {field: office, table: Office}
+  - {field: clients, table: Side Clients, when: {office: nowhere}}
+  frame: "Office: {office}\\n"
+"""
+    role = roles.compile_roles(spec)['Fixer']
+    assert [field for field, default in role.fields] == ['character_type', 'office', 'clients']
+    assert role.steps[2] == ('clients', 'row', 'Fixer Side Clients', ('office', 'nowhere'))
+
+
+@pytest.mark.parametrize('step', [
+    '{field: a, table: Type, split: true, flag: true}',
+    '{field: a}',
+    '{field: a, table: Type, when: {b: 1}}',
+    '{field: a, by: b, table: {x: X}}',
+    '{field: a, table: Type, color: red}',
+])
+def test_bad_step(step):
+    with pytest.raises(ValueError):
+        roles.compile_roles(f'Fixer:\n  steps:\n  - {step}\n'.encode())
+
+
+def test_unknown_role():
+    with pytest.raises(ValueError):
+        from_seed(None, 'courier', None, load_tables(TABLES_PATH), 0)
+    assert set(ROLE_CLASSES) == set(roles.ROLES)
@@ -0,0 +1,73 @@
+import sys
+sys.path.append('../')
+
+import asyncio
+import json
+
+import dice_engine
+from character_create import main
+from export import to_jsonl
+from parallel import CHUNK_SIZE, generate_parallel
+from server import Server
+
+
+async def _get(port: int, target: str) -> tuple:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {target} HTTP/1.1\r\nConnection: close\r\n\r\n'.encode())
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b'\r\n\r\n')
+    if b'Transfer-Encoding: chunked' in head:
+        chunks = bytearray()
+        while True:
+            size, _, body = body.partition(b'\r\n')
+            if not int(size, 16):
+                break
+            chunks += body[:int(size, 16)]
+            body = body[int(size, 16) + 2:]
+        body = bytes(chunks)
+    return int(head.split()[1]), body
+
+
+def _run(*targets) -> list:
+    async def requests():
+        server = Server(workers=1)
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return [await _get(port, target) for target in targets]
+        finally:
+            listener.close()
+            server.close()
+
+    return asyncio.run(requests())
+
+
+def test_character_and_batch():
+    count = CHUNK_SIZE + 3
+    (status, body), (batch_status, batch) = _run('/character?role=nomad&sex=female&seed=5',
+                                                  f'/batch?n={count}&seed=2&role=tech')
+
+    assert status == 200
+    record = json.loads(body)
+    assert record['role'] == 'nomad' and record['sex'] == 'female'
+    assert record['id'] == main(None, 'nomad', 'female', seed=5).id
+
+    assert batch_status == 200
+    assert batch.decode() == ''.join(generate_parallel(count, workers=1, seed=2, role='tech', render=to_jsonl))
+
+
+def test_seeded_character_leaves_shared_rng_alone():
+    state = dice_engine.rng.getstate()
+    (status, body), = _run('/character?seed=1')
+
+    assert status == 200
+    assert dice_engine.rng.getstate() == state
+
+
+def test_bad_requests():
+    responses = _run('/character?role=pilot', '/batch?n=0', '/character?seed=x', '/nowhere')
+
+    assert [status for status, _ in responses] == [400, 400, 400, 404]
+    assert 'pilot' in json.loads(responses[0][1])['error']
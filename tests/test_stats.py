@@ -0,0 +1,31 @@
+import sys
+sys.path.append('../')
+
+from collections import Counter
+
+from parallel import CHUNK_SIZE, generate_parallel
+from stats import Stats, collect_stats
+
+
+def test_counts_match_the_characters():
+    count = CHUNK_SIZE + 50
+    characters = list(generate_parallel(count, workers=1, seed=2))
+    stats = collect_stats(count, workers=1, seed=2)
+
+    assert stats.count == count
+    assert stats.histograms['role'] == Counter(char.class_name for char in characters)
+    assert stats.histograms['language'] == Counter(char.language for char in characters)
+    assert stats.histograms['enemies'] == Counter(len(char.enemies) for char in characters)
+    assert stats.histograms['enemy_throw'] == Counter(enemy.throw for char in characters for enemy in char.enemies)
+    assert collect_stats(count, workers=2, seed=2).to_dict() == stats.to_dict()
+
+
+def test_merge():
+    characters = list(generate_parallel(100, workers=1, seed=9, role='nomad'))
+    whole, first, second = Stats(), Stats(), Stats()
+    for position, char in enumerate(characters):
+        whole.add(char)
+        (first if position < 30 else second).add(char)
+
+    assert first.merge(second).to_dict() == whole.to_dict()
+    assert whole.report().startswith('Characters: 100\n\nrole (1 values, 100 counted)\n         100 100.00%  Nomad')
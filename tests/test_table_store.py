@@ -0,0 +1,27 @@
+import sys
+sys.path.append('../')
+
+import pytest
+from pathlib import Path
+
+from table_store import ROW_INDEX, compile_tables, load_tables
+
+TABLES_PATH = Path(Path(__file__).parent, '../data/tables.yaml').resolve()
+
+
+def test_load_tables_cached():
+    tables = load_tables(TABLES_PATH)
+
+    assert tables is load_tables(TABLES_PATH)
+    assert tables['Hairstyle'][0] == 'Mohawk'
+    assert isinstance(tables['Family Background'][0], tuple)
+    assert tables[ROW_INDEX]['Hairstyle']['Mohawk'] == (0,)
+    assert tables[ROW_INDEX]['Cultural Region']['Central American'] == (1,)
+    assert tables[ROW_INDEX]['Languages']['Spanish'] == (0, 1, 2)
+
+
+def test_die_size_mismatch():
+    source = TABLES_PATH.read_bytes().replace(b'  6: Dirty Cops', b'')
+
+    with pytest.raises(ValueError, match='Nomad Pack Gunning'):
+        compile_tables(source)
@@ -0,0 +1,54 @@
+import sys
+sys.path.append('../')
+
+import re
+from pathlib import Path
+
+import templates
+from table_store import load_tables
+
+TABLES_PATH = Path(__file__).parent.parent / 'data' / 'tables.yaml'
+
+
+def test_third_person_whole_words():
+    assert templates.third_person('Your Boss gives you a free hand.', 'female') == 'Her Boss gives her a free hand.'
+    assert templates.third_person("Get what's rightfully yours.", 'male') == "Get what's rightfully his."
+    assert templates.third_person('Yourself', 'male') == 'Himself'
+    assert templates.third_person('Asia Pop (Youthful)', 'male') == 'Asia Pop (Youthful)'
+
+
+def test_third_person_subject_verbs():
+    assert templates.third_person('You are the only one; you must go.', 'male') == 'He is the only one; he must go.'
+    assert templates.third_person("You just don't like it.", 'female') == "She just doesn't like it."
+    assert templates.third_person("Lawmen who think you're guilty", 'male') == "Lawmen who think he's guilty"
+
+
+def test_mutual_rows_left_alone():
+    assert templates.third_person('One of you was a romantic rival.', 'male') == 'One of you was a romantic rival.'
+    assert templates.third_person("You just don't like each other.", 'female') == "You just don't like each other."
+    assert templates.third_person('Different divisions in your own company are feuding with each other.',
+                                  'female') == 'Different divisions in her own company are feuding with each other.'
+
+    compiled = templates.load_templates(load_tables(TABLES_PATH))
+    assert 'One of you was a business rival.' not in compiled.persons
+    assert compiled.person("You just don't like each other.", 'male') == "You just don't like each other."
+
+
+def test_no_second_person_left():
+    compiled = templates.load_templates(load_tables(TABLES_PATH))
+    for variants in compiled.persons.values():
+        for text in variants.values():
+            assert not re.search(r"\byou(r|rs|rself|'re)?\b", text, re.IGNORECASE), text
+            assert 'hisr' not in text and 'herr' not in text
+
+
+def test_dice_template():
+    template = templates.Template('An entire gang (at least {1d10 + 5} people).')
+    assert template.expressions == ('1d10 + 5',)
+    assert template.render(lambda expression: 9) == 'An entire gang (at least 9 people).'
+    assert templates.Template('Just themselves.').render() == 'Just themselves.'
+
+
+def test_templates_cached_per_tables():
+    tables = load_tables(TABLES_PATH)
+    assert templates.load_templates(tables) is templates.load_templates(tables)
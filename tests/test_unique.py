@@ -0,0 +1,46 @@
+import sys
+sys.path.append('../')
+
+import pytest
+
+import unique
+
+
+def test_distinct_and_seeded():
+    characters = unique.generate_unique(300, 'nomad', seed=2)
+    keys = {unique.roll_key(char) for char in characters}
+
+    assert len(keys) == 300
+    assert [char.id for char in characters] == [char.id for char in
+                                                unique.generate_unique(300, 'nomad', seed=2, index='bloom')]
+
+
+def test_hash_collisions_keep_distinct_characters(monkeypatch):
+    monkeypatch.setattr(unique, 'key_hash', lambda key: 7)
+    for index in unique.INDEXES:
+        characters = unique.generate_unique(20, 'exec', seed=1, index=index)
+        assert len({unique.roll_key(char) for char in characters}) == 20
+
+
+def test_indexes():
+    for seen in (unique.HashSetIndex(2), unique.BloomIndex(2, 0.01)):
+        assert seen.candidates(2 ** 64 - 1) == []
+        for position in range(5): # over capacity
+            seen.add(position * 2 ** 40, position)
+        assert seen.candidates(3 * 2 ** 40) == [3]
+
+
+def test_combination_space():
+    assert unique.combination_space('nomad') > 10 ** 30
+    assert unique.combination_space() == sum(unique.combination_space(role) for role in
+                                             ('rockerboy', 'solo', 'netrunner', 'tech', 'medtech', 'media',
+                                              'exec', 'lawman', 'fixer', 'nomad'))
+    assert unique.combination_space('tech', 'male') * 2 == pytest.approx(unique.combination_space('tech'), rel=0.1)
+
+
+def test_warns_near_the_combination_space(monkeypatch):
+    monkeypatch.setattr(unique, 'combination_space', lambda *args: 15)
+    with pytest.warns(RuntimeWarning):
+        assert len(unique.generate_unique(5, 'solo', seed=1)) == 5
+    with pytest.raises(ValueError):
+        unique.generate_unique(16, 'solo')
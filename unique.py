@@ -0,0 +1,212 @@
+"""Generation of distinct characters.
+
+Two characters are the same when their compact roll vectors (compact.CompactCharacter.data)
+are equal: same role, sex, name and the same row or choice for every roll.
+Each new character is hashed to 64 bits from that vector and looked up in an index of
+the characters kept so far; on a hit the vectors of the kept characters are built again
+and compared, so a collision never drops a distinct character and a duplicate is never kept.
+
+Indexes:
+    set     dict of hashes to positions, about 100 bytes per character
+    bloom   Bloom filter with an array of the hashes, about 10 bytes per character.
+            Only a filter hit scans the hashes
+"""
+import math
+import warnings
+from functools import lru_cache
+from hashlib import blake2b
+from pathlib import Path
+
+import numpy as np
+
+import character_create
+import dice_engine
+import name_pool
+import probability
+from compact import CompactCharacter
+from table_store import load_tables
+
+INDEXES = ('set', 'bloom')
+
+# Warn when the number of characters asked is over this share of the combination space
+WARN_SHARE = 0.1
+
+# Characters generated per character asked before giving up
+ATTEMPTS_PER_CHARACTER = 100
+
+SEXES = ('male', 'female')
+
+
+def roll_key(char: character_create.Character) -> bytes:
+    """Compact roll vector of a character, equal for equal characters"""
+    return CompactCharacter.from_character(char).data
+
+
+def key_hash(key: bytes) -> int:
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), 'little')
+
+
+class HashSetIndex(object):
+    """Hashes of kept characters to their positions"""
+
+    def __init__(self, capacity: int) -> None:
+        self._positions = {}
+        # positions of further characters with a hash already taken, almost always empty
+        self._collisions = {}
+
+    def candidates(self, digest: int) -> list:
+        """Positions of kept characters that may be equal to the one with this hash"""
+        position = self._positions.get(digest)
+        if position is None:
+            return []
+        return [position] + self._collisions.get(digest, [])
+
+    def add(self, digest: int, position: int) -> None:
+        if digest in self._positions:
+            self._collisions.setdefault(digest, []).append(position)
+        else:
+            self._positions[digest] = position
+
+
+class BloomIndex(object):
+    """
+    Bloom filter sized for capacity hashes at the error rate, in front of an array of the hashes.
+    Bits of a hash are picked by double hashing its two 32 bit halves.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 1e-3) -> None:
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self._digests = np.zeros(capacity, dtype=np.uint64)
+        self._count = 0
+
+    def _bit_positions(self, digest: int) -> list:
+        low, high = digest & 0xFFFFFFFF, digest >> 32 | 1
+        return [(low + i * high) % self.size for i in range(self.hashes)]
+
+    def candidates(self, digest: int) -> list:
+        for position in self._bit_positions(digest):
+            if not self._bits[position >> 3] & (1 << (position & 7)):
+                return []
+        return np.flatnonzero(self._digests[:self._count] == np.uint64(digest)).tolist()
+
+    def add(self, digest: int, position: int) -> None:
+        for bit in self._bit_positions(digest):
+            self._bits[bit >> 3] |= 1 << (bit & 7)
+        if position >= len(self._digests):
+            self._digests = np.concatenate([self._digests, np.zeros(len(self._digests), dtype=np.uint64)])
+        self._digests[position] = digest
+        self._count = max(self._count, position + 1)
+
+
+@lru_cache(maxsize=None)
+def _distinct_names(region: str, sex: str) -> int:
+    pool = name_pool.load_pool()
+    return len({pool.name(region, sex, index) for index in range(pool.size(region, sex))})
+
+
+def _components(role: str) -> list:
+    """Fields of the role nodes grouped by the dependencies between them"""
+    groups = []
+    for node in probability.ROLE_NODES[role]:
+        linked = [group for group in groups if group & ({node.field} | set(node.parents))]
+        merged = {node.field}.union(*linked)
+        groups = [group for group in groups if group not in linked] + [merged]
+    return [tuple(field for field in group if not field.startswith('_')) for group in groups]
+
+
+@lru_cache(maxsize=None)
+def _role_space(role: str, sex: str, tables_path: str) -> int:
+    tables = load_tables(Path(__file__).parent.resolve() / tables_path)
+
+    rolled = math.prod(len(probability.joint(fields, role, sex, tables_path)) for fields in _components(role))
+    for attribute in character_create.Character.attributes_names:
+        rolled *= len(set(tables[attribute.replace('_', ' ').title()]))
+
+    per_person = {
+        'friends': len(set(tables['Friend'])),
+        'enemies': (len(set(tables['Enemy type'])) * len(set(tables['Enemy wrong'])) *
+                    len(probability.person_marginal('Enemy', 'throw', tables_path)) *
+                    len(set(tables['Enemy meet']))),
+        'love': len(set(tables['Love happened'])),
+    }
+    counts = probability.marginal('friends', role, sex, tables_path)
+
+    people = 0
+    for region, language in probability.joint(('cultural_region', 'language'), role, sex, tables_path):
+        names = sum(_distinct_names(region, name_sex) for name_sex in SEXES)
+        relationships = math.prod(sum((combinations * names) ** number for number in counts)
+                                  for combinations in per_person.values())
+        people += sum(_distinct_names(region, own_sex) for own_sex in ([sex] if sex else SEXES)) * relationships
+
+    return rolled * people
+
+
+def combination_space(role: str = None, sex: str = None, tables_path='data/tables.yaml') -> int:
+    """
+    Number of distinct characters that can be generated: distinct compact roll vectors.
+
+    Args:
+        role (str): role of the characters, all roles if not set
+        sex (str): sex of the characters, both if not set
+        tables_path (str): the path to the tables file
+
+    Returns:
+        int: number of distinct characters
+    """
+    roles = [role.capitalize()] if role else load_tables(Path(__file__).parent.resolve() / tables_path)['roles']
+    return sum(_role_space(name, sex, str(tables_path)) for name in roles)
+
+
+def generate_unique(n: int, role: str = None, sex: str = None, seed: int = None, index: str = 'set',
+                    error_rate: float = 1e-3, tables_path='data/tables.yaml') -> list:
+    """
+    Generate n characters, no two of them the same. Duplicates are dropped and generated again.
+
+    Args:
+        n (int): number of characters
+        role (str): role of every character, random per character if not set
+        sex (str): sex of every character, random per character if not set
+        seed (int): seed of the dice, the same seed gives the same characters
+        index (str): one of INDEXES, set is faster, bloom takes less memory
+        error_rate (float): false positive rate of the Bloom filter
+        tables_path (str): the path to the tables file
+
+    Returns:
+        list: distinct characters
+    """
+    if index not in INDEXES:
+        raise ValueError(f"No such index '{index}'. Choose from {list(INDEXES)}")
+
+    space = combination_space(role, sex, tables_path)
+    if n > space:
+        raise ValueError(f'Only {space} distinct characters can be generated, {n} asked')
+    if n > space * WARN_SHARE:
+        warnings.warn(f'{n} characters asked of {space} possible, most generated ones will be duplicates',
+                      RuntimeWarning, stacklevel=2)
+
+    if seed is not None:
+        dice_engine.seed(seed)
+
+    seen = HashSetIndex(n) if index == 'set' else BloomIndex(n, error_rate)
+    characters = []
+    for _ in range(n * ATTEMPTS_PER_CHARACTER):
+        if len(characters) == n:
+            break
+
+        char = character_create.main(None, role, sex, tables_path)
+        key = roll_key(char)
+        digest = key_hash(key)
+        if any(roll_key(characters[position]) == key for position in seen.candidates(digest)):
+            continue
+
+        seen.add(digest, len(characters))
+        characters.append(char)
+    else:
+        if len(characters) < n:
+            raise RuntimeError(f'Only {len(characters)} distinct characters of {n} after '
+                               f'{n * ATTEMPTS_PER_CHARACTER} attempts')
+
+    return characters